@@ -0,0 +1,81 @@
+"""
+Check cold-start import time and that heavy libraries stay lazy
+
+Usage (from level-ops/agent):
+    python benchmarks/import_budget.py [--budget-ms 1000] [--repeat 5]
+
+Each module is imported in a fresh interpreter (best of --repeat runs).
+Exits non-zero if an import exceeds the budget or pulls in a library that
+should only load on first use, so it can gate CI.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+AGENT_DIR = Path(__file__).resolve().parent.parent
+
+# Entry points that must start fast
+MODULES = ("main", "worker")
+
+# Loaded on first use (services) or only inside CPU pool workers
+LAZY_MODULES = ("openai", "supabase", "pandas", "fitz", "tiktoken", "langchain")
+
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - started
+loaded = sorted({{name.split(".")[0] for name in sys.modules}})
+print(json.dumps({{"ms": elapsed * 1000, "loaded": loaded}}))
+"""
+
+
+def probe(module: str) -> dict:
+    # Placeholder credentials so settings validate without a real .env
+    env = {
+        "NEXT_PUBLIC_SUPABASE_URL": "http://localhost:54321",
+        "SUPABASE_SERVICE_KEY": "import-budget",
+        "OPENAI_API_KEY": "import-budget",
+        **os.environ,
+    }
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE.format(module=module)],
+        cwd=AGENT_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--budget-ms", type=float, default=1000.0)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    failures = []
+    for module in MODULES:
+        runs = [probe(module) for _ in range(args.repeat)]
+        best = min(run["ms"] for run in runs)
+        eager = sorted(set(LAZY_MODULES) & set(runs[0]["loaded"]))
+        status = "ok" if best <= args.budget_ms and not eager else "FAIL"
+        print(f"{module:<8} {best:>8.0f} ms  eager={','.join(eager) or '-'}  {status}")
+
+        if best > args.budget_ms:
+            failures.append(f"import {module} took {best:.0f} ms (budget {args.budget_ms:.0f} ms)")
+        if eager:
+            failures.append(f"import {module} loaded {', '.join(eager)} eagerly")
+
+    for failure in failures:
+        print(failure, file=sys.stderr)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
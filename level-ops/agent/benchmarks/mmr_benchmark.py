@@ -0,0 +1,98 @@
+"""
+Microbenchmark MMR diversification at growing candidate counts
+
+Usage (from level-ops/agent):
+    python benchmarks/mmr_benchmark.py [--candidates 100 500 2000] [--k 15]
+        [--repeat 20]
+
+For each candidate count (TOP_K_PRE) this times:
+  decode  - decoding the candidates' embeddings from the hex bytea rows
+            search_chunk_candidates returns
+  mmr     - services.mmr.mmr_select picking k
+  naive   - a per-pair Python loop, as a reference (checked to pick the same)
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Callable, List
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from services.mmr import mmr_select  # noqa: E402
+from services.vectors import from_pgvector_bytea, to_pgvector_binary  # noqa: E402
+
+
+def naive_mmr(embeddings: np.ndarray, relevance: np.ndarray, k: int, lambda_mult: float) -> List[int]:
+    unit = embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+    picks: List[int] = []
+    while len(picks) < min(k, len(relevance)):
+        best, best_score = -1, -np.inf
+        for i in range(len(relevance)):
+            if i in picks:
+                continue
+            redundancy = max((float(unit[i] @ unit[j]) for j in picks), default=0.0)
+            score = lambda_mult * relevance[i] - (1 - lambda_mult) * redundancy
+            if score > best_score:
+                best, best_score = i, score
+        picks.append(best)
+    return picks
+
+
+def candidates(n: int, dimensions: int, seed: int):
+    """
+    Clustered embeddings (near-duplicate chunks) with fused-like relevance
+    """
+    rng = np.random.default_rng(seed)
+    centres = rng.standard_normal((max(n // 10, 1), dimensions), dtype=np.float32)
+    labels = rng.integers(0, len(centres), size=n)
+    embeddings = centres[labels] + 0.3 * rng.standard_normal((n, dimensions), dtype=np.float32)
+    relevance = rng.uniform(0.3, 0.9, size=n).astype(np.float32)
+    return embeddings, relevance
+
+
+def best_ms(run: Callable[[], object], repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run()
+        times.append((time.perf_counter() - started) * 1000)
+    return statistics.median(times)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--candidates", type=int, nargs="+", default=[100, 500, 2000])
+    parser.add_argument("--k", type=int, default=15)
+    parser.add_argument("--lambda-mult", type=float, default=0.6)
+    parser.add_argument("--dimensions", type=int, default=1536)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    print(f"k={args.k}, lambda={args.lambda_mult}, {args.dimensions} dims (median ms)")
+    print(f"{'candidates':>10} {'decode':>8} {'mmr':>8} {'naive':>9}  same picks")
+    for n in args.candidates:
+        embeddings, relevance = candidates(n, args.dimensions, args.seed)
+        rows = ["\\x" + to_pgvector_binary(vector).hex() for vector in embeddings]
+
+        decode_ms = best_ms(
+            lambda: np.stack([from_pgvector_bytea(row) for row in rows]), args.repeat
+        )
+        mmr_ms = best_ms(
+            lambda: mmr_select(embeddings, relevance, args.k, args.lambda_mult), args.repeat
+        )
+        naive_started = time.perf_counter()
+        reference = naive_mmr(embeddings, relevance, args.k, args.lambda_mult)
+        naive_ms = (time.perf_counter() - naive_started) * 1000
+
+        same = mmr_select(embeddings, relevance, args.k, args.lambda_mult) == reference
+        print(f"{n:>10} {decode_ms:>8.2f} {mmr_ms:>8.2f} {naive_ms:>9.1f}  {same}")
+
+
+if __name__ == "__main__":
+    main()
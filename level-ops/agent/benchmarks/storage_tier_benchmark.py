@@ -0,0 +1,142 @@
+"""
+Compare recall and scan cost of the embedding storage tiers
+
+Usage (from level-ops/agent):
+    python benchmarks/storage_tier_benchmark.py [--embeddings chunks.npy]
+        [--rows 50000] [--queries 200] [--k 20] [--rescore 1 4 10]
+
+Simulates what search_chunks_hybrid does per tier with exact scans in NumPy:
+float32 cosine (the reference top-k), halfvec cosine on float16 copies, and
+binary Hamming shortlists of k * rescore rows re-ranked by float32 cosine.
+Recall@k is measured against the float32 top-k. Latencies are brute-force
+scan times, useful to compare tiers with each other, not to predict HNSW
+query times in Postgres (halfvec scans here as float32, so its gain there,
+half the pages read, does not show).
+
+Without --embeddings, clustered synthetic vectors stand in for real chunks.
+Export real ones for a representative run, e.g.:
+    COPY (SELECT embedding FROM document_chunks WHERE org_id = '...') TO ...
+and load them into an (n, 1536) float32 .npy file.
+"""
+
+import argparse
+import statistics
+import time
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+
+# Set bits per byte value, for Hamming distance on packed bits
+POPCOUNT = np.array([bin(value).count("1") for value in range(256)], dtype=np.uint16)
+
+
+def synthetic_embeddings(rows: int, dimensions: int, topics: int, seed: int) -> np.ndarray:
+    """
+    Unit vectors scattered around topic centres, like chunks of related documents
+    """
+    rng = np.random.default_rng(seed)
+    centres = rng.standard_normal((topics, dimensions), dtype=np.float32)
+    labels = rng.integers(0, topics, size=rows)
+    vectors = centres[labels] + 1.5 * rng.standard_normal((rows, dimensions), dtype=np.float32)
+    return normalize(vectors)
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    candidates = np.argpartition(-scores, k)[:k]
+    return candidates[np.argsort(-scores[candidates])]
+
+
+def timed(search: Callable[[np.ndarray], np.ndarray], queries: np.ndarray):
+    results, latencies = [], []
+    for query in queries:
+        started = time.perf_counter()
+        results.append(search(query))
+        latencies.append((time.perf_counter() - started) * 1000)
+    return results, latencies
+
+
+def recall(results: List[np.ndarray], reference: List[np.ndarray]) -> float:
+    hits = sum(len(np.intersect1d(got, want)) for got, want in zip(results, reference))
+    return hits / sum(len(want) for want in reference)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--embeddings", help="(n, d) float32 .npy file")
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--dimensions", type=int, default=1536)
+    parser.add_argument("--topics", type=int, default=200)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=20)
+    parser.add_argument("--rescore", type=int, nargs="+", default=[1, 4, 10])
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    if args.embeddings:
+        corpus = normalize(np.load(args.embeddings))
+    else:
+        corpus = synthetic_embeddings(args.rows, args.dimensions, args.topics, args.seed)
+    rows, dimensions = corpus.shape
+
+    # Queries: perturbed corpus rows, so each has genuine near neighbours
+    rng = np.random.default_rng(args.seed + 1)
+    picks = rng.choice(rows, size=args.queries, replace=False)
+    queries = normalize(
+        corpus[picks] + 0.5 * rng.standard_normal((args.queries, dimensions), dtype=np.float32)
+        / np.sqrt(dimensions)
+    )
+
+    # halfvec values, widened back for the scan (NumPy has no float16 BLAS)
+    half = corpus.astype(np.float16).astype(np.float32)
+    # Sign bits, as pgvector's binary_quantize
+    bits = np.packbits(corpus > 0, axis=1)
+
+    def float32_search(query: np.ndarray) -> np.ndarray:
+        return top_k(corpus @ query, args.k)
+
+    def halfvec_search(query: np.ndarray) -> np.ndarray:
+        return top_k(half @ query.astype(np.float16).astype(np.float32), args.k)
+
+    def binary_search(rescore: int) -> Callable[[np.ndarray], np.ndarray]:
+        shortlist_size = min(args.k * rescore, rows - 1)
+
+        def search(query: np.ndarray) -> np.ndarray:
+            distances = POPCOUNT[np.bitwise_xor(bits, np.packbits(query > 0))].sum(axis=1)
+            shortlist = np.argpartition(distances, shortlist_size)[:shortlist_size]
+            if shortlist_size <= args.k:
+                return shortlist
+            return shortlist[top_k(corpus[shortlist] @ query, args.k)]
+
+        return search
+
+    tiers: Dict[str, Tuple[Callable[[np.ndarray], np.ndarray], int]] = {
+        "float32": (float32_search, dimensions * 4),
+        "halfvec": (halfvec_search, dimensions * 2),
+    }
+    for rescore in args.rescore:
+        # Only the bits are indexed; float32 is kept unindexed for rescoring
+        tiers[f"binary x{rescore}"] = (binary_search(rescore), dimensions // 8)
+
+    print(f"{rows} rows x {dimensions} dims, {args.queries} queries, k={args.k}")
+    print(f"{'tier':<12} {'recall@k':>9} {'p50 ms':>8} {'p95 ms':>8} {'index B/row':>12}")
+
+    reference = None
+    for name, (search, index_bytes) in tiers.items():
+        results, latencies = timed(search, queries)
+        if reference is None:
+            reference = results
+        latencies.sort()
+        print(
+            f"{name:<12} {recall(results, reference):>9.3f} "
+            f"{statistics.median(latencies):>8.2f} "
+            f"{latencies[int(len(latencies) * 0.95) - 1]:>8.2f} "
+            f"{index_bytes:>12}"
+        )
+
+
+if __name__ == "__main__":
+    main()
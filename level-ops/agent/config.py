@@ -2,8 +2,13 @@
 Configuration for RAG document processing
 """
 
+import os
+from pathlib import Path
 from pydantic_settings import BaseSettings
-from typing import Literal
+from typing import Literal, Optional
+
+# Relative paths in settings resolve against the agent directory, not the CWD
+AGENT_DIR = Path(__file__).resolve().parent
 
 
 class Settings(BaseSettings):
@@ -16,10 +21,33 @@ class Settings(BaseSettings):
     OPENAI_EMBED_MODEL: str = "text-embedding-3-small"
     OPENAI_EMBED_DIMENSIONS: int = 1536
 
+    # Embedding provider: "openai", "local" (sentence-transformers on this host's
+    # CPU) or "hash" (deterministic fake for tests and benchmarks). An org's
+    # chunks are pinned to the model that first embedded them.
+    EMBEDDING_PROVIDER: Literal["openai", "local", "hash"] = "openai"
+    EMBEDDING_COLUMN_DIMENSIONS: int = 1536  # document_chunks vector width; narrower models are zero-padded
+    LOCAL_EMBED_MODEL: str = "sentence-transformers/all-MiniLM-L6-v2"
+    LOCAL_EMBED_BACKEND: Literal["onnx", "torch"] = "onnx"
+    LOCAL_EMBED_ONNX_FILE: Optional[str] = "onnx/model_quint8_avx2.onnx"  # int8-quantized export; unset for fp32
+    LOCAL_EMBED_BATCH_SIZE: int = 64  # Texts per inference batch
+    HASH_EMBED_DIMENSIONS: int = 384
+
     # Supabase connection
     NEXT_PUBLIC_SUPABASE_URL: str
     SUPABASE_SERVICE_KEY: str  # Server-side only, bypasses RLS when needed
 
+    # Supabase (PostgREST / Storage) calls run on a bounded thread pool
+    SUPABASE_IO_THREADS: int = 16  # Max concurrent blocking Supabase calls
+    SUPABASE_CALL_TIMEOUT_S: float = 15.0  # Per-call timeout for table/RPC calls
+    SUPABASE_STORAGE_TIMEOUT_S: float = 60.0  # Per-call timeout for file downloads
+
+    # Direct Postgres connection (optional). When set, chunk rows are bulk-loaded
+    # with binary COPY over asyncpg instead of PostgREST JSON inserts.
+    DATABASE_URL: Optional[str] = None
+    DB_POOL_MIN_SIZE: int = 1
+    DB_POOL_MAX_SIZE: int = 10
+    PGVECTOR_SCHEMA: str = "extensions"  # Supabase installs pgvector here; "public" locally
+
     # Chunking parameters
     CHUNK_SIZE: int = 900  # Characters per chunk
     CHUNK_OVERLAP: int = 120  # Overlap between chunks
@@ -47,13 +75,79 @@ class Settings(BaseSettings):
     RERANK_MODEL: str = "cross-encoder/ms-marco-MiniLM-L-6-v2"
     RERANK_TOP_K: int = 15  # Candidates to rerank
     RERANK_BATCH_SIZE: int = 32
+    RERANK_BACKEND: Literal["onnx", "torch"] = "onnx"
+    RERANK_ONNX_FILE: Optional[str] = "onnx/model_quint8_avx2.onnx"  # int8-quantized export; unset for fp32
+    RERANK_MAX_TOKENS: int = 256  # Query + chunk tokens per pair; longer pairs are truncated
+    RERANK_TIMEOUT_MS: float = 250.0  # Past this, results keep their fused scores
+
+    # Tokenizer: BPE files are bundled so encodings load without network access
+    TIKTOKEN_CACHE_DIR: str = "data/tiktoken"  # Relative to agent/
 
     # Embedding dedup cache
     ENABLE_DEDUP_CACHE: bool = True
-
-    # Rate limiting
-    MAX_CONCURRENT_EMBEDDINGS: int = 5
-    EMBEDDING_RATE_LIMIT_PER_MIN: int = 500
+    EMBEDDING_CACHE_PATH: str = ".cache/embeddings.sqlite3"  # Relative to agent/
+    EMBEDDING_CACHE_MAX_MB: int = 512  # LRU eviction beyond this size
+
+    # Search query embedding cache (in memory, per process)
+    QUERY_CACHE_ENABLED: bool = True
+    QUERY_CACHE_TTL_S: float = 3600.0  # Re-embed a repeated query after this long
+    QUERY_CACHE_MAX_MB: int = 64  # LRU eviction beyond this size
+
+    # Query embedding micro-batching: concurrent /search and /embed queries
+    # that miss the cache share one multi-input embedding request
+    QUERY_EMBED_BATCH_WAIT_MS: float = 5.0  # Hold a query this long for others to join
+    QUERY_EMBED_BATCH_MAX_INPUTS: int = 64  # Send immediately once this many are waiting
+
+    # Rate limiting (token buckets shared by every OpenAI call in the process;
+    # tightened automatically from x-ratelimit-* response headers)
+    MAX_CONCURRENT_EMBEDDINGS: int = 5  # Concurrent embeddings.create requests
+    EMBEDDING_RATE_LIMIT_PER_MIN: int = 500  # Embedding requests per minute
+    EMBEDDING_TOKENS_PER_MIN: int = 1_000_000  # Embedding input tokens per minute
+    CHAT_RATE_LIMIT_PER_MIN: int = 500  # Chat completion requests per minute
+    CHAT_TOKENS_PER_MIN: int = 30_000  # Chat prompt + max_tokens per minute
+    OPENAI_RATE_LIMIT_BURST_S: float = 5.0  # Bucket size, in seconds of the per-minute limit
+    OPENAI_MAX_RETRIES: int = 6  # Retries on 429/5xx/connection errors
+    OPENAI_BACKOFF_BASE_S: float = 0.5  # Jittered exponential backoff base
+    OPENAI_BACKOFF_MAX_S: float = 60.0  # Backoff cap (Retry-After is always honored)
+
+    # Embedding request packing (OpenAI caps: 2048 inputs / 300k tokens per request)
+    EMBEDDING_BATCH_MAX_INPUTS: int = 256  # Max texts per embeddings.create call
+    EMBEDDING_BATCH_MAX_TOKENS: int = 100_000  # Token budget per embeddings.create call
+
+    # CPU-bound work (PDF extraction, spreadsheet parsing, tokenization)
+    CPU_POOL_WORKERS: int = 2  # Worker processes; 0 runs tasks on a thread instead
+    CPU_TASK_TIMEOUT_S: float = 120.0  # Per-task timeout (the pool is recycled on expiry)
+    CPU_SHARED_MEMORY_MIN_BYTES: int = 1024 * 1024  # Pass payloads this large via shared memory
+    PDF_PAGES_PER_TASK: int = 16  # Max pages per PDF extraction task
+
+    # Streaming ingest pipeline (per document)
+    INGEST_EMBED_BATCH_SIZE: int = 64  # Chunks handed to the embed stage at once
+    INGEST_EMBED_CONCURRENCY: int = 3  # Embed batches in flight per document
+    INGEST_WRITE_BATCH_SIZE: int = 200  # Rows per DB write
+    INGEST_PIPELINE_QUEUE_DEPTH: int = 4  # Batches buffered between stages
+    INGEST_CHUNK_SECTION_CHARS: int = 200_000  # Text chunked per CPU task; embedding starts after the first section
+
+    # Ingestion scheduling
+    INGEST_WORKERS: int = 4  # Concurrent ingestion pipelines per process
+    INGEST_MAX_QUEUE_DEPTH: int = 500  # Reject new jobs with 503 beyond this backlog
+    INGEST_HIGH_PRIORITY_DEADLINE_S: float = 30.0  # "high" returns early after this
+
+    # Bulk ingest (/ingest/batch and worker jobs share embedding requests)
+    INGEST_BATCH_CONCURRENCY: int = 16  # Documents of one batch processed at once
+    INGEST_BATCH_EMBED_WAIT_MS: float = 50.0  # Hold partial embedding requests this long for more chunks
+
+    # Ingestion progress (/status and /status/.../stream)
+    PROGRESS_RETENTION_S: float = 600.0  # Keep finished documents' progress this long
+    PROGRESS_STREAM_HEARTBEAT_S: float = 15.0  # SSE keep-alive interval
+
+    # Ingestion backend: "local" runs jobs on this process's worker pool,
+    # "postgres" enqueues them in document_ingest_jobs for `python worker.py`
+    INGEST_BACKEND: Literal["local", "postgres"] = "local"
+    JOB_LEASE_SECONDS: int = 120  # Lease length; renewed by heartbeats
+    JOB_HEARTBEAT_INTERVAL_S: float = 30.0
+    JOB_POLL_INTERVAL_S: float = 2.0  # Idle wait between lease attempts
+    JOB_MAX_ATTEMPTS: int = 3
+    JOB_RETRY_BASE_DELAY_S: int = 30  # Doubles with each failed attempt
 
     # Logging
     LOG_LEVEL: Literal["DEBUG", "INFO", "WARNING", "ERROR"] = "INFO"
@@ -67,3 +161,9 @@ class Settings(BaseSettings):
 
 # Global settings instance
 settings = Settings()
+
+# tiktoken reads this when an encoding is first loaded (here and in CPU pool
+# workers, which inherit the environment)
+os.environ.setdefault(
+    "TIKTOKEN_CACHE_DIR", str(AGENT_DIR / settings.TIKTOKEN_CACHE_DIR)
+)
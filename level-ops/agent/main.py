@@ -2,22 +2,37 @@
 FastAPI application for RAG document processing
 """
 
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi.responses import StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
+import asyncio
+import json
 import logging
+import time
 
 from config import settings
 from models import (
     IngestDocumentRequest,
+    IngestBatchRequest,
     IngestStatus,
+    IngestBatchStatus,
+    SearchRequest,
+    SearchResponse,
+    EmbedRequest,
+    EmbedResponse,
     DeleteChunksRequest,
     DeleteResponse,
     AnalyzeFinancialDocumentRequest,
     FinancialAnalysisResponse,
 )
-from services import DocumentProcessor
-from services.financial_analyzer import FinancialAnalyzer, FinancialAnalyzerError
-from supabase import create_client
+from services.container import ServiceContainer
+from services.cpu_pool import cpu_executor
+from services.embed_batcher import EmbeddingBatcher
+from services.rate_limiter import chat_rate_limiter, embedding_rate_limiter
+from services.financial_analyzer import FinancialAnalyzerError
+from services.ingest_scheduler import IngestQueueFullError
+from services.search import EmbeddingModelMismatchError
 
 # Configure logging
 logging.basicConfig(
@@ -26,11 +41,28 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Services are built on first use (clients, tokenizer, heavy imports)
+container = ServiceContainer()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    cpu_executor.start()
+    await container.ingest_scheduler.start()
+    if container.reranker is not None:
+        # Warm in the background so /health answers while the model loads
+        app.state.reranker_warmup = asyncio.create_task(container.reranker.load())
+    yield
+    await container.close()
+    cpu_executor.shutdown()
+
+
 # Initialize FastAPI app
 app = FastAPI(
     title="VAULTS RAG Service",
     description="Document chunking, embedding, and retrieval for RAG",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 # CORS middleware
@@ -42,31 +74,38 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize services
-processor = DocumentProcessor()
-
-# Initialize Supabase client for financial analyzer
-supabase_client = create_client(
-    settings.SUPABASE_URL,
-    settings.SUPABASE_SERVICE_KEY
-)
-financial_analyzer = FinancialAnalyzer(supabase_client)
-
 
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
-    return {"status": "healthy", "service": "rag-processor"}
+    embedder = container.embedder if container.is_built("embedder") else None
+    return {
+        "status": "healthy",
+        "service": "rag-processor",
+        "embedding_cache": embedder.cache.stats() if embedder and embedder.cache else None,
+        "query_cache": (
+            embedder.query_cache.stats() if embedder and embedder.query_cache else None
+        ),
+        "query_batcher": (
+            embedder.query_batcher.stats() if embedder and embedder.query_batcher else None
+        ),
+        "reranker": container.reranker.stats() if container.reranker else None,
+        "rate_limits": {
+            limiter.name: limiter.stats()
+            for limiter in (embedding_rate_limiter, chat_rate_limiter)
+        },
+    }
 
 
 @app.post("/ingest", response_model=IngestStatus)
-async def ingest_document(
-    request: IngestDocumentRequest, background_tasks: BackgroundTasks
-):
+async def ingest_document(request: IngestDocumentRequest):
     """
     Ingest a document: chunk, embed, and store
 
-    Process runs in background to avoid timeout on large documents
+    Jobs run on the bounded ingest worker pool in priority order. High priority
+    requests wait for the result up to INGEST_HIGH_PRIORITY_DEADLINE_S, then
+    return early while processing continues. With INGEST_BACKEND=postgres the
+    job is only enqueued for the worker processes.
     """
     # Support both org_id (new) and tenant_id (backward compat)
     org_id = getattr(request, 'org_id', None) or request.tenant_id
@@ -76,22 +115,48 @@ async def ingest_document(
     )
 
     try:
-        # For high priority, process synchronously
-        if request.priority == "high":
-            status = await processor.process_document(
+        if settings.INGEST_BACKEND == "postgres":
+            await container.job_queue.enqueue(
+                "ingest",
+                str(org_id),
+                str(request.document_id),
+                {"force_reembed": request.force_reembed},
+                request.priority,
+            )
+            return IngestStatus(
+                document_id=request.document_id,
+                tenant_id=org_id,
+                status="queued",
+                total_chunks=0,
+                embedded_chunks=0,
+            )
+
+        job = container.ingest_scheduler.submit(
+            name=f"ingest:{request.document_id}",
+            priority=request.priority,
+            run=lambda: container.processor.process_document(
                 str(request.document_id),
                 str(org_id),
                 request.force_reembed,
-            )
-            return status
-
-        # For normal/low priority, queue in background
-        background_tasks.add_task(
-            processor.process_document,
-            str(request.document_id),
-            str(org_id),
-            request.force_reembed,
+            ),
         )
+        # Only once accepted; the job can't start before this handler yields
+        container.progress.start(str(request.document_id), str(org_id))
+
+        if request.priority == "high":
+            try:
+                return await asyncio.wait_for(
+                    asyncio.shield(job),
+                    timeout=settings.INGEST_HIGH_PRIORITY_DEADLINE_S,
+                )
+            except asyncio.TimeoutError:
+                return IngestStatus(
+                    document_id=request.document_id,
+                    tenant_id=org_id,
+                    status="processing",
+                    total_chunks=0,
+                    embedded_chunks=0,
+                )
 
         return IngestStatus(
             document_id=request.document_id,
@@ -101,24 +166,197 @@ async def ingest_document(
             embedded_chunks=0,
         )
 
+    except IngestQueueFullError as e:
+        logger.warning(f"Ingestion rejected: {str(e)}")
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         logger.error(f"Ingestion error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/ingest/batch", response_model=IngestBatchStatus)
+async def ingest_batch(request: IngestBatchRequest):
+    """
+    Ingest many documents of one org, pooling their chunks into shared
+    embedding requests
+
+    The batch runs as one scheduler job processing up to
+    INGEST_BATCH_CONCURRENCY documents at a time. With wait=true the response
+    carries each document's final status; otherwise every document is
+    reported as queued (poll /status/{document_id}/{org_id}). With
+    INGEST_BACKEND=postgres one job per document is enqueued and workers pool
+    embeddings across the jobs they lease.
+    """
+    org_id = str(request.org_id)
+    document_ids = [str(document_id) for document_id in dict.fromkeys(request.document_ids)]
+
+    logger.info(f"Ingesting batch of {len(document_ids)} documents for org {org_id}")
+
+    def queued() -> IngestBatchStatus:
+        return IngestBatchStatus(
+            org_id=request.org_id,
+            status="queued",
+            documents=[
+                IngestStatus(
+                    document_id=document_id,
+                    tenant_id=request.org_id,
+                    status="queued",
+                    total_chunks=0,
+                    embedded_chunks=0,
+                )
+                for document_id in document_ids
+            ],
+        )
+
+    try:
+        if settings.INGEST_BACKEND == "postgres":
+            await container.job_queue.enqueue_many(
+                "ingest",
+                org_id,
+                document_ids,
+                {"force_reembed": request.force_reembed},
+                request.priority,
+            )
+            return queued()
+
+        embed_batcher = EmbeddingBatcher(container.embedder)
+        started = time.monotonic()
+        job = container.ingest_scheduler.submit(
+            name=f"ingest-batch:{org_id}:{len(document_ids)}",
+            priority=request.priority,
+            run=lambda: container.processor.process_batch(
+                document_ids, org_id, request.force_reembed, embed_batcher
+            ),
+        )
+        for document_id in document_ids:
+            container.progress.start(document_id, org_id)
+        if not request.wait:
+            return queued()
+
+        statuses = await job
+        return IngestBatchStatus(
+            org_id=request.org_id,
+            status="completed",
+            documents=statuses,
+            completed_documents=sum(1 for s in statuses if s.status == "completed"),
+            failed_documents=sum(1 for s in statuses if s.status == "failed"),
+            embedding_requests=embed_batcher.requests,
+            processing_time_ms=(time.monotonic() - started) * 1000,
+        )
+
+    except IngestQueueFullError as e:
+        logger.warning(f"Batch ingestion rejected: {str(e)}")
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        logger.error(f"Batch ingestion error: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/ingest/queue")
+async def get_ingest_queue():
+    """
+    Ingest worker pool status: queue depth per priority lane and running jobs
+    """
+    return container.ingest_scheduler.stats()
+
+
 @app.get("/status/{document_id}/{org_id}")
 async def get_status(document_id: str, org_id: str):
     """
-    Get processing status for a document
+    Get processing status for a document: stored chunk counts plus live
+    progress (stage, chunks done/total, ETA) while it is being ingested
     """
     try:
-        status = await processor.get_chunk_status(document_id, org_id)
+        status = await container.processor.get_chunk_status(document_id, org_id)
         return status
     except Exception as e:
         logger.error(f"Status check error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/status/{document_id}/{org_id}/stream")
+async def stream_status(document_id: str, org_id: str):
+    """
+    Server-sent events with the document's progress on every change
+
+    Sends a `progress` event per update and closes after `completed` or
+    `failed`. If the document isn't being ingested by this process, sends a
+    single `status` event with the stored chunk counts and closes.
+    """
+
+    async def events():
+        sent = False
+        async for snapshot in container.progress.stream(
+            document_id, org_id, settings.PROGRESS_STREAM_HEARTBEAT_S
+        ):
+            if snapshot is None:
+                yield ": keep-alive\n\n"
+                continue
+            sent = True
+            yield f"event: progress\ndata: {json.dumps(snapshot)}\n\n"
+
+        if not sent:
+            try:
+                status = await container.processor.get_chunk_status(document_id, org_id)
+            except Exception as e:
+                logger.error(f"Status stream error: {str(e)}")
+                status = {"error_message": str(e)}
+            yield f"event: status\ndata: {json.dumps(status)}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.post("/search", response_model=SearchResponse)
+async def search(request: SearchRequest):
+    """
+    Hybrid search over an org's chunks: query embedding, candidate retrieval,
+    weighted fusion and top-k selection, with per-phase timings
+    """
+    # Support both org_id (new) and tenant_id (backward compat)
+    org_id = getattr(request, 'org_id', None) or request.tenant_id
+
+    try:
+        return await container.search.search(request, str(org_id))
+    except EmbeddingModelMismatchError as e:
+        logger.warning(f"Search rejected: {str(e)}")
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        logger.error(f"Search error: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/embed", response_model=EmbedResponse)
+async def embed_query(request: EmbedRequest):
+    """
+    Embed a search query with the agent's model: served from the query cache
+    when possible, otherwise batched with concurrent queries. Rejected (409)
+    if the org's chunks were embedded with another model.
+    """
+    started = time.perf_counter()
+    try:
+        embedding, cached = await container.search.embed_query(
+            request.text, str(request.org_id)
+        )
+    except EmbeddingModelMismatchError as e:
+        logger.warning(f"Embedding rejected: {str(e)}")
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        logger.error(f"Embedding error: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    return EmbedResponse(
+        embedding=embedding.tolist(),
+        model=container.embedder.model,
+        dimensions=len(embedding),
+        cached=cached,
+        embedding_time_ms=(time.perf_counter() - started) * 1000,
+    )
+
+
 @app.post("/delete-chunks", response_model=DeleteResponse)
 async def delete_chunks(request: DeleteChunksRequest):
     """
@@ -132,16 +370,10 @@ async def delete_chunks(request: DeleteChunksRequest):
     )
 
     try:
-        response = (
-            processor.supabase.table("document_chunks")
-            .delete()
-            .eq("document_id", str(request.document_id))
-            .eq("org_id", str(org_id))
-            .execute()
+        chunks_deleted = await container.repository.delete_chunks(
+            str(request.document_id), str(org_id)
         )
 
-        chunks_deleted = len(response.data) if response.data else 0
-
         return DeleteResponse(
             success=True,
             chunks_deleted=chunks_deleted,
@@ -170,13 +402,21 @@ async def analyze_financial_document(
     )
 
     try:
-        # Start analysis in background
-        background_tasks.add_task(
-            financial_analyzer.analyze_document,
-            str(request.document_id),
-            str(request.org_id),
-            str(request.user_id),
-        )
+        if settings.INGEST_BACKEND == "postgres":
+            await container.job_queue.enqueue(
+                "financial_analysis",
+                str(request.org_id),
+                str(request.document_id),
+                {"user_id": str(request.user_id)},
+            )
+        else:
+            # Start analysis in background
+            background_tasks.add_task(
+                container.financial_analyzer.analyze_document,
+                str(request.document_id),
+                str(request.org_id),
+                str(request.user_id),
+            )
 
         # Return immediate response with pending status
         return FinancialAnalysisResponse(
@@ -200,7 +440,7 @@ async def get_analysis_status(analysis_id: str, org_id: str):
     Returns full analysis record including extracted metrics if complete.
     """
     try:
-        status = await financial_analyzer.get_analysis_status(analysis_id, org_id)
+        status = await container.financial_analyzer.get_analysis_status(analysis_id, org_id)
         return status
     except FinancialAnalyzerError as e:
         logger.error(f"Analysis status check error: {str(e)}")
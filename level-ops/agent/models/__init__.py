@@ -4,26 +4,34 @@ Pydantic models for RAG document processing
 
 from .requests import (
     IngestDocumentRequest,
+    IngestBatchRequest,
     SearchRequest,
+    EmbedRequest,
     DeleteChunksRequest,
     AnalyzeFinancialDocumentRequest,
 )
 from .responses import (
     IngestStatus,
+    IngestBatchStatus,
     SearchResponse,
     ChunkResult,
+    EmbedResponse,
     DeleteResponse,
     FinancialAnalysisResponse,
 )
 
 __all__ = [
     "IngestDocumentRequest",
+    "IngestBatchRequest",
     "SearchRequest",
+    "EmbedRequest",
     "DeleteChunksRequest",
     "AnalyzeFinancialDocumentRequest",
     "IngestStatus",
+    "IngestBatchStatus",
     "SearchResponse",
     "ChunkResult",
+    "EmbedResponse",
     "DeleteResponse",
     "FinancialAnalysisResponse",
 ]
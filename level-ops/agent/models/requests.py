@@ -2,7 +2,7 @@
 Request models for RAG API endpoints
 """
 
-from typing import Literal, Optional
+from typing import List, Literal, Optional
 from uuid import UUID
 from pydantic import BaseModel, Field
 
@@ -20,7 +20,10 @@ class IngestDocumentRequest(BaseModel):
     )
     force_reembed: bool = Field(
         default=False,
-        description="Force re-embedding even if content hash exists",
+        description=(
+            "Drop all stored chunks and re-embed from scratch. By default only "
+            "changed or shifted chunks are re-written"
+        ),
     )
 
     class Config:
@@ -34,6 +37,48 @@ class IngestDocumentRequest(BaseModel):
         }
 
 
+class IngestBatchRequest(BaseModel):
+    """
+    Request to ingest many documents of one organization
+    """
+
+    org_id: UUID = Field(..., description="Organization UUID for RLS scoping")
+    document_ids: List[UUID] = Field(
+        ...,
+        min_length=1,
+        max_length=500,
+        description="UUIDs of the documents to process",
+    )
+    priority: Literal["high", "normal", "low"] = Field(
+        default="normal", description="Processing priority"
+    )
+    force_reembed: bool = Field(
+        default=False,
+        description="Drop all stored chunks of each document and re-embed from scratch",
+    )
+    wait: bool = Field(
+        default=False,
+        description=(
+            "Wait for the batch to finish and return final per-document statuses. "
+            "Ignored with INGEST_BACKEND=postgres"
+        ),
+    )
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "org_id": "123e4567-e89b-12d3-a456-426614174001",
+                "document_ids": [
+                    "123e4567-e89b-12d3-a456-426614174000",
+                    "123e4567-e89b-12d3-a456-426614174002",
+                ],
+                "priority": "low",
+                "force_reembed": False,
+                "wait": False,
+            }
+        }
+
+
 class SearchRequest(BaseModel):
     """
     Request for hybrid search across document chunks
@@ -74,6 +119,30 @@ class SearchRequest(BaseModel):
         }
 
 
+class EmbedRequest(BaseModel):
+    """
+    Request to embed a search query
+    """
+
+    text: str = Field(
+        ...,
+        min_length=1,
+        max_length=1000,
+        description="Query text to embed",
+    )
+    org_id: UUID = Field(
+        ..., description="Organization whose chunks the query will be compared with"
+    )
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "text": "What are the key risks in this project?",
+                "org_id": "123e4567-e89b-12d3-a456-426614174001",
+            }
+        }
+
+
 class DeleteChunksRequest(BaseModel):
     """
     Request to delete all chunks for a document (for re-embedding)
@@ -22,6 +22,9 @@ class ChunkResult(BaseModel):
     score_type: Literal["fused", "vector", "bm25", "rerank"] = Field(
         ..., description="Type of score"
     )
+    neighbor_of: Optional[UUID] = Field(
+        None, description="Hit this chunk is context for (None for hits)"
+    )
 
     class Config:
         json_schema_extra = {
@@ -51,7 +54,19 @@ class SearchResponse(BaseModel):
     query_embedding_time_ms: float = Field(
         ..., description="Time to generate query embedding"
     )
+    query_embedding_cached: bool = Field(
+        default=False, description="Whether the query embedding came from the cache"
+    )
+    query_cache_hit_rate: Optional[float] = Field(
+        None, description="Query embedding cache hit rate since startup (None when disabled)"
+    )
     search_time_ms: float = Field(..., description="Time for database search")
+    rerank_time_ms: Optional[float] = Field(
+        None, description="Time spent reranking (None when not attempted)"
+    )
+    neighbor_time_ms: Optional[float] = Field(
+        None, description="Time fetching neighbor windows (None when not requested)"
+    )
     total_time_ms: float = Field(..., description="Total processing time")
 
     class Config:
@@ -72,8 +87,35 @@ class SearchResponse(BaseModel):
                 "total_searched": 100,
                 "rerank_applied": True,
                 "query_embedding_time_ms": 45.2,
+                "query_embedding_cached": False,
+                "query_cache_hit_rate": 0.62,
                 "search_time_ms": 123.4,
-                "total_time_ms": 168.6,
+                "rerank_time_ms": 61.0,
+                "neighbor_time_ms": 18.3,
+                "total_time_ms": 247.9,
+            }
+        }
+
+
+class EmbedResponse(BaseModel):
+    """
+    Query embedding, comparable with stored chunk embeddings
+    """
+
+    embedding: List[float] = Field(..., description="Embedding, padded to the stored width")
+    model: str = Field(..., description="Embedding model")
+    dimensions: int = Field(..., description="Length of embedding")
+    cached: bool = Field(..., description="Whether the embedding came from the query cache")
+    embedding_time_ms: float = Field(..., description="Time to embed the query")
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "embedding": [0.0123, -0.0456, 0.0789],
+                "model": "text-embedding-3-small",
+                "dimensions": 1536,
+                "cached": False,
+                "embedding_time_ms": 92.4,
             }
         }
 
@@ -113,6 +155,50 @@ class IngestStatus(BaseModel):
         }
 
 
+class IngestBatchStatus(BaseModel):
+    """
+    Status response for bulk document ingestion
+    """
+
+    org_id: UUID = Field(..., description="Organization UUID")
+    status: Literal["queued", "completed"] = Field(
+        ..., description="Batch status (completed once every document finished or failed)"
+    )
+    documents: List[IngestStatus] = Field(..., description="Per-document status")
+    completed_documents: int = Field(default=0, description="Documents ingested")
+    failed_documents: int = Field(default=0, description="Documents that failed")
+    embedding_requests: int = Field(
+        default=0, description="Embedding API requests shared by the batch"
+    )
+    processing_time_ms: Optional[float] = Field(
+        None, description="Total processing time"
+    )
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "org_id": "123e4567-e89b-12d3-a456-426614174001",
+                "status": "completed",
+                "documents": [
+                    {
+                        "document_id": "123e4567-e89b-12d3-a456-426614174000",
+                        "tenant_id": "123e4567-e89b-12d3-a456-426614174001",
+                        "status": "completed",
+                        "total_chunks": 4,
+                        "embedded_chunks": 4,
+                        "skipped_chunks": 0,
+                        "error_message": None,
+                        "processing_time_ms": 812.4,
+                    }
+                ],
+                "completed_documents": 1,
+                "failed_documents": 0,
+                "embedding_requests": 1,
+                "processing_time_ms": 1020.7,
+            }
+        }
+
+
 class DeleteResponse(BaseModel):
     """
     Response for chunk deletion
@@ -0,0 +1,252 @@
+"""
+Single-pass, token-aware text chunker
+"""
+
+from dataclasses import dataclass, field
+from itertools import accumulate, pairwise
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from config import settings
+
+# Same separator priority as the LangChain splitter this replaces
+DEFAULT_SEPARATORS = ("\n\n", "\n", ". ", " ", "")
+
+Span = Tuple[int, int]
+
+
+def section_bounds(
+    text: str, size: int, separators: Sequence[str] = DEFAULT_SEPARATORS[:-1]
+) -> List[Span]:
+    """
+    Cut text into consecutive sections of roughly `size` characters
+
+    Each cut lands after the first separator (in priority order) found in the
+    `size` characters past the nominal end, so sections break where the
+    chunker would (pages are joined by blank lines). Chunking the sections
+    separately only changes the few chunks around each cut, where packing
+    restarts instead of carrying overlap across it.
+    """
+    bounds: List[Span] = []
+    start = 0
+    while len(text) - start > size:
+        nominal = start + size
+        end = nominal
+        for separator in separators:
+            position = text.find(separator, nominal, nominal + size)
+            if position != -1:
+                end = position + len(separator)
+                break
+        bounds.append((start, end))
+        start = end
+    if start < len(text):
+        bounds.append((start, len(text)))
+    return bounds
+
+
+@dataclass
+class TextChunk:
+    """
+    A chunk of a document with its character span and token count
+    """
+
+    text: str
+    start: int
+    end: int
+    token_count: int
+    metadata: Dict[str, Any] = field(default_factory=dict)
+
+
+class TextChunker:
+    """
+    Recursive separator-aware chunker that works on character spans
+
+    Follows RecursiveCharacterTextSplitter's rules (same separator priority,
+    CHUNK_SIZE/CHUNK_OVERLAP in characters, whitespace stripped) without
+    copying intermediate strings, with two quality differences:
+    - separators stay at the end of the preceding piece, so chunks end on
+      ". " or a line break and start at the next sentence;
+    - pieces on either side of an oversized run are packed together instead
+      of being flushed as separate undersized chunks (which MIN_CHUNK_SIZE
+      would then drop from the index).
+
+    token_count is exact (len(encoding.encode_ordinary(chunk))) without
+    tokenizing the overlap twice. In cl100k-style pre-tokenizers only a
+    whitespace run can continue over a space, so a new pre-token starts at
+    every space that follows a non-space, and counts add up across such
+    cuts. Each chunk is cut at its first and last one; the stretches between
+    cuts are tokenized once and shared by the chunks overlapping them, and
+    only the word or so outside the cuts is tokenized per chunk.
+    """
+
+    def __init__(
+        self,
+        encoding,
+        chunk_size: int = settings.CHUNK_SIZE,
+        chunk_overlap: int = settings.CHUNK_OVERLAP,
+        separators: Sequence[str] = DEFAULT_SEPARATORS,
+    ):
+        if chunk_overlap > chunk_size:
+            raise ValueError(
+                f"chunk_overlap ({chunk_overlap}) is larger than chunk_size ({chunk_size})"
+            )
+        self.encoding = encoding
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.separators = tuple(separators)
+
+    def chunks(self, text: str) -> Iterator[TextChunk]:
+        """
+        Yield chunks of text in document order
+        """
+        for start, end, token_count in self.spans(text):
+            yield TextChunk(text[start:end], start, end, token_count)
+
+    def spans(self, text: str) -> Iterator[Tuple[int, int, int]]:
+        """
+        Yield (start, end, token_count) for each chunk of text
+        """
+        if not text:
+            return
+        pieces = self._split(text, 0, len(text), self.separators)
+        spans = list(self._merge(text, pieces))
+        for (start, end), token_count in zip(spans, self._token_counts(text, spans)):
+            yield start, end, token_count
+
+    def _token_counts(self, text: str, spans: List[Span]) -> List[int]:
+        """
+        Exact token count of each chunk span
+        """
+        encode = self.encoding.encode_ordinary
+        cuts: List[Optional[Span]] = []
+        for start, end in spans:
+            first = self._first_cut(text, start, end)
+            cuts.append(None if first is None else (first, self._last_cut(text, first, end)))
+
+        # Tokens between consecutive cut points, accumulated in document order
+        points = sorted({point for cut in cuts if cut is not None for point in cut})
+        position = {point: i for i, point in enumerate(points)}
+        tokens_before = list(accumulate(
+            (len(encode(text[a:b])) for a, b in pairwise(points)), initial=0
+        ))
+
+        counts = []
+        for (start, end), cut in zip(spans, cuts):
+            if cut is None:
+                counts.append(len(encode(text[start:end])))
+                continue
+            first, last = cut
+            counts.append(
+                len(encode(text[start:first]))
+                + tokens_before[position[last]]
+                - tokens_before[position[first]]
+                + len(encode(text[last:end]))
+            )
+        return counts
+
+    @staticmethod
+    def _first_cut(text: str, start: int, end: int) -> Optional[int]:
+        """
+        First space after a non-space inside (start, end)
+        """
+        position = text.find(" ", start + 1, end)
+        while position != -1 and text[position - 1].isspace():
+            position = text.find(" ", position + 1, end)
+        return None if position == -1 else position
+
+    @staticmethod
+    def _last_cut(text: str, first: int, end: int) -> int:
+        """
+        Last space after a non-space in [first, end], given one at first
+
+        Chunks are stripped, so a chunk followed by a space ends on a cut.
+        """
+        if end == len(text) or text[end] == " ":
+            return end
+        position = text.rfind(" ", first, end)
+        while text[position - 1].isspace():
+            position = text.rfind(" ", first, position)
+        return position
+
+    def _split(
+        self, text: str, start: int, end: int, separators: Sequence[str]
+    ) -> List[Span]:
+        """
+        Split [start, end) into pieces of at most chunk_size characters,
+        recursing to finer separators for pieces that are still too long
+        """
+        separator = separators[-1]
+        remaining: Sequence[str] = ()
+        for i, candidate in enumerate(separators):
+            if candidate == "" or text.find(candidate, start, end) != -1:
+                separator = candidate
+                remaining = separators[i + 1 :]
+                break
+
+        pieces: List[Span] = []
+        for piece_start, piece_end in self._cut(text, start, end, separator):
+            if piece_end - piece_start < self.chunk_size or not remaining:
+                pieces.append((piece_start, piece_end))
+            else:
+                pieces.extend(self._split(text, piece_start, piece_end, remaining))
+        return pieces
+
+    @staticmethod
+    def _cut(text: str, start: int, end: int, separator: str) -> Iterator[Span]:
+        """
+        Cut [start, end) after each separator occurrence
+        """
+        if separator == "":
+            for i in range(start, end):
+                yield i, i + 1
+            return
+
+        piece_start = start
+        position = text.find(separator, start, end)
+        while position != -1:
+            piece_end = position + len(separator)
+            yield piece_start, piece_end
+            piece_start = piece_end
+            position = text.find(separator, piece_end, end)
+        if end > piece_start:
+            yield piece_start, end
+
+    def _merge(self, text: str, pieces: List[Span]) -> Iterator[Span]:
+        """
+        Greedily pack consecutive pieces into chunks, carrying up to
+        chunk_overlap characters of trailing pieces into the next chunk
+        """
+
+        def too_big(first: int, last: int) -> bool:
+            return pieces[last][1] - pieces[first][0] > self.chunk_size
+
+        first = 0  # Index of the first piece in the current chunk
+        for i in range(len(pieces)):
+            if i > first and too_big(first, i):
+                chunk = self._emit(text, pieces[first][0], pieces[i - 1][1])
+                if chunk:
+                    yield chunk
+                # Drop leading pieces until the carry-over fits the overlap and
+                # leaves room for the next piece
+                while first < i and (
+                    pieces[i - 1][1] - pieces[first][0] > self.chunk_overlap
+                    or too_big(first, i)
+                ):
+                    first += 1
+
+        if pieces:
+            chunk = self._emit(text, pieces[first][0], pieces[-1][1])
+            if chunk:
+                yield chunk
+
+    @staticmethod
+    def _emit(text: str, start: int, end: int) -> Optional[Span]:
+        """
+        Strip surrounding whitespace from a chunk span
+        """
+        while start < end and text[start].isspace():
+            start += 1
+        while end > start and text[end - 1].isspace():
+            end -= 1
+        if start == end:
+            return None
+        return start, end
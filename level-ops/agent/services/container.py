@@ -0,0 +1,133 @@
+"""
+Lazily constructed services shared by the API and the ingestion worker
+"""
+
+import logging
+from functools import cached_property
+from typing import TYPE_CHECKING, Optional
+
+from config import settings
+from services.document_processor import DocumentProcessor
+from services.embed_batcher import EmbeddingBatcher
+from services.embedder import EmbeddingService
+from services.financial_analyzer import FinancialAnalyzer
+from services.ingest_scheduler import IngestScheduler
+from services.job_queue import IngestJobQueue
+from services.openai_financial import FinancialExtractor
+from services.pg_writer import PostgresChunkWriter
+from services.progress import ProgressRegistry
+from services.repository import SupabaseRepository
+from services.reranker import CrossEncoderReranker
+from services.search import SearchService
+
+if TYPE_CHECKING:
+    from supabase import Client
+
+logger = logging.getLogger(__name__)
+
+
+class ServiceContainer:
+    """
+    Builds each client/service on first access and tears down what was built
+
+    Nothing here touches the network or loads heavy libraries until a request
+    needs it, so a fresh replica answers /health immediately. The API lifespan
+    and the worker own one container each and call close() on shutdown.
+    """
+
+    @cached_property
+    def supabase(self) -> "Client":
+        from supabase import create_client
+
+        return create_client(
+            settings.NEXT_PUBLIC_SUPABASE_URL,
+            settings.SUPABASE_SERVICE_KEY,  # Service role for server-side ops
+        )
+
+    @cached_property
+    def repository(self) -> SupabaseRepository:
+        return SupabaseRepository(self.supabase)
+
+    @cached_property
+    def embedder(self) -> EmbeddingService:
+        embedder = EmbeddingService()
+        embedder.query_batcher = EmbeddingBatcher(
+            embedder,
+            max_inputs=settings.QUERY_EMBED_BATCH_MAX_INPUTS,
+            max_wait_s=settings.QUERY_EMBED_BATCH_WAIT_MS / 1000,
+        )
+        return embedder
+
+    @cached_property
+    def embed_batcher(self) -> EmbeddingBatcher:
+        # Shared by concurrently running ingest jobs in the worker
+        return EmbeddingBatcher(self.embedder)
+
+    @cached_property
+    def chunk_writer(self) -> Optional[PostgresChunkWriter]:
+        if not settings.DATABASE_URL:
+            return None
+        return PostgresChunkWriter(
+            settings.DATABASE_URL,
+            min_size=settings.DB_POOL_MIN_SIZE,
+            max_size=settings.DB_POOL_MAX_SIZE,
+            vector_schema=settings.PGVECTOR_SCHEMA,
+        )
+
+    @cached_property
+    def progress(self) -> ProgressRegistry:
+        return ProgressRegistry()
+
+    @cached_property
+    def processor(self) -> DocumentProcessor:
+        return DocumentProcessor(
+            self.repository, self.embedder, self.chunk_writer, self.progress
+        )
+
+    @cached_property
+    def reranker(self) -> Optional[CrossEncoderReranker]:
+        if not settings.RERANK_ENABLED:
+            return None
+        return CrossEncoderReranker()
+
+    @cached_property
+    def search(self) -> SearchService:
+        return SearchService(self.repository, self.embedder, self.reranker)
+
+    @cached_property
+    def financial_analyzer(self) -> FinancialAnalyzer:
+        return FinancialAnalyzer(
+            self.repository, FinancialExtractor(settings.OPENAI_API_KEY)
+        )
+
+    @cached_property
+    def job_queue(self) -> IngestJobQueue:
+        return IngestJobQueue(self.repository)
+
+    @cached_property
+    def ingest_scheduler(self) -> IngestScheduler:
+        return IngestScheduler(
+            workers=settings.INGEST_WORKERS,
+            max_queue_depth=settings.INGEST_MAX_QUEUE_DEPTH,
+        )
+
+    def is_built(self, name: str) -> bool:
+        """
+        Whether a service has been constructed yet
+        """
+        return name in self.__dict__
+
+    async def close(self) -> None:
+        """
+        Release pooled connections held by services that were constructed
+        """
+        if self.is_built("ingest_scheduler"):
+            await self.ingest_scheduler.stop()
+        if self.is_built("chunk_writer") and self.chunk_writer is not None:
+            await self.chunk_writer.close()
+        if self.is_built("embedder"):
+            self.embedder.close()
+        if self.is_built("reranker") and self.reranker is not None:
+            self.reranker.close()
+        if self.is_built("repository"):
+            self.repository.close()
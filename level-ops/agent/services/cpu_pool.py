@@ -0,0 +1,251 @@
+"""
+Process pool for CPU-bound work (PDF extraction, spreadsheet parsing, tokenization)
+"""
+
+import asyncio
+import logging
+import multiprocessing
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from typing import Any, Callable, Iterator, List, Optional, Tuple, Union
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# Per-process state, populated by _init_worker in each pool process
+_encoding = None
+
+
+class CpuTaskError(Exception):
+    """Custom exception for CPU pool task errors"""
+    pass
+
+
+class CpuTaskTimeoutError(CpuTaskError):
+    """Raised when a CPU pool task exceeds its timeout"""
+    pass
+
+
+@dataclass(frozen=True)
+class SharedPayload:
+    """
+    Handle to bytes placed in shared memory; only the name crosses the pipe
+    """
+
+    name: str
+    size: int
+
+
+class CpuExecutor:
+    """
+    Dispatch CPU-bound functions to a pool of pre-warmed worker processes
+
+    Workers are spawned once, import PyMuPDF/pandas and load the tokenizer up
+    front, so the first task pays no import cost. Large byte payloads travel
+    through shared memory instead of being pickled down the pipe. With
+    workers=0 tasks run on the default thread executor (no extra processes),
+    which keeps the event loop free but stays on one core.
+    """
+
+    def __init__(
+        self,
+        workers: int = settings.CPU_POOL_WORKERS,
+        timeout_s: float = settings.CPU_TASK_TIMEOUT_S,
+        shared_memory_min_bytes: int = settings.CPU_SHARED_MEMORY_MIN_BYTES,
+    ):
+        self.workers = workers
+        self.timeout_s = timeout_s
+        self.shared_memory_min_bytes = shared_memory_min_bytes
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def start(self) -> None:
+        """
+        Spawn the worker processes (idempotent)
+        """
+        if self.workers <= 0 or self._pool is not None:
+            return
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+        )
+        # Submit one no-op per worker so processes spawn and warm up now
+        for _ in range(self.workers):
+            self._pool.submit(_ping)
+        logger.info(f"Started CPU pool with {self.workers} worker processes")
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    async def run(
+        self,
+        func: Callable[..., Any],
+        *args: Any,
+        timeout_s: Optional[float] = None,
+    ) -> Any:
+        """
+        Run a module-level (picklable) function in the pool
+
+        bytes arguments at or above CPU_SHARED_MEMORY_MIN_BYTES are passed as
+        SharedPayload handles; task functions open them with open_payload().
+        """
+        timeout_s = timeout_s or self.timeout_s
+        loop = asyncio.get_running_loop()
+
+        if self.workers <= 0:
+            return await asyncio.wait_for(
+                loop.run_in_executor(None, func, *args), timeout=timeout_s
+            )
+
+        self.start()
+        segments: List[shared_memory.SharedMemory] = []
+        call_args = [self._share(arg, segments) for arg in args]
+        try:
+            return await asyncio.wait_for(
+                loop.run_in_executor(self._pool, func, *call_args), timeout=timeout_s
+            )
+        except asyncio.TimeoutError:
+            # A running process task can't be cancelled; replace the pool so the
+            # stuck worker doesn't hold a slot forever
+            logger.error(f"{func.__name__} timed out after {timeout_s}s; recycling CPU pool")
+            self._recycle()
+            raise CpuTaskTimeoutError(f"{func.__name__} timed out after {timeout_s}s")
+        finally:
+            for segment in segments:
+                segment.close()
+                segment.unlink()
+
+    @contextmanager
+    def shared(self, data: bytes) -> Iterator[Union[bytes, SharedPayload]]:
+        """
+        Place bytes in shared memory once for several tasks that read them
+        """
+        if self.workers <= 0 or len(data) < self.shared_memory_min_bytes:
+            yield data
+            return
+        segments: List[shared_memory.SharedMemory] = []
+        try:
+            yield self._share(data, segments)
+        finally:
+            for segment in segments:
+                segment.close()
+                segment.unlink()
+
+    def _share(self, arg: Any, segments: List[shared_memory.SharedMemory]) -> Any:
+        if not isinstance(arg, (bytes, bytearray)) or len(arg) < self.shared_memory_min_bytes:
+            return arg
+        segment = shared_memory.SharedMemory(create=True, size=len(arg))
+        segment.buf[: len(arg)] = arg
+        segments.append(segment)
+        return SharedPayload(name=segment.name, size=len(arg))
+
+    def _recycle(self) -> None:
+        pool = self._pool
+        self._pool = None
+        if pool is None:
+            return
+        for process in list(getattr(pool, "_processes", {}).values()):
+            process.terminate()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+@contextmanager
+def open_payload(payload: Union[bytes, SharedPayload]) -> Iterator[Union[bytes, memoryview]]:
+    """
+    A task argument's bytes inside a worker process, shared memory uncopied
+
+    A shared payload is a memoryview over the segment, valid only inside
+    the block.
+    """
+    if not isinstance(payload, SharedPayload):
+        yield payload
+        return
+    # The parent owns the segment and unlinks it once the task returns
+    segment = shared_memory.SharedMemory(name=payload.name)
+    view = segment.buf[: payload.size]
+    try:
+        yield view
+    finally:
+        view.release()
+        segment.close()
+
+
+def _init_worker() -> None:
+    """
+    Warm imports and load the tokenizer once per worker process
+    """
+    global _encoding
+    import fitz  # noqa: F401
+    import pandas  # noqa: F401
+    import tiktoken
+
+    try:
+        _encoding = tiktoken.encoding_for_model("gpt-4")
+    except Exception as e:
+        # Don't break the pool; chunk_text loads the tokenizer on first use
+        logger.warning(f"Could not preload tokenizer in CPU worker: {str(e)}")
+
+
+def _ping() -> bool:
+    return True
+
+
+# Task functions (module-level so they pickle by reference)
+
+def pdf_page_count(pdf_bytes: Union[bytes, SharedPayload]) -> int:
+    from services.pdf_extractor import PDFExtractor
+
+    with open_payload(pdf_bytes) as data:
+        return PDFExtractor().page_count(data)
+
+
+def extract_pdf_pages(
+    pdf_bytes: Union[bytes, SharedPayload], start: int, stop: int
+) -> List[Tuple[int, str]]:
+    from services.pdf_extractor import PDFExtractor
+
+    with open_payload(pdf_bytes) as data:
+        return PDFExtractor().extract_pages(data, start, stop)
+
+
+def parse_financial_file(
+    file_content: Union[bytes, SharedPayload],
+    file_type: str,
+    file_name: Optional[str] = None,
+) -> dict:
+    """
+    Parse a spreadsheet and return its JSON rows (DataFrames never leave the worker)
+    """
+    from services.file_parser import FileParser
+
+    file_parser = FileParser()
+    with open_payload(file_content) as data:
+        dataframes = file_parser.parse(data, file_type, file_name)
+    return file_parser.dataframes_to_json(dataframes)
+
+
+def chunk_text(text: str, offset: int = 0) -> List[Tuple[int, int, int]]:
+    """
+    Chunk a document (or a section starting at `offset`) and return
+    (start, end, token_count) spans in document offsets
+    """
+    global _encoding
+    from services.chunker import TextChunker
+
+    if _encoding is None:
+        import tiktoken
+
+        _encoding = tiktoken.encoding_for_model("gpt-4")
+    return [
+        (start + offset, end + offset, token_count)
+        for start, end, token_count in TextChunker(_encoding).spans(text)
+    ]
+
+
+# Shared instance, started by the API lifespan and the worker
+cpu_executor = CpuExecutor()
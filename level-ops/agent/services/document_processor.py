@@ -2,16 +2,26 @@
 Document processor: chunking, embedding, and storage
 """
 
+import asyncio
+import logging
 import time
-from typing import List, Dict, Optional
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Tuple
 from uuid import UUID
-from supabase import create_client, Client
-from langchain.text_splitter import RecursiveCharacterTextSplitter
 
 from config import settings
 from models import IngestStatus
+from services.chunker import TextChunk, section_bounds
+from services.cpu_pool import chunk_text, cpu_executor
+from services.embed_batcher import EmbeddingBatcher
 from services.embedder import EmbeddingService
-from services.pdf_extractor import PDFExtractor
+from services.ingest_pipeline import IngestPipeline
+from services.pdf_extractor import PDFExtractor, PageIndex
+from services.pg_writer import PostgresChunkWriter
+from services.progress import IngestProgress, ProgressRegistry
+from services.repository import SupabaseRepository
+
+logger = logging.getLogger(__name__)
 
 
 class DocumentProcessor:
@@ -19,22 +29,55 @@ class DocumentProcessor:
     Process documents: extract, chunk, embed, and store
     """
 
-    def __init__(self):
-        self.supabase: Client = create_client(
-            settings.NEXT_PUBLIC_SUPABASE_URL,
-            settings.SUPABASE_SERVICE_KEY,  # Service role for server-side ops
-        )
-        self.embedder = EmbeddingService()
+    def __init__(
+        self,
+        repository: SupabaseRepository,
+        embedder: EmbeddingService,
+        chunk_writer: Optional[PostgresChunkWriter] = None,
+        progress: Optional[ProgressRegistry] = None,
+    ):
+        self.repository = repository
+        self.embedder = embedder
+        self.chunk_writer = chunk_writer
+        self.progress = progress or ProgressRegistry()
         self.pdf_extractor = PDFExtractor()
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=settings.CHUNK_SIZE,
-            chunk_overlap=settings.CHUNK_OVERLAP,
-            length_function=len,
-            separators=["\n\n", "\n", ". ", " ", ""],
+
+    async def process_batch(
+        self,
+        document_ids: List[str],
+        tenant_id: str,
+        force_reembed: bool = False,
+        embed_batcher: Optional[EmbeddingBatcher] = None,
+    ) -> List[IngestStatus]:
+        """
+        Process many documents of one org, pooling their embedding requests
+
+        Up to INGEST_BATCH_CONCURRENCY documents run at once; each gets its own
+        status, so one bad document doesn't fail the rest.
+        """
+        embed_batcher = embed_batcher or EmbeddingBatcher(self.embedder)
+        semaphore = asyncio.Semaphore(settings.INGEST_BATCH_CONCURRENCY)
+
+        async def process(document_id: str) -> IngestStatus:
+            async with semaphore:
+                return await self.process_document(
+                    document_id, tenant_id, force_reembed, embed_batcher
+                )
+
+        statuses = await asyncio.gather(*(process(d) for d in document_ids))
+        logger.info(
+            f"Batch of {len(document_ids)} documents: "
+            f"{sum(1 for s in statuses if s.status == 'completed')} completed, "
+            f"embedding requests {embed_batcher.stats()}"
         )
+        return list(statuses)
 
     async def process_document(
-        self, document_id: str, tenant_id: str, force_reembed: bool = False
+        self,
+        document_id: str,
+        tenant_id: str,
+        force_reembed: bool = False,
+        embed_batcher: Optional[EmbeddingBatcher] = None,
     ) -> IngestStatus:
         """
         Main processing pipeline:
@@ -42,21 +85,36 @@ class DocumentProcessor:
         2. Chunk text
         3. Generate embeddings with dedup
         4. Store chunks with metadata
+
+        Progress is published to the registry as the document moves through
+        the stages.
         """
+        progress = self.progress.start(document_id, tenant_id, stage="fetching")
+        try:
+            status = await self._process_document(
+                document_id, tenant_id, force_reembed, embed_batcher, progress
+            )
+        except asyncio.CancelledError:
+            progress.finish("Ingestion was cancelled")
+            raise
+        progress.finish(status.error_message if status.status == "failed" else None)
+        return status
+
+    async def _process_document(
+        self,
+        document_id: str,
+        tenant_id: str,
+        force_reembed: bool,
+        embed_batcher: Optional[EmbeddingBatcher],
+        progress: IngestProgress,
+    ) -> IngestStatus:
         start_time = time.time()
 
         try:
             # Fetch document (support both org_id and tenant_id for backward compat)
-            doc_response = (
-                self.supabase.table("documents")
-                .select("id, name, text_content, tenant_id, org_id, mime_type, file_path")
-                .eq("id", document_id)
-                .or_(f"tenant_id.eq.{tenant_id},org_id.eq.{tenant_id}")
-                .single()
-                .execute()
-            )
+            document = await self.repository.get_document(document_id, tenant_id)
 
-            if not doc_response.data:
+            if not document:
                 return IngestStatus(
                     document_id=UUID(document_id),
                     tenant_id=UUID(tenant_id),
@@ -66,8 +124,9 @@ class DocumentProcessor:
                     error_message="Document not found",
                 )
 
-            document = doc_response.data
             text_content = document.get("text_content", "")
+            document_metadata = document.get("metadata") or {}
+            page_index = PageIndex.from_dict(document_metadata.get("page_index"))
 
             print(f"Document text_content length: {len(text_content) if text_content else 0}")
             print(f"Document mime_type: {document.get('mime_type')}")
@@ -90,19 +149,26 @@ class DocumentProcessor:
                     if file_path:
                         # Download PDF from storage
                         print(f"Downloading PDF from storage...")
-                        pdf_response = self.supabase.storage.from_("documents").download(file_path)
+                        pdf_response = await self.repository.download_file(
+                            "documents", file_path
+                        )
                         print(f"Downloaded {len(pdf_response)} bytes")
 
                         if pdf_response:
+                            progress.set_stage("extracting")
                             print("Extracting text with PyMuPDF...")
-                            text_content = self.pdf_extractor.extract_text_from_bytes(pdf_response)
+                            text_content, page_index = await self.pdf_extractor.extract_parallel(
+                                pdf_response
+                            )
                             print(f"Extracted {len(text_content)} characters of text")
 
-                            # Update document with extracted text
+                            # Update document with extracted text and page offsets
                             print("Updating document with extracted text...")
-                            self.supabase.table("documents").update({
-                                "text_content": text_content
-                            }).eq("id", document_id).execute()
+                            await self.repository.update_document_text(
+                                document_id,
+                                text_content,
+                                {**document_metadata, "page_index": page_index.to_dict()},
+                            )
                             print("Document updated successfully")
                 except Exception as pdf_error:
                     import traceback
@@ -120,76 +186,59 @@ class DocumentProcessor:
                     error_message="Document has no text content and PDF extraction failed",
                 )
 
-            # Delete existing chunks if force_reembed
-            if force_reembed:
-                self.supabase.table("document_chunks").delete().eq(
-                    "document_id", document_id
-                ).eq("tenant_id", tenant_id).execute()
-
-            # Chunk the document
-            chunks = self._chunk_text(text_content)
-
-            # Process chunks with deduplication
-            chunk_records = []
-            skipped_count = 0
-
-            for idx, chunk_text in enumerate(chunks):
-                # Generate embedding with metadata
-                embed_data = await self.embedder.embed_with_metadata(chunk_text)
-
-                # Check for existing chunk by hash (dedup)
-                if not force_reembed and settings.ENABLE_DEDUP_CACHE:
-                    existing = (
-                        self.supabase.table("document_chunks")
-                        .select("id, embedding")
-                        .eq("org_id", tenant_id)  # tenant_id param is actually org_id
-                        .eq("content_sha256", embed_data["content_sha256"])
-                        .limit(1)
-                        .execute()
-                    )
-
-                    if existing.data and existing.data[0].get("embedding"):
-                        # Reuse existing embedding
-                        embed_data["embedding"] = existing.data[0]["embedding"]
-                        skipped_count += 1
-
-                # Generate tsvector for full-text search
-                # Note: We'll let Postgres handle this via a trigger or compute it here
-                chunk_records.append(
-                    {
-                        "tenant_id": None,  # Using org_id instead
-                        "org_id": tenant_id,  # tenant_id param is actually org_id
-                        "document_id": document_id,
-                        "chunk_index": idx,
-                        "content": chunk_text,
-                        "embedding": embed_data["embedding"],
-                        "content_sha256": embed_data["content_sha256"],
-                        "token_count": embed_data["token_count"],
-                        "metadata": {},
-                        "version": 1,
-                    }
+            await self.embedder.load_model()
+            org_embedding = await self.repository.get_org_embedding_settings(tenant_id)
+            pinned_model = org_embedding["embedding_model"]
+            mismatch = self.embedder.pin_mismatch(
+                pinned_model, org_embedding["embedding_dimensions"]
+            )
+            if pinned_model is None:
+                await self.repository.pin_org_embedding_model(
+                    tenant_id, self.embedder.model, self.embedder.model_dimensions
+                )
+            elif mismatch:
+                # Vectors from different models can't be searched together
+                return IngestStatus(
+                    document_id=UUID(document_id),
+                    tenant_id=UUID(tenant_id),
+                    status="failed",
+                    total_chunks=0,
+                    embedded_chunks=0,
+                    error_message=mismatch,
                 )
 
-            # Batch insert chunks
-            if chunk_records:
-                insert_response = (
-                    self.supabase.table("document_chunks")
-                    .insert(chunk_records)
-                    .execute()
+            # Full re-embed drops every stored chunk; otherwise diff against them
+            stored_hashes: Dict[int, Optional[str]] = {}
+            if force_reembed:
+                await self.repository.delete_chunks(document_id, tenant_id)
+            else:
+                stored_hashes = await self.repository.get_chunk_hashes(
+                    document_id, tenant_id
                 )
 
-                if not insert_response.data:
-                    return IngestStatus(
-                        document_id=UUID(document_id),
-                        tenant_id=UUID(tenant_id),
-                        status="failed",
-                        total_chunks=len(chunks),
-                        embedded_chunks=0,
-                        error_message="Failed to insert chunks",
-                    )
+            # Stream chunks through the embed and write stages
+            pipeline = IngestPipeline(
+                self.repository,
+                self.embedder,
+                document_id,
+                tenant_id,  # tenant_id param is actually org_id
+                stored_hashes,
+                force_reembed,
+                self.chunk_writer,
+                embed_batcher,
+                progress,
+                org_embedding["embedding_storage_tier"],
+            )
+            progress.set_stage("chunking")
+            stats = await pipeline.run(
+                self._iter_chunks(text_content, page_index, progress)
+            )
 
-                # Update tsvector for full-text search
-                await self._update_tsvectors(document_id, tenant_id)
+            logger.info(
+                f"Document {document_id}: {stats.total_chunks} chunks, "
+                f"{stats.written_chunks} written, {stats.unchanged_chunks} unchanged, "
+                f"{stats.embedded_chunks} embedded"
+            )
 
             processing_time_ms = (time.time() - start_time) * 1000
 
@@ -197,9 +246,9 @@ class DocumentProcessor:
                 document_id=UUID(document_id),
                 tenant_id=UUID(tenant_id),
                 status="completed",
-                total_chunks=len(chunks),
-                embedded_chunks=len(chunk_records),
-                skipped_chunks=skipped_count,
+                total_chunks=stats.total_chunks,
+                embedded_chunks=stats.total_chunks,
+                skipped_chunks=stats.unchanged_chunks + stats.reused_embeddings,
                 processing_time_ms=processing_time_ms,
             )
 
@@ -213,48 +262,89 @@ class DocumentProcessor:
                 error_message=str(e),
             )
 
-    def _chunk_text(self, text: str) -> List[str]:
-        """
-        Split text into chunks using LangChain's text splitter
+    async def _iter_chunks(
+        self,
+        text: str,
+        page_index: Optional[PageIndex] = None,
+        progress: Optional[IngestProgress] = None,
+    ) -> AsyncIterator[TextChunk]:
         """
-        chunks = self.text_splitter.split_text(text)
-        # Filter out chunks that are too small
-        return [c for c in chunks if len(c.strip()) >= settings.MIN_CHUNK_SIZE]
+        Materialize chunk spans (from TextChunker) lazily, in document order
 
-    async def _update_tsvectors(self, document_id: str, tenant_id: str):
+        Spans arrive one section at a time, so the pipeline embeds the first
+        sections while later ones are still being chunked; chunks_total grows
+        as they arrive and is final once the stage moves on to "embedding".
+        Each chunk's metadata carries its page span when the document has a
+        page index.
+        """
+        chunks_total = 0
+        async for spans in self._chunk_sections(text):
+            # Filter out chunks that are too small
+            spans = [
+                (start, end, token_count)
+                for start, end, token_count in spans
+                if end - start >= settings.MIN_CHUNK_SIZE
+            ]
+            chunks_total += len(spans)
+            if progress is not None:
+                progress.set_stage(progress.stage, chunks_total=chunks_total)
+
+            for start, end, token_count in spans:
+                chunk = TextChunk(text[start:end], start, end, token_count)
+                if page_index is not None:
+                    page_span = page_index.span(start, end)
+                    if page_span:
+                        chunk.metadata["page_start"], chunk.metadata["page_end"] = page_span
+                yield chunk
+
+        if progress is not None:
+            progress.set_stage("embedding", chunks_total=chunks_total)
+
+    async def _chunk_sections(
+        self, text: str
+    ) -> AsyncIterator[List[Tuple[int, int, int]]]:
         """
-        Update tsvector columns for full-text search
-        Uses Postgres to_tsvector for proper language processing
+        Chunk text section by section on the CPU pool, yielding each
+        section's spans in order
 
-        Note: This is a workaround since supabase-py doesn't have direct SQL execution.
-        In production, use a database trigger or function to auto-populate tsv on insert.
+        Up to one section per worker is chunked ahead of the consumer.
         """
-        # Use RPC to execute SQL via a custom function
-        # For now, we'll skip this and rely on a database trigger instead
-        # TODO: Create a trigger: CREATE TRIGGER update_tsv BEFORE INSERT OR UPDATE ON document_chunks
-        #       FOR EACH ROW EXECUTE FUNCTION tsvector_update_trigger(tsv, 'pg_catalog.english', content);
-        pass
+        lookahead = max(cpu_executor.workers, 1)
+        pending: Deque[asyncio.Future] = deque()
+        try:
+            for start, end in section_bounds(text, settings.INGEST_CHUNK_SECTION_CHARS):
+                pending.append(
+                    asyncio.ensure_future(
+                        cpu_executor.run(chunk_text, text[start:end], start)
+                    )
+                )
+                if len(pending) > lookahead:
+                    yield await pending.popleft()
+            while pending:
+                yield await pending.popleft()
+        finally:
+            for future in pending:
+                future.cancel()
 
     async def get_chunk_status(
-        self, document_id: str, tenant_id: str
-    ) -> Dict[str, int]:
+        self, document_id: str, org_id: str
+    ) -> Dict[str, Any]:
         """
         Get chunking/embedding status for a document
+
+        Stored chunks are counted server-side (no rows are transferred);
+        live progress is included while this process is ingesting it.
         """
-        response = (
-            self.supabase.table("document_chunks")
-            .select("id, embedding")
-            .eq("document_id", document_id)
-            .eq("tenant_id", tenant_id)
-            .execute()
+        total, embedded = await asyncio.gather(
+            self.repository.count_chunks(document_id, org_id),
+            self.repository.count_chunks(document_id, org_id, embedded_only=True),
         )
-
-        chunks = response.data or []
-        total = len(chunks)
-        embedded = sum(1 for c in chunks if c.get("embedding") is not None)
+        progress = self.progress.get(document_id, org_id)
 
         return {
             "total_chunks": total,
             "embedded_chunks": embedded,
             "is_fully_embedded": total > 0 and embedded == total,
+            "progress": progress.to_dict() if progress else None,
         }
+
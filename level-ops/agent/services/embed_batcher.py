@@ -0,0 +1,115 @@
+"""
+Coalesce embedding requests from concurrent callers (ingest pipelines, queries)
+"""
+
+import asyncio
+import logging
+from typing import List, Optional, Set, Tuple
+
+import numpy as np
+
+from config import settings
+from services.embedder import EmbeddingService
+from services.vectors import Vector
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingBatcher:
+    """
+    Pool texts from many callers into full embeddings.create requests
+
+    Drop-in for EmbeddingService.embed_many. A request goes out as soon as
+    the pending texts reach the input or token cap, or max_wait_s after the
+    first pending text, so documents with a handful of chunks (or concurrent
+    search queries) share requests instead of paying a round trip each.
+    Results are routed back to each caller in its own order; a failed request
+    fails only its callers.
+    """
+
+    def __init__(
+        self,
+        embedder: EmbeddingService,
+        max_inputs: int = settings.EMBEDDING_BATCH_MAX_INPUTS,
+        max_tokens: int = settings.EMBEDDING_BATCH_MAX_TOKENS,
+        max_wait_s: float = settings.INGEST_BATCH_EMBED_WAIT_MS / 1000,
+    ):
+        self.embedder = embedder
+        self.max_inputs = max_inputs
+        self.max_tokens = max_tokens
+        self.max_wait_s = max_wait_s
+        self._pending: List[Tuple[str, int, asyncio.Future]] = []
+        self._pending_tokens = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._in_flight: Set[asyncio.Task] = set()
+        self.requests = 0
+        self.inputs = 0
+
+    async def embed_many(
+        self, texts: List[str], token_counts: Optional[List[int]] = None
+    ) -> Vector:
+        """
+        Embed texts as part of whichever pooled requests they land in
+        """
+        if not texts:
+            return np.empty((0, self.embedder.dimensions), dtype=np.float32)
+        if token_counts is None:
+            token_counts = [self.embedder.count_tokens(text) for text in texts]
+
+        loop = asyncio.get_running_loop()
+        futures = []
+        for text, tokens in zip(texts, token_counts):
+            if self._pending and (
+                len(self._pending) >= self.max_inputs
+                or self._pending_tokens + tokens > self.max_tokens
+            ):
+                self._flush()
+            future = loop.create_future()
+            self._pending.append((text, tokens, future))
+            self._pending_tokens += tokens
+            futures.append(future)
+
+        if len(self._pending) >= self.max_inputs:
+            self._flush()
+        elif self._pending and self._timer is None:
+            self._timer = loop.call_later(self.max_wait_s, self._flush)
+
+        return np.stack(await asyncio.gather(*futures))
+
+    def stats(self) -> dict:
+        return {
+            "embedding_requests": self.requests,
+            "embedded_inputs": self.inputs,
+            "mean_batch_size": round(self.inputs / self.requests, 1) if self.requests else 0,
+        }
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        items, self._pending, self._pending_tokens = self._pending, [], 0
+        if not items:
+            return
+        task = asyncio.create_task(self._send(items))
+        self._in_flight.add(task)
+        task.add_done_callback(self._in_flight.discard)
+
+    async def _send(self, items: List[Tuple[str, int, asyncio.Future]]) -> None:
+        self.requests += 1
+        self.inputs += len(items)
+        try:
+            vectors = await self.embedder.embed_many(
+                [text for text, _, _ in items],
+                [tokens for _, tokens, _ in items],
+                max_inputs=self.max_inputs,
+            )
+        except Exception as e:
+            logger.error(f"Pooled embedding request ({len(items)} inputs) failed: {str(e)}")
+            for _, _, future in items:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, _, future), vector in zip(items, vectors):
+            if not future.done():
+                future.set_result(vector)
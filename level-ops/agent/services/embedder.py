@@ -1,27 +1,108 @@
 """
-Embedding generation service with caching and rate limiting
+Embedding generation service with caching and request packing
+
+Embeddings come from a pluggable provider (services/embedding_providers.py)
+and are kept as float32 NumPy arrays (one 2-D array per batch), padded to
+the document_chunks column width, until they are written.
 """
 
 import hashlib
 import asyncio
-from typing import List, Optional
-from openai import AsyncOpenAI
-import tiktoken
+from functools import cached_property
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+import numpy as np
 
 from config import settings
+from services.embedding_cache import EmbeddingCache
+from services.embedding_providers import (
+    EmbeddingProvider,
+    EmbeddingProviderError,
+    create_embedding_provider,
+)
+from services.query_cache import QueryEmbeddingCache, normalize_query
+from services.vectors import Vector
+
+if TYPE_CHECKING:
+    from services.embed_batcher import EmbeddingBatcher
 
 
 class EmbeddingService:
     """
-    Service for generating embeddings with deduplication and rate limiting
+    Service for generating embeddings with deduplication and request packing
+
+    `model` identifies the provider's model for chunk records and caches;
+    `dimensions` is the stored width. Narrower models are zero-padded to
+    it, which leaves cosine similarity between their vectors unchanged.
+
+    `query_batcher`, when set (by the service container), coalesces the
+    query embeddings of concurrent searches into shared requests.
     """
 
-    def __init__(self):
-        self.client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
-        self.model = settings.OPENAI_EMBED_MODEL
-        self.dimensions = settings.OPENAI_EMBED_DIMENSIONS
-        self.encoding = tiktoken.encoding_for_model("gpt-4")
+    def __init__(
+        self,
+        provider: Optional[EmbeddingProvider] = None,
+        dimensions: int = settings.EMBEDDING_COLUMN_DIMENSIONS,
+    ):
+        self.provider = provider or create_embedding_provider()
+        self.model = self.provider.model_id
+        self.dimensions = dimensions
         self._semaphore = asyncio.Semaphore(settings.MAX_CONCURRENT_EMBEDDINGS)
+        self.cache: Optional[EmbeddingCache] = None
+        if settings.ENABLE_DEDUP_CACHE:
+            self.cache = EmbeddingCache(
+                settings.EMBEDDING_CACHE_PATH,
+                settings.EMBEDDING_CACHE_MAX_MB * 1024 * 1024,
+            )
+        self.query_cache: Optional[QueryEmbeddingCache] = None
+        if settings.QUERY_CACHE_ENABLED:
+            self.query_cache = QueryEmbeddingCache(
+                settings.QUERY_CACHE_MAX_MB * 1024 * 1024,
+                settings.QUERY_CACHE_TTL_S,
+            )
+        self.query_batcher: Optional["EmbeddingBatcher"] = None
+
+    @property
+    def model_dimensions(self) -> int:
+        """
+        The model's own output width, recorded on chunks
+
+        For a local model this loads it; await load_model() first on the loop.
+        """
+        return self.provider.dimensions
+
+    def pin_mismatch(
+        self, pinned_model: Optional[str], pinned_dimensions: Optional[int]
+    ) -> Optional[str]:
+        """
+        Why this service's vectors can't be used with an org's pinned model
+        (None if they can, or the org has none pinned yet)
+
+        For a local model this loads it; await load_model() first on the loop.
+        """
+        if pinned_model is None:
+            return None
+        if pinned_model == self.model and pinned_dimensions in (None, self.model_dimensions):
+            return None
+        return (
+            f"Organization embeds with {pinned_model} ({pinned_dimensions} dims), "
+            f"this agent with {self.model} ({self.model_dimensions} dims)"
+        )
+
+    async def load_model(self) -> None:
+        """
+        Load a local model off the event loop (no-op for OpenAI)
+        """
+        await self.provider.load()
+
+    @cached_property
+    def encoding(self):
+        """
+        Tokenizer, loaded from the bundled BPE cache on first use
+        """
+        import tiktoken
+
+        return tiktoken.encoding_for_model("gpt-4")
 
     def compute_content_hash(self, text: str) -> str:
         """
@@ -35,30 +116,148 @@ class EmbeddingService:
         """
         return len(self.encoding.encode(text))
 
-    async def embed_text(self, text: str) -> List[float]:
+    async def get_cached(self, content_hashes: List[str]) -> Dict[str, Vector]:
+        """
+        Look up embeddings in the local cache by content hash (off the event loop)
+        """
+        if self.cache is None:
+            return {}
+        return await asyncio.to_thread(
+            self.cache.get_many, self.model, self.dimensions, content_hashes
+        )
+
+    async def store_cached(self, embeddings: Dict[str, Vector]) -> None:
+        """
+        Store embeddings in the local cache by content hash (off the event loop)
+        """
+        if self.cache is not None and embeddings:
+            await asyncio.to_thread(
+                self.cache.put_many, self.model, self.dimensions, embeddings
+            )
+
+    async def embed_text(self, text: str) -> Vector:
         """
         Generate embedding for a single text
-        Rate-limited by semaphore
+        Concurrency-capped by the semaphore (OpenAI: and the RPM/TPM limiter)
         """
-        async with self._semaphore:
-            response = await self.client.embeddings.create(
-                model=self.model, input=text, dimensions=self.dimensions
+        embeddings = await self._embed_request([text], self.count_tokens(text))
+        return embeddings[0]
+
+    async def embed_query(self, query: str) -> Tuple[Vector, bool]:
+        """
+        Embed a search query, from the query cache when possible
+
+        The normalized query is what gets embedded, so every spelling that
+        shares a cache key gets the same vector. Misses go through the query
+        batcher if there is one. Returns (embedding, cache hit).
+        """
+        normalized = normalize_query(query)
+        key = (self.model, self.dimensions, normalized)
+        cached = self.query_cache.get(key) if self.query_cache is not None else None
+        if cached is not None:
+            return cached, True
+
+        if self.query_batcher is None:
+            embedding = await self.embed_text(normalized)
+        else:
+            embedding = (await self.query_batcher.embed_many([normalized]))[0]
+        if self.query_cache is not None:
+            self.query_cache.put(key, embedding)
+        return embedding, False
+
+    async def embed_many(
+        self,
+        texts: List[str],
+        token_counts: Optional[List[int]] = None,
+        max_inputs: Optional[int] = None,
+    ) -> Vector:
+        """
+        Generate embeddings for many texts using packed multi-input requests
+
+        Texts are grouped into requests bounded by input count and token budget.
+        Requests run concurrently (capped by the semaphore) and results are
+        returned as one (len(texts), dimensions) float32 array in text order.
+        """
+        if not texts:
+            return np.empty((0, self.dimensions), dtype=np.float32)
+
+        if token_counts is None:
+            token_counts = [self.count_tokens(text) for text in texts]
+
+        batches = self._pack_batches(
+            token_counts, max_inputs or settings.EMBEDDING_BATCH_MAX_INPUTS
+        )
+        batch_results = await asyncio.gather(
+            *(
+                self._embed_request(
+                    [texts[i] for i in batch], sum(token_counts[i] for i in batch)
+                )
+                for batch in batches
             )
-            return response.data[0].embedding
+        )
+
+        if len(batch_results) == 1:
+            return batch_results[0]
+
+        embeddings = np.empty((len(texts), self.dimensions), dtype=np.float32)
+        for batch, vectors in zip(batches, batch_results):
+            embeddings[batch] = vectors
+        return embeddings
 
     async def embed_batch(
         self, texts: List[str], batch_size: int = 100
-    ) -> List[List[float]]:
+    ) -> Vector:
         """
         Generate embeddings for multiple texts in batches
         """
-        embeddings = []
-        for i in range(0, len(texts), batch_size):
-            batch = texts[i : i + batch_size]
-            tasks = [self.embed_text(text) for text in batch]
-            batch_embeddings = await asyncio.gather(*tasks)
-            embeddings.extend(batch_embeddings)
-        return embeddings
+        return await self.embed_many(texts, max_inputs=batch_size)
+
+    def _pack_batches(
+        self, token_counts: List[int], max_inputs: int
+    ) -> List[List[int]]:
+        """
+        Group text indices into requests capped by input count and token budget
+        """
+        batches: List[List[int]] = []
+        current: List[int] = []
+        current_tokens = 0
+
+        for index, tokens in enumerate(token_counts):
+            if current and (
+                len(current) >= max_inputs
+                or current_tokens + tokens > settings.EMBEDDING_BATCH_MAX_TOKENS
+            ):
+                batches.append(current)
+                current = []
+                current_tokens = 0
+            current.append(index)
+            current_tokens += tokens
+
+        if current:
+            batches.append(current)
+        return batches
+
+    async def _embed_request(self, inputs: List[str], tokens: int) -> Vector:
+        """
+        Embed one packed request and return a 2-D array in input order
+        """
+        async with self._semaphore:
+            embeddings = await self.provider.embed(inputs, tokens)
+
+        width = embeddings.shape[1]
+        if width == self.dimensions:
+            return embeddings
+        if width > self.dimensions:
+            raise EmbeddingProviderError(
+                f"{self.model} returns {width} dimensions; "
+                f"document_chunks stores {self.dimensions}"
+            )
+        padded = np.zeros((len(embeddings), self.dimensions), dtype=np.float32)
+        padded[:, :width] = embeddings
+        return padded
+
+    def close(self) -> None:
+        self.provider.close()
 
     async def embed_with_metadata(
         self, text: str
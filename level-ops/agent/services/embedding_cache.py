@@ -0,0 +1,218 @@
+"""
+Local content-addressed embedding cache backed by SQLite
+"""
+
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+
+from config import AGENT_DIR
+from services.vectors import Vector
+
+# Stay well under SQLite's bound-parameter limit
+_QUERY_BATCH_SIZE = 500
+
+
+class EmbeddingCache:
+    """
+    On-disk embedding cache keyed by (model, dimensions, content_sha256)
+
+    Vectors are stored as packed float32 blobs. Once the stored vectors exceed
+    `max_bytes`, the least recently used entries are evicted.
+
+    The file is shared by the API and worker processes, so their total size
+    lives in the file too (cache_size, one row), read and adjusted inside
+    each write transaction rather than summed over every vector. Access is
+    serialized by a lock; call from a worker thread, not the loop.
+    """
+
+    def __init__(self, path: str, max_bytes: int):
+        cache_path = Path(path)
+        if not cache_path.is_absolute():
+            cache_path = AGENT_DIR / cache_path
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+
+        self.path = cache_path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            str(cache_path), check_same_thread=False, isolation_level=None
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS embeddings (
+                model TEXT NOT NULL,
+                dimensions INTEGER NOT NULL,
+                content_sha256 TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (model, dimensions, content_sha256)
+            ) WITHOUT ROWID
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_embeddings_last_used "
+            "ON embeddings(last_used)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache_size ("
+            "id INTEGER PRIMARY KEY CHECK (id = 0), total_bytes INTEGER NOT NULL)"
+        )
+        # Sized once, by whichever process opens the file first
+        self._conn.execute(
+            "INSERT OR IGNORE INTO cache_size (id, total_bytes) "
+            "SELECT 0, COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings"
+        )
+
+    def get_many(
+        self, model: str, dimensions: int, content_hashes: List[str]
+    ) -> Dict[str, Vector]:
+        """
+        Look up cached vectors; returns content_sha256 -> float32 embedding for hits
+        """
+        unique_hashes = list(dict.fromkeys(content_hashes))
+        found: Dict[str, Vector] = {}
+
+        with self._lock:
+            for i in range(0, len(unique_hashes), _QUERY_BATCH_SIZE):
+                batch = unique_hashes[i : i + _QUERY_BATCH_SIZE]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    "SELECT content_sha256, vector FROM embeddings "
+                    "WHERE model = ? AND dimensions = ? "
+                    f"AND content_sha256 IN ({placeholders})",
+                    (model, dimensions, *batch),
+                ).fetchall()
+                for content_hash, blob in rows:
+                    found[content_hash] = _unpack(blob)
+
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_used = ? "
+                    "WHERE model = ? AND dimensions = ? AND content_sha256 = ?",
+                    [(now, model, dimensions, h) for h in found],
+                )
+
+            self.hits += len(found)
+            self.misses += len(unique_hashes) - len(found)
+
+        return found
+
+    def put_many(
+        self, model: str, dimensions: int, embeddings: Dict[str, Vector]
+    ) -> None:
+        """
+        Store vectors by content hash, evicting LRU entries past the size budget
+        """
+        if not embeddings:
+            return
+
+        now = time.time()
+        rows = [
+            (model, dimensions, content_hash, _pack(vector), now)
+            for content_hash, vector in embeddings.items()
+        ]
+
+        hashes = list(embeddings)
+        with self._lock:
+            # IMMEDIATE: take the write lock before reading the shared total
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                replaced_bytes = 0
+                for i in range(0, len(hashes), _QUERY_BATCH_SIZE):
+                    batch = hashes[i : i + _QUERY_BATCH_SIZE]
+                    placeholders = ",".join("?" * len(batch))
+                    (size,) = self._conn.execute(
+                        "SELECT COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings "
+                        "WHERE model = ? AND dimensions = ? "
+                        f"AND content_sha256 IN ({placeholders})",
+                        (model, dimensions, *batch),
+                    ).fetchone()
+                    replaced_bytes += size
+
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO embeddings "
+                    "(model, dimensions, content_sha256, vector, last_used) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    rows,
+                )
+                self._add_bytes(sum(len(row[3]) for row in rows) - replaced_bytes)
+                self._evict()
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Hit/miss counters since process start
+        """
+        lookups = self.hits + self.misses
+        with self._lock:
+            total_bytes = self._total_bytes()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "bytes": total_bytes,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+    def _evict(self) -> None:
+        """
+        Drop least recently used entries until the cache is back under 90% of budget
+        """
+        total_bytes = self._total_bytes()
+        if total_bytes <= self.max_bytes:
+            return
+
+        to_free = total_bytes - int(self.max_bytes * 0.9)
+        victims = []
+        freed = 0
+        for model, dimensions, content_hash, size in self._conn.execute(
+            "SELECT model, dimensions, content_sha256, LENGTH(vector) "
+            "FROM embeddings ORDER BY last_used"
+        ):
+            victims.append((model, dimensions, content_hash))
+            freed += size
+            if freed >= to_free:
+                break
+
+        self._conn.executemany(
+            "DELETE FROM embeddings "
+            "WHERE model = ? AND dimensions = ? AND content_sha256 = ?",
+            victims,
+        )
+        self._add_bytes(-freed)
+        self.evictions += len(victims)
+
+    def _total_bytes(self) -> int:
+        (total_bytes,) = self._conn.execute(
+            "SELECT total_bytes FROM cache_size WHERE id = 0"
+        ).fetchone()
+        return total_bytes
+
+    def _add_bytes(self, delta: int) -> None:
+        self._conn.execute(
+            "UPDATE cache_size SET total_bytes = total_bytes + ? WHERE id = 0", (delta,)
+        )
+
+
+def _pack(vector: Vector) -> bytes:
+    return np.asarray(vector, dtype=np.float32).tobytes()
+
+
+def _unpack(blob: bytes) -> Vector:
+    # Read-only view over the blob; no per-float objects
+    return np.frombuffer(blob, dtype=np.float32)
@@ -0,0 +1,232 @@
+"""
+Embedding providers: OpenAI, a local CPU model and a deterministic hash fake
+"""
+
+import asyncio
+import hashlib
+import logging
+import re
+from concurrent.futures import ThreadPoolExecutor
+from functools import cached_property
+from pathlib import PurePosixPath
+from typing import TYPE_CHECKING, List, Optional
+
+import numpy as np
+
+from config import settings
+from services.rate_limiter import RateLimiter, embedding_rate_limiter
+from services.vectors import Vector, decode_embeddings
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
+    from sentence_transformers import SentenceTransformer
+
+logger = logging.getLogger(__name__)
+
+_WORD = re.compile(r"\w+")
+
+# Full output widths; a shortened embedding is a different vector space
+_OPENAI_NATIVE_DIMENSIONS = {
+    "text-embedding-3-small": 1536,
+    "text-embedding-3-large": 3072,
+    "text-embedding-ada-002": 1536,
+}
+
+
+class EmbeddingProviderError(Exception):
+    """Custom exception for embedding provider errors"""
+    pass
+
+
+class EmbeddingProvider:
+    """
+    Turns a batch of texts into a (len(texts), dimensions) float32 array
+
+    model_id names the model and any quantisation, so vectors from different
+    providers are never compared, cached or reused for one another.
+    """
+
+    model_id: str
+
+    @property
+    def dimensions(self) -> int:
+        raise NotImplementedError
+
+    async def embed(self, texts: List[str], tokens: int) -> Vector:
+        """
+        Embed one packed request; tokens is its total input token count
+        """
+        raise NotImplementedError
+
+    async def load(self) -> None:
+        """
+        Load model weights ahead of the first request (no-op for remote models)
+        """
+
+    def close(self) -> None:
+        pass
+
+
+class OpenAIEmbeddingProvider(EmbeddingProvider):
+    """
+    OpenAI embeddings.create, within the shared RPM/TPM rate limiter
+
+    model_id is the model name at its full width and name@dimensions when
+    shortened, so changing OPENAI_EMBED_DIMENSIONS changes the id (and with
+    it cache keys, hash reuse and the org pin) while the ids already
+    recorded for full-width vectors stay valid.
+    """
+
+    def __init__(
+        self,
+        model: str = settings.OPENAI_EMBED_MODEL,
+        dimensions: int = settings.OPENAI_EMBED_DIMENSIONS,
+        rate_limiter: RateLimiter = embedding_rate_limiter,
+    ):
+        self.model = model
+        self.model_id = model
+        if _OPENAI_NATIVE_DIMENSIONS.get(model) != dimensions:
+            self.model_id += f"@{dimensions}"
+        self._dimensions = dimensions
+        self.rate_limiter = rate_limiter
+
+    @property
+    def dimensions(self) -> int:
+        return self._dimensions
+
+    @cached_property
+    def client(self) -> "AsyncOpenAI":
+        """
+        OpenAI client, created (and the SDK imported) on first use
+
+        SDK retries are off; the rate limiter retries with shared backoff.
+        """
+        from openai import AsyncOpenAI
+
+        return AsyncOpenAI(api_key=settings.OPENAI_API_KEY, max_retries=0)
+
+    async def embed(self, texts: List[str], tokens: int) -> Vector:
+        response = await self.rate_limiter.call(
+            lambda: self.client.embeddings.with_raw_response.create(
+                model=self.model,
+                input=texts,
+                dimensions=self._dimensions,
+                encoding_format="base64",
+            ),
+            tokens=tokens,
+        )
+        ordered = sorted(response.data, key=lambda item: item.index)
+        return decode_embeddings(ordered, self._dimensions)
+
+
+class LocalEmbeddingProvider(EmbeddingProvider):
+    """
+    sentence-transformers model on this host's CPU, optionally an int8 ONNX export
+
+    The model loads on first use. Inference runs in batches on one dedicated
+    thread (ONNX Runtime / torch release the GIL and use their own intra-op
+    threads), so it never blocks the event loop and requests don't contend
+    for cores.
+    """
+
+    def __init__(
+        self,
+        model_name: str = settings.LOCAL_EMBED_MODEL,
+        backend: str = settings.LOCAL_EMBED_BACKEND,
+        onnx_file: Optional[str] = settings.LOCAL_EMBED_ONNX_FILE,
+        batch_size: int = settings.LOCAL_EMBED_BATCH_SIZE,
+    ):
+        self.model_name = model_name
+        self.backend = backend
+        self.onnx_file = onnx_file if backend == "onnx" else None
+        self.batch_size = batch_size
+        self.model_id = model_name
+        if self.onnx_file:
+            self.model_id += f"@{PurePosixPath(self.onnx_file).stem}"
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="local-embed")
+
+    @cached_property
+    def encoder(self) -> "SentenceTransformer":
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError:
+            raise EmbeddingProviderError(
+                "EMBEDDING_PROVIDER=local needs sentence-transformers "
+                "(and optimum[onnxruntime] for the onnx backend)"
+            )
+
+        model_kwargs = {"file_name": self.onnx_file} if self.onnx_file else None
+        encoder = SentenceTransformer(
+            self.model_name, device="cpu", backend=self.backend, model_kwargs=model_kwargs
+        )
+        logger.info(
+            f"Loaded local embedding model {self.model_id} "
+            f"({encoder.get_sentence_embedding_dimension()} dims, {self.backend})"
+        )
+        return encoder
+
+    @property
+    def dimensions(self) -> int:
+        return self.encoder.get_sentence_embedding_dimension()
+
+    async def load(self) -> None:
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._executor, lambda: self.encoder)
+
+    async def embed(self, texts: List[str], tokens: int) -> Vector:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._encode, texts)
+
+    def _encode(self, texts: List[str]) -> Vector:
+        embeddings = self.encoder.encode(
+            texts,
+            batch_size=self.batch_size,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+        )
+        return embeddings.astype(np.float32, copy=False)
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+class HashEmbeddingProvider(EmbeddingProvider):
+    """
+    Deterministic bag-of-words feature hashing, for tests and benchmarks
+
+    Each word adds +-1 to one hashed dimension, so texts sharing words are
+    similar and identical texts always embed identically, with no model or
+    network involved.
+    """
+
+    def __init__(self, dimensions: int = settings.HASH_EMBED_DIMENSIONS):
+        self._dimensions = dimensions
+        self.model_id = f"hash-{dimensions}"
+
+    @property
+    def dimensions(self) -> int:
+        return self._dimensions
+
+    async def embed(self, texts: List[str], tokens: int) -> Vector:
+        matrix = np.zeros((len(texts), self._dimensions), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in _WORD.findall(text.lower()):
+                digest = int.from_bytes(
+                    hashlib.blake2b(word.encode("utf-8"), digest_size=8).digest(), "big"
+                )
+                matrix[row, digest % self._dimensions] += 1.0 if digest >> 63 else -1.0
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return matrix / np.where(norms > 0, norms, 1.0)
+
+
+def create_embedding_provider(name: str = settings.EMBEDDING_PROVIDER) -> EmbeddingProvider:
+    """
+    Build the provider selected by EMBEDDING_PROVIDER
+    """
+    if name == "openai":
+        return OpenAIEmbeddingProvider()
+    if name == "local":
+        return LocalEmbeddingProvider()
+    if name == "hash":
+        return HashEmbeddingProvider()
+    raise EmbeddingProviderError(f"Unknown embedding provider: {name}")
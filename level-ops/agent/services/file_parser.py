@@ -7,10 +7,12 @@ for financial data extraction.
 
 import io
 import logging
-from typing import Dict, List, Optional, Union
-import pandas as pd
+from typing import TYPE_CHECKING, Dict, List, Optional, Union
 from pathlib import Path
 
+if TYPE_CHECKING:
+    import pandas as pd  # Imported lazily: parsing runs in CPU pool workers
+
 logger = logging.getLogger(__name__)
 
 
@@ -44,7 +46,7 @@ class FileParser:
         file_content: bytes,
         file_type: str,
         file_name: Optional[str] = None
-    ) -> Dict[str, pd.DataFrame]:
+    ) -> Dict[str, "pd.DataFrame"]:
         """
         Parse a financial document file into pandas DataFrame(s).
 
@@ -98,7 +100,7 @@ class FileParser:
             logger.error(f"Error parsing {file_type} file: {str(e)}")
             raise FileParserError(f"Failed to parse {file_type} file: {str(e)}")
 
-    def _parse_csv(self, file_content: bytes) -> Dict[str, pd.DataFrame]:
+    def _parse_csv(self, file_content: bytes) -> Dict[str, "pd.DataFrame"]:
         """
         Parse CSV file to DataFrame.
 
@@ -108,6 +110,8 @@ class FileParser:
         Returns:
             Dictionary with single DataFrame: {"Sheet1": df}
         """
+        import pandas as pd
+
         try:
             # Try multiple encodings
             encodings = ["utf-8", "latin-1", "iso-8859-1", "cp1252"]
@@ -149,7 +153,7 @@ class FileParser:
         self,
         file_content: bytes,
         file_type: str
-    ) -> Dict[str, pd.DataFrame]:
+    ) -> Dict[str, "pd.DataFrame"]:
         """
         Parse Excel file (XLS or XLSX) to DataFrames.
 
@@ -160,6 +164,8 @@ class FileParser:
         Returns:
             Dictionary of sheet_name -> DataFrame
         """
+        import pandas as pd
+
         try:
             # Determine engine based on file type
             engine = "openpyxl" if file_type == "xlsx" else "xlrd"
@@ -213,7 +219,7 @@ class FileParser:
 
     def dataframes_to_json(
         self,
-        dataframes: Dict[str, pd.DataFrame],
+        dataframes: Dict[str, "pd.DataFrame"],
         max_rows_per_sheet: int = 1000
     ) -> Dict[str, List[Dict]]:
         """
@@ -243,7 +249,7 @@ class FileParser:
 
         return json_data
 
-    def get_sheet_summary(self, dataframes: Dict[str, pd.DataFrame]) -> Dict[str, Dict]:
+    def get_sheet_summary(self, dataframes: Dict[str, "pd.DataFrame"]) -> Dict[str, Dict]:
         """
         Generate summary statistics for parsed DataFrames.
 
@@ -253,6 +259,8 @@ class FileParser:
         Returns:
             Dictionary of sheet_name -> summary info
         """
+        import pandas as pd
+
         summaries = {}
 
         for sheet_name, df in dataframes.items():
@@ -270,7 +278,3 @@ class FileParser:
             }
 
         return summaries
-
-
-# Singleton instance
-file_parser = FileParser()
@@ -12,10 +12,11 @@ import logging
 import time
 from typing import Dict, Optional, Any
 from datetime import datetime
-from supabase import Client
 
-from .file_parser import file_parser, FileParserError
-from .openai_financial import financial_extractor, FinancialExtractionError
+from .cpu_pool import cpu_executor, parse_financial_file
+from .file_parser import FileParserError
+from .openai_financial import FinancialExtractor, FinancialExtractionError
+from .repository import SupabaseRepository
 
 logger = logging.getLogger(__name__)
 
@@ -30,14 +31,20 @@ class FinancialAnalyzer:
     Main orchestrator for financial document analysis.
     """
 
-    def __init__(self, supabase_client: Client):
+    def __init__(
+        self,
+        repository: SupabaseRepository,
+        extractor: FinancialExtractor
+    ):
         """
         Initialize the financial analyzer.
 
         Args:
-            supabase_client: Authenticated Supabase client
+            repository: Async data access layer (service-role Supabase client)
+            extractor: OpenAI financial metric extractor
         """
-        self.supabase = supabase_client
+        self.repository = repository
+        self.extractor = extractor
 
     async def analyze_document(
         self,
@@ -90,25 +97,24 @@ class FinancialAnalyzer:
                 document["bucket"]
             )
 
-            # Step 5: Parse file to DataFrames
+            # Step 5: Parse file to DataFrames and convert to JSON for OpenAI
+            # (runs in the CPU pool; only the JSON rows come back)
             file_type = self._extract_file_type(document["file_name"])
-            dataframes = file_parser.parse(
+            sheets_json = await cpu_executor.run(
+                parse_financial_file,
                 file_content,
                 file_type,
                 document["file_name"]
             )
 
-            # Convert to JSON for OpenAI
-            sheets_json = file_parser.dataframes_to_json(dataframes)
-
             # Step 6: Extract financial metrics using OpenAI
-            extraction_result = await financial_extractor.extract_metrics(
+            extraction_result = await self.extractor.extract_metrics(
                 sheets_json,
                 document["file_name"]
             )
 
             # Step 7: Determine if needs review
-            needs_review = financial_extractor.needs_review(extraction_result)
+            needs_review = self.extractor.needs_review(extraction_result)
             status = "review" if needs_review else "completed"
 
             # Step 8: Store results in database
@@ -187,17 +193,14 @@ class FinancialAnalyzer:
             Analysis record with status and results (if complete)
         """
         try:
-            response = self.supabase.table("financial_analyses") \
-                .select("*") \
-                .eq("id", analysis_id) \
-                .eq("org_id", org_id) \
-                .single() \
-                .execute()
-
-            if not response.data:
+            analysis = await self.repository.get_financial_analysis(
+                analysis_id, org_id
+            )
+
+            if not analysis:
                 raise FinancialAnalyzerError(f"Analysis {analysis_id} not found")
 
-            return response.data
+            return analysis
 
         except Exception as e:
             logger.error(f"Failed to get analysis status: {str(e)}")
@@ -213,19 +216,16 @@ class FinancialAnalyzer:
     ) -> str:
         """Create initial analysis record in database"""
         try:
-            response = self.supabase.table("financial_analyses").insert({
+            record = await self.repository.create_financial_analysis({
                 "org_id": org_id,
                 "document_id": document_id,
                 "created_by": user_id,
                 "analysis_status": "pending",
                 "file_type": "unknown",  # Will update after parsing
                 "raw_analysis": {},
-            }).execute()
+            })
 
-            if not response.data or len(response.data) == 0:
-                raise FinancialAnalyzerError("Failed to create analysis record")
-
-            return response.data[0]["id"]
+            return record["id"]
 
         except Exception as e:
             logger.error(f"Failed to create analysis record: {str(e)}")
@@ -239,11 +239,9 @@ class FinancialAnalyzer:
     ) -> None:
         """Update analysis status"""
         try:
-            self.supabase.table("financial_analyses") \
-                .update({"analysis_status": status}) \
-                .eq("id", analysis_id) \
-                .eq("org_id", org_id) \
-                .execute()
+            await self.repository.update_financial_analysis(
+                analysis_id, org_id, {"analysis_status": status}
+            )
 
         except Exception as e:
             logger.error(f"Failed to update analysis status: {str(e)}")
@@ -256,17 +254,14 @@ class FinancialAnalyzer:
     ) -> Dict[str, Any]:
         """Get document metadata from database"""
         try:
-            response = self.supabase.table("documents") \
-                .select("id, file_name, storage_path, bucket") \
-                .eq("id", document_id) \
-                .eq("org_id", org_id) \
-                .single() \
-                .execute()
-
-            if not response.data:
+            document = await self.repository.get_financial_document(
+                document_id, org_id
+            )
+
+            if not document:
                 raise FinancialAnalyzerError(f"Document {document_id} not found")
 
-            return response.data
+            return document
 
         except Exception as e:
             logger.error(f"Failed to get document: {str(e)}")
@@ -280,7 +275,7 @@ class FinancialAnalyzer:
         """Download document from Supabase Storage"""
         try:
             # Download file
-            response = self.supabase.storage.from_(bucket).download(storage_path)
+            response = await self.repository.download_file(bucket, storage_path)
 
             if not response:
                 raise FinancialAnalyzerError(f"Failed to download file from {storage_path}")
@@ -318,22 +313,18 @@ class FinancialAnalyzer:
     ) -> None:
         """Update analysis record with results"""
         try:
-            self.supabase.table("financial_analyses") \
-                .update({
-                    "analysis_status": status,
-                    "file_type": file_type,
-                    "raw_analysis": raw_analysis,
-                    "extracted_data": extracted_data,
-                    "confidence_score": confidence_score,
-                    "ai_insights": ai_insights,
-                    "ai_recommendations": ai_recommendations,
-                    "detected_issues": detected_issues,
-                    "processing_time_ms": processing_time_ms,
-                    "updated_at": datetime.utcnow().isoformat()
-                }) \
-                .eq("id", analysis_id) \
-                .eq("org_id", org_id) \
-                .execute()
+            await self.repository.update_financial_analysis(analysis_id, org_id, {
+                "analysis_status": status,
+                "file_type": file_type,
+                "raw_analysis": raw_analysis,
+                "extracted_data": extracted_data,
+                "confidence_score": confidence_score,
+                "ai_insights": ai_insights,
+                "ai_recommendations": ai_recommendations,
+                "detected_issues": detected_issues,
+                "processing_time_ms": processing_time_ms,
+                "updated_at": datetime.utcnow().isoformat()
+            })
 
         except Exception as e:
             logger.error(f"Failed to update analysis results: {str(e)}")
@@ -348,16 +339,12 @@ class FinancialAnalyzer:
     ) -> None:
         """Update analysis record with error"""
         try:
-            self.supabase.table("financial_analyses") \
-                .update({
-                    "analysis_status": "failed",
-                    "error_message": error_message,
-                    "processing_time_ms": processing_time_ms,
-                    "updated_at": datetime.utcnow().isoformat()
-                }) \
-                .eq("id", analysis_id) \
-                .eq("org_id", org_id) \
-                .execute()
+            await self.repository.update_financial_analysis(analysis_id, org_id, {
+                "analysis_status": "failed",
+                "error_message": error_message,
+                "processing_time_ms": processing_time_ms,
+                "updated_at": datetime.utcnow().isoformat()
+            })
 
         except Exception as e:
             logger.error(f"Failed to update analysis error: {str(e)}")
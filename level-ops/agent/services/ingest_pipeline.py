@@ -0,0 +1,309 @@
+"""
+Streaming ingest pipeline: chunk -> embed -> write, connected by bounded queues
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterable, Dict, List, Optional
+
+from config import settings
+from services.chunker import TextChunk
+from services.embed_batcher import EmbeddingBatcher
+from services.embedder import EmbeddingService
+from services.pg_writer import PostgresChunkWriter
+from services.progress import IngestProgress
+from services.vectors import Vector, as_vector
+from services.repository import SupabaseRepository
+
+logger = logging.getLogger(__name__)
+
+# Marks the end of a stage's output
+_DONE = object()
+
+
+@dataclass
+class ChunkBatch:
+    """
+    Changed chunks travelling from the chunk stage to the embed stage
+    """
+
+    indices: List[int] = field(default_factory=list)
+    texts: List[str] = field(default_factory=list)
+    hashes: List[str] = field(default_factory=list)
+    token_counts: List[int] = field(default_factory=list)
+    metadata: List[Dict[str, Any]] = field(default_factory=list)
+
+
+@dataclass
+class PipelineStats:
+    """
+    Counters reported back to process_document
+    """
+
+    total_chunks: int = 0
+    unchanged_chunks: int = 0
+    reused_embeddings: int = 0
+    embedded_chunks: int = 0
+    written_chunks: int = 0
+
+
+class IngestPipeline:
+    """
+    Ingest one document's chunks as overlapping stages
+
+    The chunk stage hashes chunks as the async iterator yields them (later
+    sections may still be chunking) and hands off fixed-size batches of changed
+    chunks. Embed workers resolve known hashes and embed the rest while the
+    writer flushes finished rows in write batches. Every queue is bounded, so
+    peak memory is a few batches regardless of document size.
+
+    With an embed_batcher, embedding requests are pooled with other documents'
+    pipelines instead of being sent per batch. storage_tier picks the embedding
+    columns written (see organizations.embedding_storage_tier).
+    """
+
+    def __init__(
+        self,
+        repository: SupabaseRepository,
+        embedder: EmbeddingService,
+        document_id: str,
+        org_id: str,
+        stored_hashes: Dict[int, Optional[str]],
+        force_reembed: bool = False,
+        chunk_writer: Optional[PostgresChunkWriter] = None,
+        embed_batcher: Optional[EmbeddingBatcher] = None,
+        progress: Optional[IngestProgress] = None,
+        storage_tier: str = "float32",
+    ):
+        self.repository = repository
+        self.embedder = embedder
+        self.document_id = document_id
+        self.org_id = org_id
+        self.stored_hashes = stored_hashes
+        self.force_reembed = force_reembed
+        self.chunk_writer = chunk_writer
+        self.embed_many = (embed_batcher or embedder).embed_many
+        self.progress = progress
+        self.storage_tier = storage_tier
+        self.stats = PipelineStats()
+
+    async def run(self, chunks: AsyncIterable[TextChunk]) -> PipelineStats:
+        """
+        Drive all stages to completion; any stage failure cancels the rest
+        """
+        embed_queue: asyncio.Queue = asyncio.Queue(
+            maxsize=settings.INGEST_PIPELINE_QUEUE_DEPTH
+        )
+        write_queue: asyncio.Queue = asyncio.Queue(
+            maxsize=settings.INGEST_PIPELINE_QUEUE_DEPTH
+        )
+
+        tasks = [
+            asyncio.create_task(self._chunk_stage(chunks, embed_queue)),
+            asyncio.create_task(self._embed_stage(embed_queue, write_queue)),
+            asyncio.create_task(self._write_stage(write_queue)),
+        ]
+        try:
+            await asyncio.gather(*tasks)
+        except Exception:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
+        # Drop trailing chunks left over from a longer previous version
+        if any(idx >= self.stats.total_chunks for idx in self.stored_hashes):
+            await self.repository.delete_chunks(
+                self.document_id, self.org_id, from_index=self.stats.total_chunks
+            )
+
+        return self.stats
+
+    async def _chunk_stage(
+        self, chunks: AsyncIterable[TextChunk], embed_queue: asyncio.Queue
+    ) -> None:
+        batch = ChunkBatch()
+        unchanged = 0
+        idx = -1
+
+        try:
+            async for chunk in chunks:
+                idx += 1
+                self.stats.total_chunks += 1
+                content_hash = self.embedder.compute_content_hash(chunk.text)
+
+                # Only new, edited or shifted positions need writing
+                if self.stored_hashes.get(idx) == content_hash:
+                    self.stats.unchanged_chunks += 1
+                    unchanged += 1
+                    continue
+
+                batch.indices.append(idx)
+                batch.texts.append(chunk.text)
+                batch.hashes.append(content_hash)
+                batch.token_counts.append(chunk.token_count)
+                batch.metadata.append(chunk.metadata)
+
+                if len(batch.indices) >= settings.INGEST_EMBED_BATCH_SIZE:
+                    self._advance(unchanged)
+                    unchanged = 0
+                    await embed_queue.put(batch)
+                    batch = ChunkBatch()
+                    await asyncio.sleep(0)  # Let downstream stages run between batches
+        finally:
+            # Stop chunking ahead if a later stage failed
+            aclose = getattr(chunks, "aclose", None)
+            if aclose is not None:
+                await aclose()
+
+        self._advance(unchanged)
+        if batch.indices:
+            await embed_queue.put(batch)
+        for _ in range(settings.INGEST_EMBED_CONCURRENCY):
+            await embed_queue.put(_DONE)
+
+    async def _embed_stage(
+        self, embed_queue: asyncio.Queue, write_queue: asyncio.Queue
+    ) -> None:
+        await asyncio.gather(
+            *(
+                self._embed_worker(embed_queue, write_queue)
+                for _ in range(settings.INGEST_EMBED_CONCURRENCY)
+            )
+        )
+        await write_queue.put(_DONE)
+
+    async def _embed_worker(
+        self, embed_queue: asyncio.Queue, write_queue: asyncio.Queue
+    ) -> None:
+        while True:
+            batch = await embed_queue.get()
+            if batch is _DONE:
+                return
+
+            embeddings_by_hash = await self._embed_batch(batch)
+            model_dimensions = self.embedder.model_dimensions
+            records = [
+                {
+                    "tenant_id": None,  # Using org_id instead
+                    "org_id": self.org_id,
+                    "document_id": self.document_id,
+                    "chunk_index": idx,
+                    "content": text,
+                    **self._embedding_columns(embeddings_by_hash[content_hash]),
+                    "embedding_model": self.embedder.model,
+                    "embedding_dimensions": model_dimensions,
+                    "content_sha256": content_hash,
+                    "token_count": token_count,
+                    "metadata": chunk_metadata,
+                    "version": 1,
+                }
+                for idx, text, content_hash, token_count, chunk_metadata in zip(
+                    batch.indices,
+                    batch.texts,
+                    batch.hashes,
+                    batch.token_counts,
+                    batch.metadata,
+                )
+            ]
+            await write_queue.put(records)
+
+    async def _embed_batch(self, batch: ChunkBatch) -> Dict[str, Vector]:
+        """
+        Resolve known hashes (local cache, then one bulk DB lookup) and embed
+        each distinct unknown hash once
+        """
+        known: Dict[str, Vector] = {}
+        if not self.force_reembed and settings.ENABLE_DEDUP_CACHE:
+            known = await self.embedder.get_cached(batch.hashes)
+            uncached = [h for h in batch.hashes if h not in known]
+            if uncached:
+                stored = await self._find_existing_embeddings(uncached)
+                await self.embedder.store_cached(stored)
+                known.update(stored)
+
+        miss_positions: Dict[str, int] = {}
+        for position, content_hash in enumerate(batch.hashes):
+            if content_hash not in known:
+                miss_positions.setdefault(content_hash, position)
+
+        new_embeddings = await self.embed_many(
+            [batch.texts[p] for p in miss_positions.values()],
+            [batch.token_counts[p] for p in miss_positions.values()],
+        )
+        fresh = dict(zip(miss_positions.keys(), new_embeddings))
+        await self.embedder.store_cached(fresh)
+
+        self.stats.reused_embeddings += sum(1 for h in batch.hashes if h in known)
+        self.stats.embedded_chunks += len(fresh)
+        return {**known, **fresh}
+
+    def _embedding_columns(self, vector: Vector) -> Dict[str, Optional[Vector]]:
+        """
+        Embedding columns for the org's tier (quantized when serialized)
+
+        halfvec stores only the half-precision copy; binary indexes the bit
+        copy and keeps float32 to rescore the Hamming shortlist. Unused columns
+        are written as NULL so a rewritten row drops its previous tier's copy.
+        """
+        if self.storage_tier == "halfvec":
+            return {"embedding": None, "embedding_half": vector, "embedding_bit": None}
+        if self.storage_tier == "binary":
+            return {"embedding": vector, "embedding_half": None, "embedding_bit": vector}
+        return {"embedding": vector, "embedding_half": None, "embedding_bit": None}
+
+    async def _write_stage(self, write_queue: asyncio.Queue) -> None:
+        pending: List[Dict[str, Any]] = []
+
+        while True:
+            records = await write_queue.get()
+            if records is _DONE:
+                break
+            pending.extend(records)
+            while len(pending) >= settings.INGEST_WRITE_BATCH_SIZE:
+                await self._write_records(pending[: settings.INGEST_WRITE_BATCH_SIZE])
+                pending = pending[settings.INGEST_WRITE_BATCH_SIZE :]
+
+        if pending:
+            await self._write_records(pending)
+
+    async def _write_records(self, records: List[Dict[str, Any]]) -> None:
+        """
+        Upsert changed positions in place (keeps UNIQUE(document_id, chunk_index))
+
+        Uses binary COPY when a direct Postgres writer is configured, otherwise
+        a PostgREST upsert.
+        """
+        if self.chunk_writer is not None:
+            written = await self.chunk_writer.write_chunks(records)
+        else:
+            written = await self.repository.upsert_chunks(records)
+        self.stats.written_chunks += written
+        self._advance(len(records))
+
+    def _advance(self, chunks: int) -> None:
+        if self.progress is not None:
+            self.progress.advance(chunks)
+
+    async def _find_existing_embeddings(
+        self, content_hashes: List[str]
+    ) -> Dict[str, Vector]:
+        """
+        Resolve already-embedded chunk hashes for the org in one bulk lookup
+
+        Returns a map of content_sha256 -> stored embedding for every known hash.
+        """
+        unique_hashes = list(dict.fromkeys(content_hashes))
+        if not unique_hashes:
+            return {}
+
+        rows = await self.repository.find_embeddings_by_hash(
+            self.org_id, unique_hashes, self.embedder.model
+        )
+        return {
+            row["content_sha256"]: as_vector(row["embedding"])
+            for row in rows
+            if row.get("embedding")
+        }
+
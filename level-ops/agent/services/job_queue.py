@@ -0,0 +1,142 @@
+"""
+Durable ingestion job queue backed by the document_ingest_jobs table
+"""
+
+import logging
+from typing import Any, Dict, List, Optional
+
+from config import settings
+from services.ingest_scheduler import PRIORITY_LANES
+from services.repository import SupabaseRepository
+
+logger = logging.getLogger(__name__)
+
+
+class JobQueueError(Exception):
+    """Custom exception for job queue errors"""
+    pass
+
+
+class IngestJobQueue:
+    """
+    Enqueue and lease ingestion jobs shared by every API node and worker
+
+    Leasing uses FOR UPDATE SKIP LOCKED (see lease_document_ingest_jobs), so
+    any number of workers can poll the same table without double-processing.
+    """
+
+    def __init__(self, repository: SupabaseRepository):
+        self.repository = repository
+
+    async def enqueue(
+        self,
+        kind: str,
+        org_id: str,
+        document_id: str,
+        payload: Optional[Dict[str, Any]] = None,
+        priority: str = "normal",
+    ) -> str:
+        """
+        Insert a queued job and return its id
+        """
+        try:
+            job = await self.repository.insert_ingest_job({
+                "kind": kind,
+                "org_id": org_id,
+                "document_id": document_id,
+                "payload": payload or {},
+                "priority": PRIORITY_LANES.get(priority, PRIORITY_LANES["normal"]),
+                "max_attempts": settings.JOB_MAX_ATTEMPTS,
+            })
+        except Exception as e:
+            logger.error(f"Failed to enqueue {kind} job: {str(e)}")
+            raise JobQueueError(f"Failed to enqueue job: {str(e)}")
+
+        return job["id"]
+
+    async def enqueue_many(
+        self,
+        kind: str,
+        org_id: str,
+        document_ids: List[str],
+        payload: Optional[Dict[str, Any]] = None,
+        priority: str = "normal",
+    ) -> List[str]:
+        """
+        Insert one queued job per document in a single request
+        """
+        records = [
+            {
+                "kind": kind,
+                "org_id": org_id,
+                "document_id": document_id,
+                "payload": payload or {},
+                "priority": PRIORITY_LANES.get(priority, PRIORITY_LANES["normal"]),
+                "max_attempts": settings.JOB_MAX_ATTEMPTS,
+            }
+            for document_id in document_ids
+        ]
+        try:
+            jobs = await self.repository.insert_ingest_jobs(records)
+        except Exception as e:
+            logger.error(f"Failed to enqueue {len(records)} {kind} jobs: {str(e)}")
+            raise JobQueueError(f"Failed to enqueue jobs: {str(e)}")
+
+        return [job["id"] for job in jobs]
+
+    async def lease(self, worker_id: str, batch_size: int) -> List[Dict[str, Any]]:
+        """
+        Lease up to batch_size ready jobs (including ones with expired leases)
+        """
+        jobs = await self.repository.rpc(
+            "lease_document_ingest_jobs",
+            {
+                "worker_id": worker_id,
+                "batch_size": batch_size,
+                "lease_seconds": settings.JOB_LEASE_SECONDS,
+            },
+        )
+        return jobs or []
+
+    async def heartbeat(self, job_id: str, worker_id: str) -> bool:
+        """
+        Extend the lease; returns False if this worker no longer owns the job
+        """
+        owned = await self.repository.rpc(
+            "heartbeat_document_ingest_job",
+            {
+                "job_id": job_id,
+                "worker_id": worker_id,
+                "lease_seconds": settings.JOB_LEASE_SECONDS,
+            },
+        )
+        return bool(owned)
+
+    async def complete(
+        self, job_id: str, worker_id: str, result: Optional[Dict[str, Any]] = None
+    ) -> bool:
+        """
+        Mark a leased job completed
+        """
+        updated = await self.repository.rpc(
+            "complete_document_ingest_job",
+            {"job_id": job_id, "worker_id": worker_id, "job_result": result},
+        )
+        return bool(updated)
+
+    async def fail(self, job_id: str, worker_id: str, error: str, attempts: int) -> bool:
+        """
+        Record a failed attempt; the job is retried with exponential backoff
+        until it reaches max_attempts
+        """
+        retry_delay = settings.JOB_RETRY_BASE_DELAY_S * 2 ** max(attempts - 1, 0)
+        updated = await self.repository.rpc(
+            "fail_document_ingest_job",
+            {
+                "job_id": job_id,
+                "worker_id": worker_id,
+                "error_message": error[:2000],
+                "retry_delay_seconds": retry_delay,
+            },
+        )
+        return bool(updated)
@@ -0,0 +1,49 @@
+"""
+Maximal marginal relevance (MMR) diversification over search candidates
+"""
+
+from typing import List
+
+import numpy as np
+
+
+def mmr_select(
+    embeddings: np.ndarray,
+    relevance: np.ndarray,
+    k: int,
+    lambda_mult: float,
+) -> List[int]:
+    """
+    Pick k candidate indices, trading relevance against redundancy
+
+    Each step takes the candidate maximizing
+        lambda * relevance - (1 - lambda) * max cosine to the picks so far.
+    Every candidate's max similarity to the picks is kept in one array and
+    updated with a single matrix-vector product per pick, so the cost is
+    O(k * n * d) in NumPy rather than a Python loop over candidate pairs
+    (and the full n x n similarity matrix, of which only k rows are read,
+    is never built).
+    """
+    n = len(relevance)
+    k = min(k, n)
+    if k <= 0:
+        return []
+
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    unit = embeddings / np.where(norms > 0, norms, 1.0)
+    relevance = np.asarray(relevance, dtype=np.float32)
+
+    max_similarity = np.full(n, -np.inf, dtype=np.float32)
+    available = np.ones(n, dtype=bool)
+    picks: List[int] = []
+
+    for step in range(k):
+        scores = lambda_mult * relevance
+        if step:
+            scores = scores - (1 - lambda_mult) * max_similarity
+        pick = int(np.argmax(np.where(available, scores, -np.inf)))
+        picks.append(pick)
+        available[pick] = False
+        np.maximum(max_similarity, unit @ unit[pick], out=max_similarity)
+
+    return picks
@@ -9,7 +9,8 @@ import logging
 from typing import Dict, List, Optional, Any
 from datetime import datetime
 import os
-from openai import AsyncOpenAI
+
+from .rate_limiter import RateLimiter, chat_rate_limiter
 
 logger = logging.getLogger(__name__)
 
@@ -32,18 +33,26 @@ class FinancialExtractor:
     # Confidence threshold for auto-approval
     CONFIDENCE_THRESHOLD = 0.5
 
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        rate_limiter: RateLimiter = chat_rate_limiter,
+    ):
         """
         Initialize the financial extractor.
 
         Args:
             api_key: OpenAI API key (defaults to OPENAI_API_KEY env var)
+            rate_limiter: Shared RPM/TPM limiter that also owns retries
         """
         self.api_key = api_key or os.getenv("OPENAI_API_KEY")
         if not self.api_key:
             raise FinancialExtractionError("OpenAI API key not provided")
 
-        self.client = AsyncOpenAI(api_key=self.api_key)
+        from openai import AsyncOpenAI
+
+        self.client = AsyncOpenAI(api_key=self.api_key, max_retries=0)
+        self.rate_limiter = rate_limiter
 
     async def extract_metrics(
         self,
@@ -83,22 +92,27 @@ class FinancialExtractor:
 
             logger.info(f"Calling OpenAI API with {self.MODEL}")
 
-            # Call OpenAI API
-            response = await self.client.chat.completions.create(
-                model=self.MODEL,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": self._get_system_prompt()
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                temperature=self.TEMPERATURE,
-                max_tokens=self.MAX_TOKENS,
-                response_format={"type": "json_object"}  # Structured output
+            messages = [
+                {
+                    "role": "system",
+                    "content": self._get_system_prompt()
+                },
+                {
+                    "role": "user",
+                    "content": prompt
+                }
+            ]
+
+            # Call OpenAI API (rate-limited, retried on 429/5xx)
+            response = await self.rate_limiter.call(
+                lambda: self.client.chat.completions.with_raw_response.create(
+                    model=self.MODEL,
+                    messages=messages,
+                    temperature=self.TEMPERATURE,
+                    max_tokens=self.MAX_TOKENS,
+                    response_format={"type": "json_object"}  # Structured output
+                ),
+                tokens=self._estimate_tokens(messages),
             )
 
             # Parse response
@@ -123,6 +137,11 @@ class FinancialExtractor:
             logger.error(f"Financial extraction failed: {str(e)}")
             raise FinancialExtractionError(f"Extraction failed: {str(e)}")
 
+    def _estimate_tokens(self, messages: List[Dict[str, str]]) -> int:
+        """Estimate TPM usage: prompt (~4 chars per token) plus max_tokens"""
+        prompt_chars = sum(len(message["content"]) for message in messages)
+        return prompt_chars // 4 + self.MAX_TOKENS
+
     def _get_system_prompt(self) -> str:
         """Get the system prompt for the AI"""
         return """You are a financial analyst AI specialized in extracting financial metrics from spreadsheets.
@@ -311,7 +330,3 @@ If a metric is NOT found or uncertain, set value to null and confidence to 0.0-0
                 return True
 
         return False
-
-
-# Singleton instance
-financial_extractor = FinancialExtractor()
@@ -2,46 +2,164 @@
 PDF text extraction service using PyMuPDF
 """
 
-import fitz  # PyMuPDF
-from typing import Optional
+import asyncio
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
 import io
 
+from config import settings
+from services.cpu_pool import cpu_executor, extract_pdf_pages, pdf_page_count
+
+# Separator placed between pages in the extracted text
+PAGE_SEPARATOR = "\n\n"
+
+
+@dataclass
+class PageIndex:
+    """
+    Compact page-offset index for extracted text
+
+    starts[i] is the character offset where page pages[i] (1-based) begins.
+    Blank pages have no entry.
+    """
+
+    starts: List[int] = field(default_factory=list)
+    pages: List[int] = field(default_factory=list)
+
+    def page_at(self, offset: int) -> Optional[int]:
+        """
+        Page containing a character offset
+        """
+        position = bisect_right(self.starts, offset) - 1
+        if position < 0:
+            return None
+        return self.pages[position]
+
+    def span(self, start: int, end: int) -> Optional[Tuple[int, int]]:
+        """
+        First and last page covered by text[start:end]
+        """
+        if not self.starts:
+            return None
+        first = self.page_at(start) or self.pages[0]
+        last = self.page_at(max(start, end - 1)) or first
+        return first, last
+
+    def to_dict(self) -> Dict[str, List[int]]:
+        return {"starts": self.starts, "pages": self.pages}
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict[str, Any]]) -> Optional["PageIndex"]:
+        if not data or not data.get("starts"):
+            return None
+        return cls(starts=list(data["starts"]), pages=list(data["pages"]))
+
 
 class PDFExtractor:
     """
     Extract text from PDF files with layout preservation
+
+    PyMuPDF is imported on first use; extraction normally runs in CPU pool
+    workers, which preload it.
     """
 
-    def extract_text_from_bytes(self, pdf_bytes: bytes) -> str:
+    def page_count(self, pdf_bytes: bytes) -> int:
         """
-        Extract text from PDF bytes
+        Number of pages in a PDF
+        """
+        import fitz  # PyMuPDF
 
-        Args:
-            pdf_bytes: PDF file content as bytes
+        with fitz.open(stream=pdf_bytes, filetype="pdf") as pdf_document:
+            return len(pdf_document)
 
-        Returns:
-            Extracted text content
+    def extract_pages(
+        self, pdf_bytes: bytes, start: int = 0, stop: Optional[int] = None
+    ) -> List[Tuple[int, str]]:
         """
-        try:
-            # Open PDF from bytes
-            pdf_document = fitz.open(stream=pdf_bytes, filetype="pdf")
-            text_parts = []
+        Extract text from pages [start, stop) as (page_number, text) pairs
 
-            # Extract text from each page
-            for page_num in range(len(pdf_document)):
-                page = pdf_document[page_num]
-                # Extract text with layout preservation
-                text = page.get_text("text")
-                if text.strip():
-                    text_parts.append(text)
+        Pages without content streams are skipped before text extraction;
+        image-only pages yield no text and are dropped too.
+        """
+        import fitz  # PyMuPDF
+
+        try:
+            with fitz.open(stream=pdf_bytes, filetype="pdf") as pdf_document:
+                stop = len(pdf_document) if stop is None else min(stop, len(pdf_document))
+                pages = []
 
-            pdf_document.close()
+                for page_num in range(start, stop):
+                    page = pdf_document[page_num]
+                    if not page.get_contents():
+                        continue
+                    # Extract text with layout preservation
+                    text = page.get_text("text")
+                    if text.strip():
+                        pages.append((page_num + 1, text))
 
-            return "\n\n".join(text_parts)
+                return pages
 
         except Exception as e:
             raise Exception(f"Failed to extract text from PDF: {str(e)}")
 
+    def assemble(self, pages: List[Tuple[int, str]]) -> Tuple[str, PageIndex]:
+        """
+        Join extracted pages into one text and record where each page starts
+        """
+        index = PageIndex()
+        text_parts = []
+        offset = 0
+
+        for page_number, text in sorted(pages):
+            if text_parts:
+                offset += len(PAGE_SEPARATOR)
+            index.starts.append(offset)
+            index.pages.append(page_number)
+            text_parts.append(text)
+            offset += len(text)
+
+        return PAGE_SEPARATOR.join(text_parts), index
+
+    async def extract_parallel(self, pdf_bytes: bytes) -> Tuple[str, PageIndex]:
+        """
+        Extract text and page offsets, splitting page ranges across the CPU pool
+
+        The bytes go into shared memory once; every range task opens its own
+        document from them.
+        """
+        with cpu_executor.shared(pdf_bytes) as payload:
+            total_pages = await cpu_executor.run(pdf_page_count, payload)
+            workers = max(cpu_executor.workers, 1)
+            pages_per_task = max(
+                1, min(settings.PDF_PAGES_PER_TASK, -(-total_pages // workers))
+            )
+            ranges = [
+                (start, min(start + pages_per_task, total_pages))
+                for start in range(0, total_pages, pages_per_task)
+            ]
+            results = await asyncio.gather(
+                *(
+                    cpu_executor.run(extract_pdf_pages, payload, start, stop)
+                    for start, stop in ranges
+                )
+            )
+
+        return self.assemble([page for pages in results for page in pages])
+
+    def extract_text_from_bytes(self, pdf_bytes: bytes) -> str:
+        """
+        Extract text from PDF bytes
+
+        Args:
+            pdf_bytes: PDF file content as bytes
+
+        Returns:
+            Extracted text content
+        """
+        text, _ = self.assemble(self.extract_pages(pdf_bytes))
+        return text
+
     def extract_text_from_file(self, file_path: str) -> str:
         """
         Extract text from PDF file path
@@ -0,0 +1,193 @@
+"""
+Direct Postgres writer for document_chunks using asyncpg binary COPY
+"""
+
+import json
+import logging
+from functools import partial
+from typing import Any, Dict, List, Optional
+
+try:
+    import asyncpg
+except ImportError:  # Optional: only needed when DATABASE_URL is configured
+    asyncpg = None
+
+from services.vectors import (
+    Vector,
+    from_bit_binary,
+    from_halfvec_binary,
+    from_pgvector_binary,
+    to_bit_binary,
+    to_halfvec_binary,
+    to_pgvector_binary,
+)
+
+logger = logging.getLogger(__name__)
+
+# Columns loaded by COPY; everything else takes its table default
+CHUNK_COLUMNS = (
+    "org_id",
+    "document_id",
+    "chunk_index",
+    "content",
+    "embedding",
+    "embedding_half",
+    "embedding_bit",
+    "embedding_model",
+    "embedding_dimensions",
+    "content_sha256",
+    "token_count",
+    "metadata",
+    "version",
+)
+
+_UPSERT_SQL = f"""
+    INSERT INTO public.document_chunks ({", ".join(CHUNK_COLUMNS)})
+    SELECT {", ".join(CHUNK_COLUMNS)} FROM pg_temp.document_chunks_stage
+    ON CONFLICT (document_id, chunk_index) DO UPDATE SET
+        content = EXCLUDED.content,
+        embedding = EXCLUDED.embedding,
+        embedding_half = EXCLUDED.embedding_half,
+        embedding_bit = EXCLUDED.embedding_bit,
+        embedding_model = EXCLUDED.embedding_model,
+        embedding_dimensions = EXCLUDED.embedding_dimensions,
+        content_sha256 = EXCLUDED.content_sha256,
+        token_count = EXCLUDED.token_count,
+        metadata = EXCLUDED.metadata,
+        version = EXCLUDED.version,
+        updated_at = NOW()
+"""
+
+
+class PostgresWriterError(Exception):
+    """Custom exception for direct Postgres write errors"""
+    pass
+
+
+class PostgresChunkWriter:
+    """
+    Bulk-load chunk rows over a direct asyncpg pool
+
+    Rows are streamed with binary COPY (embeddings in pgvector's binary formats)
+    into a per-connection temp table and merged into document_chunks with one
+    INSERT ... ON CONFLICT, so re-ingest upserts keep working.
+    """
+
+    def __init__(
+        self,
+        dsn: str,
+        min_size: int = 1,
+        max_size: int = 10,
+        vector_schema: str = "extensions",
+    ):
+        if asyncpg is None:
+            raise PostgresWriterError(
+                "asyncpg is required when DATABASE_URL is set: pip install asyncpg"
+            )
+        self.dsn = dsn
+        self.min_size = min_size
+        self.max_size = max_size
+        self.vector_schema = vector_schema
+        self._pool: Optional["asyncpg.Pool"] = None
+
+    async def write_chunks(self, records: List[Dict[str, Any]]) -> int:
+        """
+        Upsert chunk records; returns the number of rows written
+        """
+        if not records:
+            return 0
+
+        rows = [tuple(record[column] for column in CHUNK_COLUMNS) for record in records]
+        pool = await self._get_pool()
+
+        async with pool.acquire() as conn:
+            async with conn.transaction():
+                await conn.execute(
+                    "CREATE TEMP TABLE IF NOT EXISTS document_chunks_stage "
+                    "(LIKE public.document_chunks INCLUDING DEFAULTS) "
+                    "ON COMMIT DELETE ROWS"
+                )
+                await conn.copy_records_to_table(
+                    "document_chunks_stage",
+                    records=rows,
+                    columns=CHUNK_COLUMNS,
+                )
+                await conn.execute(_UPSERT_SQL)
+
+        return len(rows)
+
+    async def close(self) -> None:
+        if self._pool is not None:
+            await self._pool.close()
+            self._pool = None
+
+    async def _get_pool(self) -> "asyncpg.Pool":
+        if self._pool is None:
+            self._pool = await asyncpg.create_pool(
+                self.dsn,
+                min_size=self.min_size,
+                max_size=self.max_size,
+                init=partial(_init_connection, vector_schema=self.vector_schema),
+            )
+            logger.info(
+                f"Opened Postgres pool ({self.min_size}-{self.max_size} connections)"
+            )
+        return self._pool
+
+
+async def _init_connection(
+    conn: "asyncpg.Connection", vector_schema: str = "extensions"
+) -> None:
+    """
+    Register binary pgvector (vector, halfvec, bit) and JSONB codecs on each
+    pooled connection
+    """
+    await conn.set_type_codec(
+        "vector",
+        schema=vector_schema,
+        encoder=encode_vector,
+        decoder=decode_vector,
+        format="binary",
+    )
+    await conn.set_type_codec(
+        "halfvec",
+        schema=vector_schema,
+        encoder=to_halfvec_binary,
+        decoder=from_halfvec_binary,
+        format="binary",
+    )
+    # Embeddings are binary-quantized on the way in; reads return a bool array
+    await conn.set_type_codec(
+        "bit",
+        schema="pg_catalog",
+        encoder=to_bit_binary,
+        decoder=from_bit_binary,
+        format="binary",
+    )
+    # COPY only takes binary codecs; binary jsonb is a version byte + JSON text
+    await conn.set_type_codec(
+        "jsonb",
+        schema="pg_catalog",
+        encoder=encode_jsonb,
+        decoder=decode_jsonb,
+        format="binary",
+    )
+
+
+def encode_vector(value) -> bytes:
+    """
+    Encode a float32 array (or list / pgvector text) in pgvector's binary format
+    """
+    return to_pgvector_binary(value)
+
+
+def decode_vector(data: bytes) -> Vector:
+    return from_pgvector_binary(data)
+
+
+def encode_jsonb(value: Any) -> bytes:
+    return b"\x01" + json.dumps(value).encode("utf-8")
+
+
+def decode_jsonb(data: bytes) -> Any:
+    return json.loads(data[1:])
@@ -0,0 +1,169 @@
+"""
+In-process registry of document ingestion progress
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, Optional
+
+from config import settings
+
+# Stages after which a document's progress no longer changes
+TERMINAL_STAGES = ("completed", "failed")
+
+
+@dataclass
+class IngestProgress:
+    """
+    Progress of one document: stage, chunks done/total and an ETA
+
+    chunks_done counts chunks written or found unchanged; the ETA
+    extrapolates the rate since the first chunk was done.
+    """
+
+    document_id: str
+    org_id: str
+    stage: str = "queued"
+    chunks_done: int = 0
+    chunks_total: Optional[int] = None
+    error_message: Optional[str] = None
+    started_at: float = field(default_factory=time.time)
+    updated_at: float = field(default_factory=time.time)
+    _rate_started_at: Optional[float] = None
+    _changed: asyncio.Event = field(default_factory=asyncio.Event, repr=False)
+
+    @property
+    def finished(self) -> bool:
+        return self.stage in TERMINAL_STAGES
+
+    @property
+    def eta_s(self) -> Optional[float]:
+        """
+        Seconds until all chunks are done at the current rate
+        """
+        if self.finished:
+            return 0.0
+        if not self.chunks_total or not self.chunks_done or self._rate_started_at is None:
+            return None
+        elapsed = time.time() - self._rate_started_at
+        rate = self.chunks_done / elapsed if elapsed > 0 else 0.0
+        if rate <= 0:
+            return None
+        return max(self.chunks_total - self.chunks_done, 0) / rate
+
+    def set_stage(self, stage: str, chunks_total: Optional[int] = None) -> None:
+        self.stage = stage
+        if chunks_total is not None:
+            self.chunks_total = chunks_total
+        self._notify()
+
+    def advance(self, chunks: int) -> None:
+        if chunks <= 0:
+            return
+        if self._rate_started_at is None:
+            self._rate_started_at = self.updated_at
+        self.chunks_done += chunks
+        self._notify()
+
+    def finish(self, error_message: Optional[str] = None) -> None:
+        self.stage = "failed" if error_message else "completed"
+        self.error_message = error_message
+        if not error_message and self.chunks_total is not None:
+            self.chunks_done = self.chunks_total
+        self._notify()
+
+    async def wait_for_change(self, timeout_s: float) -> bool:
+        """
+        Wait until the next update; False on timeout
+        """
+        changed = self._changed
+        try:
+            await asyncio.wait_for(changed.wait(), timeout=timeout_s)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    def to_dict(self) -> Dict[str, Any]:
+        eta_s = self.eta_s
+        return {
+            "document_id": self.document_id,
+            "org_id": self.org_id,
+            "stage": self.stage,
+            "chunks_done": self.chunks_done,
+            "chunks_total": self.chunks_total,
+            "eta_s": round(eta_s, 1) if eta_s is not None else None,
+            "error_message": self.error_message,
+            "elapsed_s": round(self.updated_at - self.started_at, 2),
+        }
+
+    def _notify(self) -> None:
+        self.updated_at = time.time()
+        # Wake current waiters; later waiters block on a fresh event
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+
+class ProgressRegistry:
+    """
+    Latest progress per document, kept PROGRESS_RETENTION_S after it finishes
+
+    Progress lives in the process running the pipeline; with
+    INGEST_BACKEND=postgres the API only sees chunk counts from the database.
+    """
+
+    def __init__(self, retention_s: float = settings.PROGRESS_RETENTION_S):
+        self.retention_s = retention_s
+        self._entries: Dict[str, IngestProgress] = {}
+
+    def start(self, document_id: str, org_id: str, stage: str = "queued") -> IngestProgress:
+        """
+        Begin (or restart) tracking a document
+
+        Queueing a document that is already in flight leaves its stage alone,
+        so a re-submission doesn't show a running document as "queued".
+        """
+        self._prune()
+        current = self._entries.get(document_id)
+        if current is not None and not current.finished:
+            if stage != "queued":
+                current.set_stage(stage)
+            return current
+        progress = IngestProgress(document_id=document_id, org_id=org_id, stage=stage)
+        self._entries[document_id] = progress
+        if current is not None:
+            current._notify()  # Hand streams of the old run over to this one
+        return progress
+
+    def get(self, document_id: str, org_id: str) -> Optional[IngestProgress]:
+        progress = self._entries.get(document_id)
+        if progress is None or progress.org_id != org_id:
+            return None
+        return progress
+
+    async def stream(
+        self, document_id: str, org_id: str, heartbeat_s: float
+    ) -> AsyncIterator[Optional[Dict[str, Any]]]:
+        """
+        Yield a snapshot on every change (None as a keep-alive tick) until
+        the document finishes
+        """
+        while True:
+            progress = self.get(document_id, org_id)
+            if progress is None:
+                return
+            yield progress.to_dict()
+            if progress.finished:
+                return
+            while not await progress.wait_for_change(heartbeat_s):
+                yield None
+
+    def _prune(self) -> None:
+        cutoff = time.time() - self.retention_s
+        expired = [
+            document_id
+            for document_id, progress in self._entries.items()
+            if progress.finished and progress.updated_at < cutoff
+        ]
+        for document_id in expired:
+            del self._entries[document_id]
@@ -0,0 +1,91 @@
+"""
+In-memory LRU cache of search query embeddings with a TTL
+"""
+
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from services.vectors import Vector
+
+# (model, dimensions, normalized query)
+QueryKey = Tuple[str, int, str]
+
+
+def normalize_query(query: str) -> str:
+    """
+    Canonical form of a search query: NFKC, case-folded, single-spaced
+    """
+    return " ".join(unicodedata.normalize("NFKC", query).casefold().split())
+
+
+class QueryEmbeddingCache:
+    """
+    Query embeddings keyed by (model, dimensions, normalized query)
+
+    Dashboards and saved searches repeat the same few queries, so a small
+    process-local cache serves most of them without an embedding call.
+    Entries expire `ttl_s` after they were stored; once the cached vectors
+    exceed `max_bytes`, the least recently used entries are evicted.
+    Stored vectors are read-only.
+    """
+
+    def __init__(self, max_bytes: int, ttl_s: float):
+        self.max_bytes = max_bytes
+        self.ttl_s = ttl_s
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+        self._bytes = 0
+        self._entries: "OrderedDict[QueryKey, Tuple[float, Vector]]" = OrderedDict()
+
+    def get(self, key: QueryKey) -> Optional[Vector]:
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] <= time.monotonic():
+            self._remove(key)
+            self.expired += 1
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key: QueryKey, vector: Vector) -> None:
+        vector = np.array(vector, dtype=np.float32)
+        vector.flags.writeable = False
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (time.monotonic() + self.ttl_s, vector)
+        self._bytes += vector.nbytes
+        while self._bytes > self.max_bytes and len(self._entries) > 1:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Size and hit/miss counters since process start
+        """
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "expired": self.expired,
+            "evictions": self.evictions,
+            "hit_rate": self.hit_rate,
+        }
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return round(self.hits / lookups, 4) if lookups else 0.0
+
+    def _remove(self, key: QueryKey) -> None:
+        _, vector = self._entries.pop(key)
+        self._bytes -= vector.nbytes
@@ -0,0 +1,268 @@
+"""
+Token-bucket rate limiting and retry with backoff for OpenAI calls
+"""
+
+import asyncio
+import logging
+import random
+import re
+import time
+from typing import Any, Awaitable, Callable, Mapping, Optional
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# Status codes worth retrying (conflict, rate limit, server errors)
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+# OpenAI reset durations look like "1s", "6m0s", "250ms" or "1h2m3.5s"
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_DURATION_UNITS = {"h": 3600.0, "m": 60.0, "s": 1.0, "ms": 0.001}
+
+
+class TokenBucket:
+    """
+    Continuously refilling bucket holding up to `capacity` units
+    """
+
+    def __init__(self, per_minute: float, burst_s: float):
+        self.per_minute = per_minute
+        self.burst_s = burst_s
+        self.level = self.capacity
+        self._updated = time.monotonic()
+
+    @property
+    def rate(self) -> float:
+        """
+        Units added per second
+        """
+        return self.per_minute / 60.0
+
+    @property
+    def capacity(self) -> float:
+        return max(self.rate * self.burst_s, 1.0)
+
+    def refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """
+        Seconds until `amount` units are available (0 if they are now)
+        """
+        # Requests bigger than the bucket go through once it is full
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) / self.rate
+
+    def take(self, amount: float) -> None:
+        self.level -= min(amount, self.capacity)
+
+
+class RateLimiter:
+    """
+    Requests-per-minute and tokens-per-minute limiter with adaptive backoff
+
+    Callers queue FIFO on one lock, so throughput is smoothed at the limit
+    instead of bursting into 429s. Rate-limit headers on every response
+    resync the buckets (other processes spend the same quota) and lower the
+    rates if the account limit is below the configured one. A 429 pauses
+    all callers for Retry-After and halves the rates, which then recover by
+    10% per successful request.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        requests_per_minute: float,
+        tokens_per_minute: float,
+        burst_s: float = settings.OPENAI_RATE_LIMIT_BURST_S,
+        max_retries: int = settings.OPENAI_MAX_RETRIES,
+        backoff_base_s: float = settings.OPENAI_BACKOFF_BASE_S,
+        backoff_max_s: float = settings.OPENAI_BACKOFF_MAX_S,
+    ):
+        self.name = name
+        self.requests = TokenBucket(requests_per_minute, burst_s)
+        self.tokens = TokenBucket(tokens_per_minute, burst_s)
+        self.max_retries = max_retries
+        self.backoff_base_s = backoff_base_s
+        self.backoff_max_s = backoff_max_s
+        self._limits = (requests_per_minute, tokens_per_minute)
+        self._factor = 1.0  # Multiplier on the limits after 429s
+        self._paused_until = 0.0
+        self._lock: Optional[asyncio.Lock] = None
+        self.throttled = 0  # 429 responses seen
+
+    async def acquire(self, tokens: int = 0) -> None:
+        """
+        Wait until one request and `tokens` tokens fit within the limits
+        """
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.requests.refill(now)
+                self.tokens.refill(now)
+                wait = max(
+                    self._paused_until - now,
+                    self.requests.wait_time(1),
+                    self.tokens.wait_time(tokens),
+                )
+                if wait <= 0:
+                    self.requests.take(1)
+                    self.tokens.take(tokens)
+                    return
+                await asyncio.sleep(wait)
+
+    async def call(self, request: Callable[[], Awaitable[Any]], tokens: int = 0) -> Any:
+        """
+        Run an OpenAI `with_raw_response` call within the limits and parse it
+
+        Retries rate limits, server errors and connection failures with
+        jittered exponential backoff, honoring Retry-After; other errors and
+        the last failed attempt are raised unchanged.
+        """
+        for attempt in range(self.max_retries + 1):
+            await self.acquire(tokens)
+            try:
+                raw = await request()
+            except Exception as e:
+                headers = _error_headers(e)
+                if headers is not None:
+                    self.update_from_headers(headers)
+                status = getattr(e, "status_code", None)
+                if attempt >= self.max_retries or not _is_retryable(e, status):
+                    raise
+
+                retry_after = _retry_after(headers)
+                delay = self._backoff(attempt, retry_after)
+                if status == 429:
+                    self._throttle(delay)
+                logger.warning(
+                    f"{self.name} request failed ({status or type(e).__name__}), "
+                    f"retry {attempt + 1}/{self.max_retries} in {delay:.1f}s"
+                )
+                await asyncio.sleep(delay)
+                continue
+
+            self.update_from_headers(raw.headers)
+            self._recover()
+            return raw.parse()
+
+    def update_from_headers(self, headers: Mapping[str, str]) -> None:
+        """
+        Adopt the provider's view of limits and remaining quota
+        """
+        for bucket, kind, configured in (
+            (self.requests, "requests", self._limits[0]),
+            (self.tokens, "tokens", self._limits[1]),
+        ):
+            limit = _to_float(headers.get(f"x-ratelimit-limit-{kind}"))
+            if limit and limit < configured:
+                self._limits = (
+                    (limit, self._limits[1]) if kind == "requests" else (self._limits[0], limit)
+                )
+                bucket.per_minute = limit * self._factor
+                logger.info(f"{self.name}: account {kind} limit is {limit:.0f}/min")
+
+            # Remaining quota is shared with every other client on the key; if
+            # it is below what we think we have, wait for the server's reset
+            remaining = _to_float(headers.get(f"x-ratelimit-remaining-{kind}"))
+            if remaining is not None and remaining < bucket.level:
+                bucket.level = remaining
+                if remaining < 1:
+                    reset = _parse_duration(headers.get(f"x-ratelimit-reset-{kind}"))
+                    if reset:
+                        self._paused_until = max(self._paused_until, time.monotonic() + reset)
+
+    def _throttle(self, delay: float) -> None:
+        """
+        Pause every caller and back the rates off after a 429
+        """
+        self.throttled += 1
+        self._paused_until = max(self._paused_until, time.monotonic() + delay)
+        self._factor = max(self._factor * 0.5, 0.1)
+        self._apply_factor()
+
+    def _recover(self) -> None:
+        if self._factor < 1.0:
+            self._factor = min(self._factor * 1.1, 1.0)
+            self._apply_factor()
+
+    def _apply_factor(self) -> None:
+        self.requests.per_minute = self._limits[0] * self._factor
+        self.tokens.per_minute = self._limits[1] * self._factor
+        self.requests.level = min(self.requests.level, self.requests.capacity)
+        self.tokens.level = min(self.tokens.level, self.tokens.capacity)
+
+    def _backoff(self, attempt: int, retry_after: Optional[float]) -> float:
+        """
+        Full-jitter exponential backoff, never shorter than Retry-After
+        """
+        delay = random.uniform(0, min(self.backoff_max_s, self.backoff_base_s * 2 ** attempt))
+        if retry_after is not None:
+            delay = max(delay, retry_after + random.uniform(0, self.backoff_base_s))
+        return delay
+
+    def stats(self) -> dict:
+        return {
+            "requests_per_min": round(self.requests.per_minute),
+            "tokens_per_min": round(self.tokens.per_minute),
+            "throttled": self.throttled,
+        }
+
+
+def _is_retryable(error: Exception, status: Optional[int]) -> bool:
+    if status is not None:
+        return status in RETRYABLE_STATUS
+    # openai.APIConnectionError / APITimeoutError carry no status
+    return type(error).__name__ in ("APIConnectionError", "APITimeoutError")
+
+
+def _error_headers(error: Exception) -> Optional[Mapping[str, str]]:
+    response = getattr(error, "response", None)
+    return getattr(response, "headers", None)
+
+
+def _retry_after(headers: Optional[Mapping[str, str]]) -> Optional[float]:
+    """
+    Seconds from retry-after-ms or retry-after (HTTP dates are ignored)
+    """
+    if headers is None:
+        return None
+    retry_after_ms = _to_float(headers.get("retry-after-ms"))
+    if retry_after_ms is not None:
+        return retry_after_ms / 1000
+    return _to_float(headers.get("retry-after"))
+
+
+def _parse_duration(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        return _to_float(value)
+    return sum(float(amount) * _DURATION_UNITS[unit] for amount, unit in parts)
+
+
+def _to_float(value: Optional[str]) -> Optional[float]:
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+# Shared instances: OpenAI enforces limits per model family across all callers
+embedding_rate_limiter = RateLimiter(
+    "embeddings",
+    settings.EMBEDDING_RATE_LIMIT_PER_MIN,
+    settings.EMBEDDING_TOKENS_PER_MIN,
+)
+chat_rate_limiter = RateLimiter(
+    "chat",
+    settings.CHAT_RATE_LIMIT_PER_MIN,
+    settings.CHAT_TOKENS_PER_MIN,
+)
@@ -0,0 +1,406 @@
+"""
+Async data access layer for Supabase tables, RPCs and storage
+"""
+
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple, TypeVar
+
+from config import settings
+from services.vectors import Vector, to_bit_string, to_pgvector_text
+
+if TYPE_CHECKING:
+    from supabase import Client
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Rows per page for unbounded selects; PostgREST's default max-rows
+_PAGE_SIZE = 1000
+
+
+class RepositoryError(Exception):
+    """Custom exception for data access errors"""
+    pass
+
+
+class SupabaseRepository:
+    """
+    Typed async access to documents, document_chunks, storage,
+    financial_analyses and document_ingest_jobs
+
+    supabase-py's client is synchronous, so every call runs on a dedicated,
+    bounded thread pool with a per-call timeout. A slow request ties up one pool
+    thread instead of the event loop that serves every other request.
+    """
+
+    def __init__(
+        self,
+        client: "Client",
+        max_workers: int = settings.SUPABASE_IO_THREADS,
+        timeout_s: float = settings.SUPABASE_CALL_TIMEOUT_S,
+        storage_timeout_s: float = settings.SUPABASE_STORAGE_TIMEOUT_S,
+    ):
+        self.client = client
+        self.timeout_s = timeout_s
+        self.storage_timeout_s = storage_timeout_s
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="supabase-io"
+        )
+
+    async def _run(self, call: Callable[[], T], timeout_s: Optional[float] = None) -> T:
+        """
+        Run a blocking Supabase call off the event loop with a timeout
+        """
+        timeout_s = timeout_s or self.timeout_s
+        loop = asyncio.get_running_loop()
+        try:
+            return await asyncio.wait_for(
+                loop.run_in_executor(self._executor, call), timeout=timeout_s
+            )
+        except asyncio.TimeoutError:
+            raise RepositoryError(f"Supabase call timed out after {timeout_s}s")
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    # Documents
+
+    async def get_document(
+        self, document_id: str, org_id: str
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Fetch a document for ingestion (matches org_id or legacy tenant_id)
+        """
+        response = await self._run(
+            lambda: self.client.table("documents")
+            .select("id, name, text_content, tenant_id, org_id, mime_type, file_path, metadata")
+            .eq("id", document_id)
+            .or_(f"tenant_id.eq.{org_id},org_id.eq.{org_id}")
+            .single()
+            .execute()
+        )
+        return response.data
+
+    async def get_financial_document(
+        self, document_id: str, org_id: str
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Fetch storage metadata for a financial document
+        """
+        response = await self._run(
+            lambda: self.client.table("documents")
+            .select("id, file_name, storage_path, bucket")
+            .eq("id", document_id)
+            .eq("org_id", org_id)
+            .single()
+            .execute()
+        )
+        return response.data
+
+    async def update_document_text(
+        self,
+        document_id: str,
+        text_content: str,
+        metadata: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        values: Dict[str, Any] = {"text_content": text_content}
+        if metadata is not None:
+            values["metadata"] = metadata
+        await self._run(
+            lambda: self.client.table("documents")
+            .update(values)
+            .eq("id", document_id)
+            .execute()
+        )
+
+    # Storage
+
+    async def download_file(self, bucket: str, path: str) -> bytes:
+        return await self._run(
+            lambda: self.client.storage.from_(bucket).download(path),
+            timeout_s=self.storage_timeout_s,
+        )
+
+    # Organizations
+
+    async def get_org_embedding_settings(self, org_id: str) -> Dict[str, Any]:
+        """
+        An org's embedding storage tier and pinned model (None until its first ingest)
+        """
+        response = await self._run(
+            lambda: self.client.table("organizations")
+            .select("embedding_storage_tier, embedding_model, embedding_dimensions")
+            .eq("id", org_id)
+            .limit(1)
+            .execute()
+        )
+        row = (response.data or [{}])[0]
+        return {
+            "embedding_storage_tier": row.get("embedding_storage_tier") or "float32",
+            "embedding_model": row.get("embedding_model"),
+            "embedding_dimensions": row.get("embedding_dimensions"),
+        }
+
+    async def pin_org_embedding_model(
+        self, org_id: str, model: str, dimensions: int
+    ) -> None:
+        """
+        Record the model an org's chunks are embedded with, if none is yet
+        """
+        await self._run(
+            lambda: self.client.table("organizations")
+            .update({"embedding_model": model, "embedding_dimensions": dimensions})
+            .eq("id", org_id)
+            .is_("embedding_model", "null")
+            .execute()
+        )
+
+    # Document chunks
+
+    async def get_chunk_hashes(
+        self, document_id: str, org_id: str
+    ) -> Dict[int, Optional[str]]:
+        """
+        Map chunk_index -> content_sha256 for a document's stored chunks
+
+        Paged by chunk_index, since PostgREST caps each response at max-rows.
+        """
+        hashes: Dict[int, Optional[str]] = {}
+        start = 0
+        while True:
+            response = await self._run(
+                lambda: self.client.table("document_chunks")
+                .select("chunk_index, content_sha256")
+                .eq("document_id", document_id)
+                .eq("org_id", org_id)
+                .order("chunk_index")
+                .range(start, start + _PAGE_SIZE - 1)
+                .execute()
+            )
+            rows = response.data or []
+            for row in rows:
+                hashes[row["chunk_index"]] = row.get("content_sha256")
+            if len(rows) < _PAGE_SIZE:
+                return hashes
+            start += _PAGE_SIZE
+
+    async def find_embeddings_by_hash(
+        self, org_id: str, content_hashes: List[str], model: str
+    ) -> List[Dict[str, Any]]:
+        """
+        One stored embedding per known hash in the org from the given model
+        (single RPC round trip)
+        """
+        response = await self._run(
+            lambda: self.client.rpc(
+                "find_chunk_embeddings_by_hash",
+                {
+                    "match_org_id": org_id,
+                    "content_hashes": content_hashes,
+                    "match_model": model,
+                },
+            ).execute()
+        )
+        return response.data or []
+
+    async def upsert_chunks(self, records: List[Dict[str, Any]]) -> int:
+        """
+        Upsert chunk rows on (document_id, chunk_index); returns rows written
+
+        Embeddings are sent as pgvector text literals (bit strings for the
+        binary tier), and rows are not echoed back (only a count), so vectors
+        cross the wire once.
+        """
+        from postgrest.types import CountMethod, ReturnMethod
+
+        rows = [_serialize_chunk(record) for record in records]
+        response = await self._run(
+            lambda: self.client.table("document_chunks")
+            .upsert(
+                rows,
+                on_conflict="document_id,chunk_index",
+                count=CountMethod.exact,
+                returning=ReturnMethod.minimal,
+            )
+            .execute()
+        )
+        if not response.count:
+            raise RepositoryError("Failed to insert chunks")
+        return response.count
+
+    async def search_candidates(
+        self,
+        org_id: str,
+        query_embedding: Vector,
+        query_text: str,
+        match_count: int,
+        include_embeddings: bool = False,
+    ) -> List[Dict[str, Any]]:
+        """
+        Nearest-vector and best full-text chunks of an org, with both raw scores
+
+        With include_embeddings, each row's embedding comes back in pgvector's
+        binary format (hex bytea; see vectors.from_pgvector_bytea).
+        """
+        response = await self._run(
+            lambda: self.client.rpc(
+                "search_chunk_candidates",
+                {
+                    "query_embedding": to_pgvector_text(query_embedding),
+                    "query_text": query_text,
+                    "match_org_id": org_id,
+                    "match_count": match_count,
+                    "include_embeddings": include_embeddings,
+                },
+            ).execute()
+        )
+        return response.data or []
+
+    async def get_chunk_windows(
+        self, org_id: str, windows: List[Tuple[str, int, int]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Chunks in each (document_id, first_index, last_index) window, in one call
+        """
+        if not windows:
+            return []
+        document_ids, starts, ends = (list(column) for column in zip(*windows))
+        response = await self._run(
+            lambda: self.client.rpc(
+                "get_chunk_windows",
+                {
+                    "match_org_id": org_id,
+                    "window_document_ids": document_ids,
+                    "window_starts": starts,
+                    "window_ends": ends,
+                },
+            ).execute()
+        )
+        return response.data or []
+
+    async def delete_chunks(
+        self, document_id: str, org_id: str, from_index: Optional[int] = None
+    ) -> int:
+        """
+        Delete a document's chunks (optionally only chunk_index >= from_index)
+
+        Only the count comes back, not the deleted rows and their embeddings.
+        """
+        from postgrest.types import CountMethod, ReturnMethod
+
+        def call():
+            query = (
+                self.client.table("document_chunks")
+                .delete(count=CountMethod.exact, returning=ReturnMethod.minimal)
+                .eq("document_id", document_id)
+                .eq("org_id", org_id)
+            )
+            if from_index is not None:
+                query = query.gte("chunk_index", from_index)
+            return query.execute()
+
+        response = await self._run(call)
+        return response.count or 0
+
+    async def count_chunks(
+        self, document_id: str, org_id: str, embedded_only: bool = False
+    ) -> int:
+        """
+        Count a document's chunks without fetching any rows (HEAD + count)
+        """
+
+        def count():
+            query = (
+                self.client.table("document_chunks")
+                .select("id", count="exact", head=True)
+                .eq("document_id", document_id)
+                .eq("org_id", org_id)
+            )
+            if embedded_only:
+                # halfvec-tier rows keep no float32 column; same predicate as
+                # idx_document_chunks_document_org_any_embedding
+                query = query.or_("embedding.not.is.null,embedding_half.not.is.null")
+            return query.execute()
+
+        response = await self._run(count)
+        return response.count or 0
+
+    # Financial analyses
+
+    async def create_financial_analysis(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        response = await self._run(
+            lambda: self.client.table("financial_analyses").insert(record).execute()
+        )
+        if not response.data:
+            raise RepositoryError("Failed to create analysis record")
+        return response.data[0]
+
+    async def update_financial_analysis(
+        self, analysis_id: str, org_id: str, values: Dict[str, Any]
+    ) -> None:
+        await self._run(
+            lambda: self.client.table("financial_analyses")
+            .update(values)
+            .eq("id", analysis_id)
+            .eq("org_id", org_id)
+            .execute()
+        )
+
+    async def get_financial_analysis(
+        self, analysis_id: str, org_id: str
+    ) -> Optional[Dict[str, Any]]:
+        response = await self._run(
+            lambda: self.client.table("financial_analyses")
+            .select("*")
+            .eq("id", analysis_id)
+            .eq("org_id", org_id)
+            .single()
+            .execute()
+        )
+        return response.data
+
+    # Ingest jobs
+
+    async def insert_ingest_job(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        response = await self._run(
+            lambda: self.client.table("document_ingest_jobs").insert(record).execute()
+        )
+        if not response.data:
+            raise RepositoryError("Failed to enqueue job")
+        return response.data[0]
+
+    async def insert_ingest_jobs(self, records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Insert many jobs in one request
+        """
+        response = await self._run(
+            lambda: self.client.table("document_ingest_jobs").insert(records).execute()
+        )
+        if len(response.data or []) != len(records):
+            raise RepositoryError("Failed to enqueue jobs")
+        return response.data
+
+    async def rpc(self, function: str, params: Dict[str, Any]) -> Any:
+        """
+        Call a Postgres function through PostgREST
+        """
+        response = await self._run(
+            lambda: self.client.rpc(function, params).execute()
+        )
+        return response.data
+
+
+def _serialize_chunk(record: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Convert a chunk record's embedding columns to PostgREST-friendly text
+    """
+    row = dict(record)
+    for column in ("embedding", "embedding_half"):
+        if row.get(column) is not None:
+            row[column] = to_pgvector_text(row[column])
+    if row.get("embedding_bit") is not None:
+        row["embedding_bit"] = to_bit_string(row["embedding_bit"])
+    return row
@@ -0,0 +1,129 @@
+"""
+Cross-encoder reranking of search candidates on CPU
+"""
+
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from functools import cached_property
+from typing import TYPE_CHECKING, List, Optional
+
+import numpy as np
+
+from config import settings
+
+if TYPE_CHECKING:
+    from sentence_transformers import CrossEncoder
+
+logger = logging.getLogger(__name__)
+
+
+class CrossEncoderReranker:
+    """
+    Score (query, chunk) pairs with a cross-encoder, within a latency cap
+
+    The model is loaded once (warmed at API startup) and only ever runs on
+    one dedicated thread: ONNX Runtime / torch release the GIL and use their
+    own intra-op threads, so the event loop stays free and concurrent
+    searches queue instead of fighting over cores. Pairs are truncated to
+    max_tokens (query + chunk) and scored in batches of passages of similar
+    length, so little work goes into padding.
+
+    score() returns None when the model is unavailable or misses the
+    timeout; callers keep their fused ranking. A request still queued when
+    its timeout expires is dropped before it reaches the model.
+    """
+
+    def __init__(
+        self,
+        model_name: str = settings.RERANK_MODEL,
+        backend: str = settings.RERANK_BACKEND,
+        onnx_file: Optional[str] = settings.RERANK_ONNX_FILE,
+        batch_size: int = settings.RERANK_BATCH_SIZE,
+        max_tokens: int = settings.RERANK_MAX_TOKENS,
+        timeout_s: float = settings.RERANK_TIMEOUT_MS / 1000,
+    ):
+        self.model_name = model_name
+        self.backend = backend
+        self.onnx_file = onnx_file if backend == "onnx" else None
+        self.batch_size = batch_size
+        self.max_tokens = max_tokens
+        self.timeout_s = timeout_s
+        self.available = True
+        self.timeouts = 0
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="rerank")
+
+    @cached_property
+    def model(self) -> "CrossEncoder":
+        from sentence_transformers import CrossEncoder
+
+        model_kwargs = {"file_name": self.onnx_file} if self.onnx_file else None
+        model = CrossEncoder(
+            self.model_name,
+            device="cpu",
+            max_length=self.max_tokens,
+            backend=self.backend,
+            model_kwargs=model_kwargs,
+        )
+        # First inference allocates buffers / builds the ONNX session plan
+        model.predict([("warm up", "warm up")], batch_size=1, show_progress_bar=False)
+        logger.info(f"Loaded reranker {self.model_name} ({self.backend})")
+        return model
+
+    async def load(self) -> None:
+        """
+        Load and warm the model on the rerank thread; disables reranking on failure
+        """
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(self._executor, lambda: self.model)
+        except Exception as e:
+            self.available = False
+            logger.error(f"Reranker {self.model_name} unavailable: {str(e)}")
+
+    async def score(self, query: str, passages: List[str]) -> Optional[np.ndarray]:
+        """
+        Relevance of each passage to the query (0-1), or None to fall back
+        """
+        if not self.available or not passages:
+            return None
+        loop = asyncio.get_running_loop()
+        try:
+            return await asyncio.wait_for(
+                loop.run_in_executor(self._executor, self._predict, query, passages),
+                timeout=self.timeout_s,
+            )
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            logger.warning(
+                f"Rerank of {len(passages)} passages exceeded "
+                f"{self.timeout_s * 1000:.0f}ms; using fused scores"
+            )
+        except Exception as e:
+            logger.error(f"Rerank failed: {str(e)}")
+        return None
+
+    def _predict(self, query: str, passages: List[str]) -> np.ndarray:
+        # Longest first, so each batch holds passages of similar length
+        order = sorted(range(len(passages)), key=lambda i: len(passages[i]), reverse=True)
+        scores = self.model.predict(
+            [(query, passages[i]) for i in order],
+            batch_size=self.batch_size,
+            convert_to_numpy=True,
+            show_progress_bar=False,
+        )
+        result = np.empty(len(passages), dtype=np.float32)
+        result[order] = scores
+        return result
+
+    def stats(self) -> dict:
+        return {
+            "model": self.model_name,
+            "backend": self.backend,
+            "loaded": "model" in self.__dict__,
+            "available": self.available,
+            "timeouts": self.timeouts,
+        }
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
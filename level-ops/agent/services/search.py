@@ -0,0 +1,327 @@
+"""
+Hybrid search: query embedding, candidate retrieval, weighted fusion, top-k
+and neighbor-window expansion
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from config import settings
+from models import ChunkResult, SearchRequest, SearchResponse
+from services.embedder import EmbeddingService
+from services.mmr import mmr_select
+from services.repository import SupabaseRepository
+from services.reranker import CrossEncoderReranker
+from services.vectors import Vector, from_pgvector_bytea
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingModelMismatchError(Exception):
+    """Custom exception for queries embedded with a model the org wasn't"""
+    pass
+
+
+@dataclass
+class SearchCandidate:
+    """
+    One chunk moving through the search stages with its scores
+    """
+
+    id: str
+    document_id: str
+    document_name: str
+    chunk_index: int
+    page: Optional[int]
+    content: str
+    vector_score: float
+    text_score: float
+    score: float = 0.0
+    score_type: str = "fused"
+    embedding: Optional[Vector] = None
+    neighbor_of: Optional[str] = None
+
+    @classmethod
+    def from_row(cls, row: Dict[str, Any]) -> "SearchCandidate":
+        return cls(
+            id=row["id"],
+            document_id=row["document_id"],
+            document_name=row.get("document_name") or "",
+            chunk_index=row["chunk_index"],
+            page=row.get("page"),
+            content=row["content"],
+            vector_score=row.get("vector_score") or 0.0,
+            text_score=row.get("text_score") or 0.0,
+            embedding=from_pgvector_bytea(row["embedding"]) if row.get("embedding") else None,
+        )
+
+    def to_result(self) -> ChunkResult:
+        return ChunkResult(
+            id=self.id,
+            document_id=self.document_id,
+            document_name=self.document_name,
+            chunk_index=self.chunk_index,
+            page=self.page,
+            content=self.content,
+            score=self.score,
+            score_type=self.score_type,
+            neighbor_of=self.neighbor_of,
+        )
+
+
+class SearchService:
+    """
+    Search an org's chunks in timed phases
+
+    One RPC returns the TOP_K_PRE nearest chunks (from the org's storage-tier
+    index) together with the TOP_K_PRE best full-text matches, each carrying
+    both raw scores and embedding. Fusion is a weighted sum of cosine
+    similarity and normalized text rank (FUSION_WEIGHT_VECTOR /
+    FUSION_WEIGHT_BM25); MMR then keeps the TOP_K_MMR most relevant candidates
+    that aren't near-duplicates of each other (MMR_LAMBDA; 0 disables it).
+    With a reranker, the first RERANK_TOP_K of those are re-scored by the
+    cross-encoder unless it misses its latency cap.
+
+    With include_neighbors, the NEIGHBOR_WINDOW_BEFORE/AFTER chunks around
+    every hit follow the hits, fetched for all of them in one call and
+    scored hit score * NEIGHBOR_DECAY_FACTOR ** distance (never above the hit).
+    """
+
+    def __init__(
+        self,
+        repository: SupabaseRepository,
+        embedder: EmbeddingService,
+        reranker: Optional[CrossEncoderReranker] = None,
+        candidate_count: int = settings.TOP_K_PRE,
+        vector_weight: float = settings.FUSION_WEIGHT_VECTOR,
+        text_weight: float = settings.FUSION_WEIGHT_BM25,
+        mmr_k: int = settings.TOP_K_MMR,
+        mmr_lambda: float = settings.MMR_LAMBDA,
+        rerank_k: int = settings.RERANK_TOP_K,
+        neighbors_before: int = settings.NEIGHBOR_WINDOW_BEFORE,
+        neighbors_after: int = settings.NEIGHBOR_WINDOW_AFTER,
+        neighbor_decay: float = settings.NEIGHBOR_DECAY_FACTOR,
+    ):
+        self.repository = repository
+        self.embedder = embedder
+        self.reranker = reranker
+        self.candidate_count = candidate_count
+        self.vector_weight = vector_weight
+        self.text_weight = text_weight
+        self.mmr_k = mmr_k
+        self.mmr_lambda = mmr_lambda
+        self.rerank_k = rerank_k
+        self.neighbors_before = neighbors_before
+        self.neighbors_after = neighbors_after
+        self.neighbor_decay = neighbor_decay
+
+    async def search(self, request: SearchRequest, org_id: str) -> SearchResponse:
+        started = time.perf_counter()
+        query_embedding, query_cached = await self.embed_query(request.query, org_id)
+        embedded = time.perf_counter()
+
+        rows = await self.repository.search_candidates(
+            org_id,
+            query_embedding,
+            request.query,
+            self.candidate_count,
+            include_embeddings=self.mmr_k > 0,
+        )
+        searched = time.perf_counter()
+
+        candidates = self.fuse([SearchCandidate.from_row(row) for row in rows])
+        candidates = self.diversify(candidates)
+
+        rerank_applied = False
+        rerank_time_ms = None
+        if request.enable_rerank and self.reranker is not None:
+            rerank_started = time.perf_counter()
+            candidates, rerank_applied = await self.rerank(request.query, candidates)
+            rerank_time_ms = (time.perf_counter() - rerank_started) * 1000
+
+        results = candidates[: request.top_k]
+
+        neighbors: List[SearchCandidate] = []
+        neighbor_time_ms = None
+        if request.include_neighbors:
+            neighbor_started = time.perf_counter()
+            neighbors = await self.expand_neighbors(org_id, results)
+            neighbor_time_ms = (time.perf_counter() - neighbor_started) * 1000
+
+        total_ms = (time.perf_counter() - started) * 1000
+        logger.info(
+            f"Search for org {org_id}: {len(rows)} candidates, "
+            f"{len(results)} results (+{len(neighbors)} neighbors) in {total_ms:.0f}ms"
+        )
+        return SearchResponse(
+            results=[candidate.to_result() for candidate in results + neighbors],
+            total_searched=len(rows),
+            rerank_applied=rerank_applied,
+            query_embedding_time_ms=(embedded - started) * 1000,
+            query_embedding_cached=query_cached,
+            query_cache_hit_rate=(
+                self.embedder.query_cache.hit_rate if self.embedder.query_cache else None
+            ),
+            search_time_ms=(searched - embedded) * 1000,
+            rerank_time_ms=rerank_time_ms,
+            neighbor_time_ms=neighbor_time_ms,
+            total_time_ms=total_ms,
+        )
+
+    async def embed_query(self, query: str, org_id: str) -> Tuple[Vector, bool]:
+        """
+        Embed a query for comparison with an org's chunks; (embedding, cache hit)
+
+        The org's pinned model is read alongside the embedding. Raises:
+            EmbeddingModelMismatchError: the org's chunks come from another model
+        """
+        (embedding, cached), org_embedding = await asyncio.gather(
+            self.embedder.embed_query(query),
+            self.repository.get_org_embedding_settings(org_id),
+        )
+        mismatch = self.embedder.pin_mismatch(
+            org_embedding["embedding_model"], org_embedding["embedding_dimensions"]
+        )
+        if mismatch:
+            raise EmbeddingModelMismatchError(mismatch)
+        return embedding, cached
+
+    def fuse(self, candidates: List[SearchCandidate]) -> List[SearchCandidate]:
+        """
+        Score candidates by weighted fusion, best first
+        """
+        for candidate in candidates:
+            candidate.score = (
+                self.vector_weight * candidate.vector_score
+                + self.text_weight * candidate.text_score
+            )
+            candidate.score_type = "fused"
+        return sorted(
+            candidates, key=lambda c: (c.score, c.vector_score), reverse=True
+        )
+
+    def diversify(self, candidates: List[SearchCandidate]) -> List[SearchCandidate]:
+        """
+        MMR over the fused candidates, in pick order (unchanged without embeddings)
+        """
+        if self.mmr_k <= 0 or not candidates or any(c.embedding is None for c in candidates):
+            return candidates
+        picks = mmr_select(
+            np.stack([c.embedding for c in candidates]),
+            np.array([c.score for c in candidates], dtype=np.float32),
+            self.mmr_k,
+            self.mmr_lambda,
+        )
+        return [candidates[i] for i in picks]
+
+    async def rerank(
+        self, query: str, candidates: List[SearchCandidate]
+    ) -> Tuple[List[SearchCandidate], bool]:
+        """
+        Cross-encoder order for the head of the list; unchanged on fallback
+        """
+        head, tail = candidates[: self.rerank_k], candidates[self.rerank_k :]
+        scores = await self.reranker.score(query, [c.content for c in head])
+        if scores is None:
+            return candidates, False
+        for candidate, score in zip(head, scores):
+            candidate.score = float(score)
+            candidate.score_type = "rerank"
+        head.sort(key=lambda c: c.score, reverse=True)
+        return head + tail, True
+
+    def neighbor_windows(self, hits: List[SearchCandidate]) -> List[Tuple[str, int, int]]:
+        """
+        (document_id, first_index, last_index) around the hits, merged per document
+
+        Windows that overlap or touch become one, so a chunk shared by
+        adjacent hits is fetched once.
+        """
+        spans: Dict[str, List[Tuple[int, int]]] = {}
+        for hit in hits:
+            first = max(hit.chunk_index - self.neighbors_before, 0)
+            spans.setdefault(hit.document_id, []).append(
+                (first, hit.chunk_index + self.neighbors_after)
+            )
+
+        windows: List[Tuple[str, int, int]] = []
+        for document_id, ranges in spans.items():
+            ranges.sort()
+            start, end = ranges[0]
+            for next_start, next_end in ranges[1:]:
+                if next_start > end + 1:
+                    windows.append((document_id, start, end))
+                    start = next_start
+                end = max(end, next_end)
+            windows.append((document_id, start, end))
+        return windows
+
+    def neighbor_score(self, hit_score: float, distance: int) -> float:
+        """
+        A neighbor's score: hit_score * decay ** distance for non-negative scores
+
+        Cross-encoder logits can be negative, and multiplying those by the
+        decay would rank a neighbor above its hit. Taking the same fraction
+        of |hit_score| off instead keeps every neighbor at or below its hit.
+        """
+        return hit_score - (1 - self.neighbor_decay ** distance) * abs(hit_score)
+
+    async def expand_neighbors(
+        self, org_id: str, hits: List[SearchCandidate]
+    ) -> List[SearchCandidate]:
+        """
+        Chunks around the hits that aren't hits themselves, best first
+
+        A chunk near several hits appears once, scored (and attributed) by the
+        hit giving it the highest decayed score. Returns no neighbors if the
+        fetch fails, so the hits are still served.
+        """
+        if not hits or (self.neighbors_before <= 0 and self.neighbors_after <= 0):
+            return []
+        try:
+            rows = await self.repository.get_chunk_windows(org_id, self.neighbor_windows(hits))
+        except Exception as e:
+            logger.error(f"Neighbor fetch for org {org_id} failed: {str(e)}")
+            return []
+
+        hit_ids = {hit.id for hit in hits}
+        hits_by_document: Dict[str, List[SearchCandidate]] = {}
+        for hit in hits:
+            hits_by_document.setdefault(hit.document_id, []).append(hit)
+
+        neighbors: List[SearchCandidate] = []
+        for row in rows:
+            if row["id"] in hit_ids:
+                continue
+            best, best_score = None, 0.0
+            for hit in hits_by_document.get(row["document_id"], []):
+                distance = row["chunk_index"] - hit.chunk_index
+                if not -self.neighbors_before <= distance <= self.neighbors_after:
+                    continue
+                score = self.neighbor_score(hit.score, abs(distance))
+                if best is None or score > best_score:
+                    best, best_score = hit, score
+            if best is None:
+                continue
+            neighbors.append(
+                SearchCandidate(
+                    id=row["id"],
+                    document_id=row["document_id"],
+                    document_name=best.document_name,
+                    chunk_index=row["chunk_index"],
+                    page=row.get("page"),
+                    content=row["content"],
+                    vector_score=0.0,
+                    text_score=0.0,
+                    score=best_score,
+                    score_type=best.score_type,
+                    neighbor_of=best.id,
+                )
+            )
+        neighbors.sort(key=lambda c: c.score, reverse=True)
+        return neighbors
@@ -0,0 +1,122 @@
+"""
+float32 embedding helpers: OpenAI base64 decoding, pgvector wire formats and
+the reduced-precision storage tiers (halfvec, binary-quantized bit)
+"""
+
+import base64
+import struct
+from functools import lru_cache
+from typing import Any, Sequence, Union
+
+import numpy as np
+
+# One embedding (1-D) or a batch of them (2-D, one row per text)
+Vector = np.ndarray
+
+_VECTOR_HEADER = struct.Struct(">HH")
+_BIT_HEADER = struct.Struct(">i")
+
+
+def decode_embeddings(items: Sequence[Any], dimensions: int) -> np.ndarray:
+    """
+    Decode embeddings.create data (encoding_format="base64") into one
+    contiguous (len(items), dimensions) float32 array
+
+    Plain float lists (e.g. from a provider that ignores encoding_format)
+    are accepted too.
+    """
+    matrix = np.empty((len(items), dimensions), dtype=np.float32)
+    for row, item in enumerate(items):
+        embedding = item.embedding
+        if isinstance(embedding, str):
+            matrix[row] = np.frombuffer(base64.b64decode(embedding), dtype="<f4")
+        else:
+            matrix[row] = embedding
+    return matrix
+
+
+def as_vector(value: Union[str, Sequence[float], np.ndarray]) -> Vector:
+    """
+    Coerce a pgvector text value ('[0.1,0.2,...]'), list or array to float32
+    """
+    if isinstance(value, np.ndarray):
+        return value.astype(np.float32, copy=False)
+    if isinstance(value, str):
+        return np.fromstring(value.strip()[1:-1], dtype=np.float32, sep=",")
+    return np.asarray(value, dtype=np.float32)
+
+
+def to_pgvector_text(vector: Vector) -> str:
+    """
+    pgvector text literal with round-trip float32 precision (for PostgREST)
+    """
+    vector = as_vector(vector)
+    return _text_format(len(vector)) % tuple(vector.tolist())
+
+
+def to_pgvector_binary(vector: Vector) -> bytes:
+    """
+    pgvector binary format: int16 dimensions, int16 unused, float4[] (big-endian)
+    """
+    vector = as_vector(vector)
+    return _VECTOR_HEADER.pack(len(vector), 0) + vector.astype(">f4").tobytes()
+
+
+def to_halfvec_binary(vector: Vector) -> bytes:
+    """
+    pgvector halfvec binary format: int16 dimensions, int16 unused, float2[]
+    """
+    vector = as_vector(vector)
+    return _VECTOR_HEADER.pack(len(vector), 0) + vector.astype(">f2").tobytes()
+
+
+def binary_quantize(vector: Vector) -> np.ndarray:
+    """
+    One bit per dimension (set where the value is positive), as pgvector's
+    binary_quantize
+    """
+    return as_vector(vector) > 0
+
+
+def to_bit_string(vector: Vector) -> str:
+    """
+    Binary-quantized embedding as a Postgres bit literal ('0101...')
+    """
+    return (binary_quantize(vector).view(np.uint8) + ord("0")).tobytes().decode("ascii")
+
+
+def to_bit_binary(vector: Vector) -> bytes:
+    """
+    Postgres bit binary format: int32 length, bits packed MSB first
+    """
+    bits = binary_quantize(vector)
+    return _BIT_HEADER.pack(len(bits)) + np.packbits(bits).tobytes()
+
+
+def from_pgvector_binary(data: bytes) -> Vector:
+    (dimensions,) = struct.unpack_from(">H", data)
+    return np.frombuffer(data, dtype=">f4", count=dimensions, offset=4).astype(np.float32)
+
+
+def from_pgvector_bytea(value: str) -> Vector:
+    """
+    Decode vector_send() output as PostgREST returns bytea ('\\x' + hex)
+    """
+    return from_pgvector_binary(bytes.fromhex(value[2:]))
+
+
+def from_halfvec_binary(data: bytes) -> Vector:
+    (dimensions,) = struct.unpack_from(">H", data)
+    return np.frombuffer(data, dtype=">f2", count=dimensions, offset=4).astype(np.float32)
+
+
+def from_bit_binary(data: bytes) -> np.ndarray:
+    (length,) = _BIT_HEADER.unpack_from(data)
+    bits = np.unpackbits(np.frombuffer(data, dtype=np.uint8, offset=4))
+    return bits[:length].astype(bool)
+
+
+@lru_cache(maxsize=8)
+def _text_format(dimensions: int) -> str:
+    # %.9g is the shortest fixed precision that round-trips every float32
+    return "[" + ",".join(["%.9g"] * dimensions) + "]"
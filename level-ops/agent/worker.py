@@ -0,0 +1,182 @@
+"""
+Ingestion worker: leases jobs from document_ingest_jobs and runs them
+
+Used when INGEST_BACKEND=postgres. Run any number of these, on any number of
+nodes (from the agent directory):
+
+    python worker.py
+"""
+
+import asyncio
+import logging
+import os
+import signal
+import socket
+import uuid
+from typing import Any, Dict, Set
+
+from config import settings
+from services.container import ServiceContainer
+from services.cpu_pool import cpu_executor
+
+# Configure logging
+logging.basicConfig(
+    level=getattr(logging, settings.LOG_LEVEL),
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+)
+logger = logging.getLogger("worker")
+
+
+class IngestWorker:
+    """
+    Polls the job table, runs up to INGEST_WORKERS jobs concurrently and keeps
+    their leases alive with heartbeats
+
+    Concurrent ingest jobs share one EmbeddingBatcher, so small documents
+    leased together go out in the same embedding requests.
+    """
+
+    def __init__(self):
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.services = ServiceContainer()
+        self.processor = self.services.processor
+        self.financial_analyzer = self.services.financial_analyzer
+        self.queue = self.services.job_queue
+        self._running: Set[asyncio.Task] = set()
+        self._stopping = asyncio.Event()
+
+    async def run(self) -> None:
+        """
+        Lease and run jobs until stop() is called, then drain in-flight jobs
+        """
+        logger.info(
+            f"Worker {self.worker_id} started "
+            f"(concurrency {settings.INGEST_WORKERS})"
+        )
+
+        cpu_executor.start()
+
+        while not self._stopping.is_set():
+            jobs = []
+            free_slots = settings.INGEST_WORKERS - len(self._running)
+            if free_slots > 0:
+                try:
+                    jobs = await self.queue.lease(self.worker_id, free_slots)
+                except Exception as e:
+                    logger.error(f"Failed to lease jobs: {str(e)}")
+
+            for job in jobs:
+                task = asyncio.create_task(self._run_job(job))
+                self._running.add(task)
+                task.add_done_callback(self._running.discard)
+
+            if not jobs:
+                try:
+                    await asyncio.wait_for(
+                        self._stopping.wait(), timeout=settings.JOB_POLL_INTERVAL_S
+                    )
+                except asyncio.TimeoutError:
+                    pass
+
+        if self._running:
+            logger.info(f"Draining {len(self._running)} in-flight jobs")
+            await asyncio.gather(*self._running, return_exceptions=True)
+        await self.services.close()
+        cpu_executor.shutdown()
+        logger.info(f"Worker {self.worker_id} stopped")
+
+    def stop(self) -> None:
+        """
+        Stop leasing new jobs
+        """
+        self._stopping.set()
+
+    async def _run_job(self, job: Dict[str, Any]) -> None:
+        job_id = job["id"]
+        logger.info(
+            f"Running {job['kind']} job {job_id} for document {job['document_id']} "
+            f"(attempt {job['attempts']}/{job['max_attempts']})"
+        )
+
+        execution = asyncio.create_task(self._execute(job))
+        heartbeat = asyncio.create_task(self._heartbeat(job_id, execution))
+        try:
+            result = await execution
+        except asyncio.CancelledError:
+            logger.warning(f"Job {job_id} lost its lease and was abandoned")
+            return
+        except Exception as e:
+            logger.error(f"Job {job_id} failed: {str(e)}")
+            try:
+                await self.queue.fail(job_id, self.worker_id, str(e), job["attempts"])
+            except Exception as fail_error:
+                logger.error(f"Failed to record failure for {job_id}: {str(fail_error)}")
+            return
+        finally:
+            heartbeat.cancel()
+
+        try:
+            await self.queue.complete(job_id, self.worker_id, result)
+        except Exception as e:
+            logger.error(f"Failed to mark job {job_id} completed: {str(e)}")
+
+    async def _heartbeat(self, job_id: str, execution: asyncio.Task) -> None:
+        """
+        Extend the lease periodically; abandon the job if the lease was lost
+        """
+        while True:
+            await asyncio.sleep(settings.JOB_HEARTBEAT_INTERVAL_S)
+            try:
+                owned = await self.queue.heartbeat(job_id, self.worker_id)
+            except Exception as e:
+                logger.warning(f"Heartbeat failed for job {job_id}: {str(e)}")
+                continue
+            if not owned:
+                execution.cancel()
+                return
+
+    async def _execute(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        payload = job.get("payload") or {}
+
+        if job["kind"] == "ingest":
+            status = await self.processor.process_document(
+                job["document_id"],
+                job["org_id"],
+                payload.get("force_reembed", False),
+                self.services.embed_batcher,
+            )
+            if status.status == "failed":
+                raise RuntimeError(status.error_message or "Ingestion failed")
+            return status.model_dump(mode="json")
+
+        if job["kind"] == "financial_analysis":
+            result = await self.financial_analyzer.analyze_document(
+                job["document_id"],
+                job["org_id"],
+                payload["user_id"],
+            )
+            return {
+                "analysis_id": result["analysis_id"],
+                "status": result["status"],
+                "needs_review": result["needs_review"],
+                "processing_time_ms": result["processing_time_ms"],
+            }
+
+        raise ValueError(f"Unknown job kind: {job['kind']}")
+
+
+async def main() -> None:
+    worker = IngestWorker()
+
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, worker.stop)
+        except NotImplementedError:
+            pass  # Signal handlers are unavailable on Windows event loops
+
+    await worker.run()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -47,7 +47,7 @@ export default function SearchPage() {
       const embeddingResponse = await fetch('/api/embeddings', {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify({ text: query })
+        body: JSON.stringify({ text: query, org_id: currentOrg.id })
       });
 
       console.log('Embedding response status:', embeddingResponse.status);
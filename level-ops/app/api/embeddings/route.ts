@@ -1,11 +1,26 @@
 import { NextRequest, NextResponse } from 'next/server';
+import { createClient } from '@/lib/supabase/server';
+import {
+  parseDomainFromHost,
+  resolveOrganizationFromDomain,
+} from '@/lib/server/resolve-organization';
+
+// Past this the agent is treated as unavailable
+const AGENT_TIMEOUT_MS = 10_000;
 
 /**
- * Generate embeddings for text using OpenAI
+ * Generate a query embedding via the RAG agent
+ *
+ * The agent embeds with the same model as the stored chunks, serves repeated
+ * queries from its cache and batches concurrent ones into shared requests.
+ *
+ * The organization comes from the session: the org of the current domain,
+ * otherwise one of the signed-in user's memberships. A body org_id only
+ * selects among those memberships.
  */
 export async function POST(request: NextRequest) {
   try {
-    const { text } = await request.json();
+    const { text, org_id: requestedOrgId } = await request.json();
 
     if (!text) {
       return NextResponse.json(
@@ -14,39 +29,104 @@ export async function POST(request: NextRequest) {
       );
     }
 
-    const openaiApiKey = process.env.OPENAI_API_KEY;
-    if (!openaiApiKey) {
+    const supabase = await createClient();
+    const {
+      data: { user },
+      error: authError,
+    } = await supabase.auth.getUser();
+
+    if (authError || !user) {
+      return NextResponse.json(
+        { error: 'Unauthorized' },
+        { status: 401 }
+      );
+    }
+
+    let orgId = await resolveOrganizationFromDomain(
+      parseDomainFromHost(request.headers.get('host') ?? '')
+    );
+
+    if (!orgId) {
+      const { data: memberships, error: membershipError } = await supabase
+        .from('org_memberships')
+        .select('org_id')
+        .eq('user_id', user.id);
+
+      if (membershipError) {
+        console.error('Membership lookup error:', membershipError);
+        return NextResponse.json(
+          { error: 'Failed to resolve organization' },
+          { status: 500 }
+        );
+      }
+
+      const memberOrgIds = (memberships ?? []).map((m) => m.org_id);
+      if (requestedOrgId && memberOrgIds.includes(requestedOrgId)) {
+        orgId = requestedOrgId;
+      } else if (!requestedOrgId && memberOrgIds.length === 1) {
+        orgId = memberOrgIds[0];
+      }
+    }
+
+    if (!orgId) {
+      return NextResponse.json(
+        { error: 'Not a member of this organization' },
+        { status: 403 }
+      );
+    }
+
+    const fastApiUrl = process.env.FASTAPI_URL;
+    if (!fastApiUrl) {
       return NextResponse.json(
-        { error: 'OpenAI API key not configured' },
+        { error: 'FASTAPI_URL not configured' },
         { status: 500 }
       );
     }
 
-    // Call OpenAI embeddings API
-    const response = await fetch('https://api.openai.com/v1/embeddings', {
-      method: 'POST',
-      headers: {
-        'Authorization': `Bearer ${openaiApiKey}`,
-        'Content-Type': 'application/json',
-      },
-      body: JSON.stringify({
-        model: 'text-embedding-3-small',
-        input: text,
-        dimensions: 1536,
-      }),
-    });
+    let response: Response;
+    try {
+      response = await fetch(`${fastApiUrl}/embed`, {
+        method: 'POST',
+        headers: {
+          'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({ text, org_id: orgId }),
+        signal: AbortSignal.timeout(AGENT_TIMEOUT_MS),
+      });
+    } catch (error) {
+      // Connection refused, DNS failure or timeout
+      console.error('RAG agent unreachable:', error);
+      return NextResponse.json(
+        { error: 'Search is temporarily unavailable. Please try again shortly.' },
+        { status: 503 }
+      );
+    }
 
     if (!response.ok) {
       const errorData = await response.json().catch(() => ({}));
-      console.error('OpenAI API error:', errorData);
+      console.error('RAG agent embed error:', errorData);
+
+      // 409: the org's documents were embedded with a different model
+      if (response.status === 409) {
+        return NextResponse.json(
+          { error: errorData.detail || 'Failed to generate embedding' },
+          { status: 409 }
+        );
+      }
+      // Gateway errors: the agent is down or restarting
+      if ([502, 503, 504].includes(response.status)) {
+        return NextResponse.json(
+          { error: 'Search is temporarily unavailable. Please try again shortly.' },
+          { status: 503 }
+        );
+      }
       return NextResponse.json(
         { error: 'Failed to generate embedding' },
         { status: 500 }
       );
     }
 
-    const data = await response.json();
-    const embedding = data.data[0].embedding;
+    const { embedding } = await response.json();
 
     return NextResponse.json({ embedding });
   } catch (error) {
@@ -49,7 +49,7 @@ export function useRagSearchAction() {
         const embeddingResponse = await fetch("/api/embeddings", {
           method: "POST",
           headers: { "Content-Type": "application/json" },
-          body: JSON.stringify({ text: query }),
+          body: JSON.stringify({ text: query, org_id: currentOrg.id }),
         });
 
         if (!embeddingResponse.ok) {
@@ -0,0 +1,44 @@
+-- Migration: Hash-first embedding dedup for document_chunks
+-- Lets the RAG agent resolve every known chunk hash in an org with a single
+-- round trip before calling the embeddings API.
+-- Created: 2025-10-20
+
+-- ============================================================================
+-- Columns written by the agent (idempotent for databases created before them)
+-- ============================================================================
+
+ALTER TABLE public.document_chunks
+  ADD COLUMN IF NOT EXISTS content_sha256 TEXT,
+  ADD COLUMN IF NOT EXISTS version INTEGER DEFAULT 1;
+
+-- Lookup index for (org, hash) dedup
+CREATE INDEX IF NOT EXISTS idx_document_chunks_org_hash
+  ON public.document_chunks(org_id, content_sha256);
+
+-- ============================================================================
+-- Bulk hash lookup
+-- ============================================================================
+
+-- Returns one stored embedding per known hash. Hashes are passed as an array in
+-- the RPC body, so large documents don't hit PostgREST URL length limits.
+CREATE OR REPLACE FUNCTION public.find_chunk_embeddings_by_hash(
+  match_org_id UUID,
+  content_hashes TEXT[]
+)
+RETURNS TABLE (
+  content_sha256 TEXT,
+  embedding extensions.vector
+)
+LANGUAGE sql
+STABLE
+SET search_path = ''
+AS $$
+  SELECT DISTINCT ON (dc.content_sha256)
+    dc.content_sha256,
+    dc.embedding
+  FROM public.document_chunks dc
+  WHERE dc.org_id = match_org_id
+    AND dc.content_sha256 = ANY(content_hashes)
+    AND dc.embedding IS NOT NULL
+  ORDER BY dc.content_sha256;
+$$;
@@ -0,0 +1,189 @@
+-- Migration: Durable ingestion job queue for the RAG agent
+-- API nodes enqueue work here; any number of `python worker.py` processes
+-- lease jobs with FOR UPDATE SKIP LOCKED, heartbeat while running, and retry
+-- with backoff until max_attempts.
+-- Created: 2025-10-21
+
+-- ============================================================================
+-- Jobs Table
+-- ============================================================================
+
+CREATE TABLE IF NOT EXISTS public.document_ingest_jobs (
+  id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+  kind TEXT NOT NULL DEFAULT 'ingest'
+    CHECK (kind IN ('ingest', 'financial_analysis')),
+  org_id UUID NOT NULL REFERENCES public.organizations(id) ON DELETE CASCADE,
+  document_id UUID NOT NULL REFERENCES public.documents(id) ON DELETE CASCADE,
+  payload JSONB NOT NULL DEFAULT '{}'::jsonb,
+  priority SMALLINT NOT NULL DEFAULT 1, -- 0 = high, 1 = normal, 2 = low
+  status TEXT NOT NULL DEFAULT 'queued'
+    CHECK (status IN ('queued', 'running', 'completed', 'failed')),
+  attempts INTEGER NOT NULL DEFAULT 0,
+  max_attempts INTEGER NOT NULL DEFAULT 3,
+  run_after TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+  leased_by TEXT,
+  lease_expires_at TIMESTAMPTZ,
+  heartbeat_at TIMESTAMPTZ,
+  last_error TEXT,
+  result JSONB,
+  created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+  updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+-- Create indexes
+CREATE INDEX IF NOT EXISTS idx_document_ingest_jobs_ready
+  ON public.document_ingest_jobs(priority, run_after)
+  WHERE status = 'queued';
+CREATE INDEX IF NOT EXISTS idx_document_ingest_jobs_leases
+  ON public.document_ingest_jobs(lease_expires_at)
+  WHERE status = 'running';
+CREATE INDEX IF NOT EXISTS idx_document_ingest_jobs_document
+  ON public.document_ingest_jobs(document_id);
+
+-- Enable RLS (workers use the service role)
+ALTER TABLE public.document_ingest_jobs ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Users can view ingest jobs in their orgs"
+  ON public.document_ingest_jobs FOR SELECT
+  USING (
+    org_id IN (
+      SELECT om.org_id FROM public.org_memberships om
+      WHERE om.user_id = auth.uid()
+    )
+  );
+
+-- Add trigger
+CREATE TRIGGER update_document_ingest_jobs_updated_at
+  BEFORE UPDATE ON public.document_ingest_jobs
+  FOR EACH ROW
+  EXECUTE FUNCTION public.update_updated_at_column();
+
+-- ============================================================================
+-- Leasing
+-- ============================================================================
+
+-- Lease up to batch_size ready jobs for a worker. Jobs whose lease expired
+-- (worker crashed or lost its heartbeat) are picked up again while they have
+-- attempts left; exhausted ones are marked failed.
+CREATE OR REPLACE FUNCTION public.lease_document_ingest_jobs(
+  worker_id TEXT,
+  batch_size INTEGER DEFAULT 1,
+  lease_seconds INTEGER DEFAULT 120
+)
+RETURNS SETOF public.document_ingest_jobs
+LANGUAGE plpgsql
+SET search_path = ''
+AS $$
+BEGIN
+  UPDATE public.document_ingest_jobs
+  SET status = 'failed',
+      last_error = COALESCE(last_error, 'Lease expired after final attempt'),
+      leased_by = NULL,
+      lease_expires_at = NULL
+  WHERE status = 'running'
+    AND lease_expires_at < NOW()
+    AND attempts >= max_attempts;
+
+  RETURN QUERY
+  WITH candidates AS (
+    SELECT j.id
+    FROM public.document_ingest_jobs j
+    WHERE (j.status = 'queued' AND j.run_after <= NOW())
+       OR (j.status = 'running' AND j.lease_expires_at < NOW())
+    ORDER BY j.priority, j.run_after, j.created_at
+    LIMIT batch_size
+    FOR UPDATE SKIP LOCKED
+  )
+  UPDATE public.document_ingest_jobs j
+  SET status = 'running',
+      leased_by = worker_id,
+      lease_expires_at = NOW() + make_interval(secs => lease_seconds),
+      heartbeat_at = NOW(),
+      attempts = j.attempts + 1
+  FROM candidates c
+  WHERE j.id = c.id
+  RETURNING j.*;
+END;
+$$;
+
+-- Extend a lease. Returns false if the worker no longer owns the job.
+CREATE OR REPLACE FUNCTION public.heartbeat_document_ingest_job(
+  job_id UUID,
+  worker_id TEXT,
+  lease_seconds INTEGER DEFAULT 120
+)
+RETURNS BOOLEAN
+LANGUAGE sql
+SET search_path = ''
+AS $$
+  WITH touched AS (
+    UPDATE public.document_ingest_jobs
+    SET heartbeat_at = NOW(),
+        lease_expires_at = NOW() + make_interval(secs => lease_seconds)
+    WHERE id = job_id
+      AND leased_by = worker_id
+      AND status = 'running'
+    RETURNING 1
+  )
+  SELECT EXISTS (SELECT 1 FROM touched);
+$$;
+
+CREATE OR REPLACE FUNCTION public.complete_document_ingest_job(
+  job_id UUID,
+  worker_id TEXT,
+  job_result JSONB DEFAULT NULL
+)
+RETURNS BOOLEAN
+LANGUAGE sql
+SET search_path = ''
+AS $$
+  WITH touched AS (
+    UPDATE public.document_ingest_jobs
+    SET status = 'completed',
+        result = job_result,
+        last_error = NULL,
+        leased_by = NULL,
+        lease_expires_at = NULL
+    WHERE id = job_id
+      AND leased_by = worker_id
+      AND status = 'running'
+    RETURNING 1
+  )
+  SELECT EXISTS (SELECT 1 FROM touched);
+$$;
+
+-- Record a failed attempt: requeue after retry_delay_seconds, or fail for good
+-- once attempts reach max_attempts.
+CREATE OR REPLACE FUNCTION public.fail_document_ingest_job(
+  job_id UUID,
+  worker_id TEXT,
+  error_message TEXT,
+  retry_delay_seconds INTEGER DEFAULT 30
+)
+RETURNS BOOLEAN
+LANGUAGE sql
+SET search_path = ''
+AS $$
+  WITH touched AS (
+    UPDATE public.document_ingest_jobs
+    SET status = CASE WHEN attempts >= max_attempts THEN 'failed' ELSE 'queued' END,
+        run_after = NOW() + make_interval(secs => retry_delay_seconds),
+        last_error = error_message,
+        leased_by = NULL,
+        lease_expires_at = NULL
+    WHERE id = job_id
+      AND leased_by = worker_id
+      AND status = 'running'
+    RETURNING 1
+  )
+  SELECT EXISTS (SELECT 1 FROM touched);
+$$;
+
+-- Queue management is service-role only
+REVOKE EXECUTE ON FUNCTION public.lease_document_ingest_jobs(TEXT, INTEGER, INTEGER) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION public.heartbeat_document_ingest_job(UUID, TEXT, INTEGER) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION public.complete_document_ingest_job(UUID, TEXT, JSONB) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION public.fail_document_ingest_job(UUID, TEXT, TEXT, INTEGER) FROM PUBLIC, anon, authenticated;
+
+-- Add comment
+COMMENT ON TABLE public.document_ingest_jobs IS 'Durable RAG ingestion / financial analysis jobs leased by agent workers';
@@ -0,0 +1,34 @@
+-- Migration: Cheap ingestion status for document_chunks
+-- The agent's /status endpoint now counts chunks with HEAD requests instead of
+-- downloading every embedding, and chunk writes no longer go out over realtime.
+-- Created: 2025-10-22
+
+-- ============================================================================
+-- Realtime: stop broadcasting chunk rows
+-- ============================================================================
+
+-- Every chunk insert/update was broadcast with its full embedding. No client
+-- subscribes to chunks; ingestion progress comes from the agent's
+-- /status/{document_id}/{org_id}/stream endpoint instead.
+DO $$
+BEGIN
+  IF EXISTS (
+    SELECT 1 FROM pg_publication_tables
+    WHERE pubname = 'supabase_realtime'
+      AND schemaname = 'public'
+      AND tablename = 'document_chunks'
+  ) THEN
+    ALTER PUBLICATION supabase_realtime DROP TABLE public.document_chunks;
+  END IF;
+END $$;
+
+-- ============================================================================
+-- Count indexes (index-only scans for total and embedded chunk counts)
+-- ============================================================================
+
+CREATE INDEX IF NOT EXISTS idx_document_chunks_document_org
+  ON public.document_chunks(document_id, org_id);
+
+CREATE INDEX IF NOT EXISTS idx_document_chunks_document_org_embedded
+  ON public.document_chunks(document_id, org_id)
+  WHERE embedding IS NOT NULL;
@@ -0,0 +1,223 @@
+-- Migration: Per-org embedding storage tiers for document_chunks
+-- float32: vector(1536) only (default, unchanged behaviour)
+-- halfvec: halfvec(1536) only, half the heap and index footprint
+-- binary:  bit(1536) indexed for a Hamming first pass, float32 kept unindexed
+--          for rescoring the shortlist
+-- Requires pgvector 0.7.0+ (halfvec, bit indexing, binary_quantize).
+-- Index builds lock writes to document_chunks; run outside peak ingestion.
+-- Created: 2025-10-23
+
+-- ============================================================================
+-- Tier selection
+-- ============================================================================
+
+ALTER TABLE public.organizations
+  ADD COLUMN IF NOT EXISTS embedding_storage_tier TEXT NOT NULL DEFAULT 'float32'
+    CHECK (embedding_storage_tier IN ('float32', 'halfvec', 'binary'));
+
+-- ============================================================================
+-- Tier columns (written by the agent according to the org's tier)
+-- ============================================================================
+
+ALTER TABLE public.document_chunks
+  ADD COLUMN IF NOT EXISTS embedding_half extensions.halfvec(1536),
+  ADD COLUMN IF NOT EXISTS embedding_bit BIT(1536);
+
+-- ============================================================================
+-- ANN indexes (HNSW; replaces ivfflat with its fixed lists = 100)
+-- ============================================================================
+
+DROP INDEX IF EXISTS public.idx_document_chunks_embedding;
+
+-- float32 tier only: binary-tier rows keep float32 for rescoring, unindexed
+CREATE INDEX IF NOT EXISTS idx_document_chunks_embedding_hnsw
+  ON public.document_chunks USING hnsw (embedding extensions.vector_cosine_ops)
+  WHERE embedding_bit IS NULL;
+
+CREATE INDEX IF NOT EXISTS idx_document_chunks_embedding_half
+  ON public.document_chunks USING hnsw (embedding_half extensions.halfvec_cosine_ops)
+  WHERE embedding_half IS NOT NULL;
+
+CREATE INDEX IF NOT EXISTS idx_document_chunks_embedding_bit
+  ON public.document_chunks USING hnsw (embedding_bit extensions.bit_hamming_ops)
+  WHERE embedding_bit IS NOT NULL;
+
+-- ============================================================================
+-- Convert an org's existing chunks to its current tier
+-- ============================================================================
+
+-- Unchanged chunks are never rewritten by ingestion, so run this after changing
+-- organizations.embedding_storage_tier. Returns the number of rows converted.
+CREATE OR REPLACE FUNCTION public.apply_embedding_storage_tier(target_org_id UUID)
+RETURNS INTEGER
+LANGUAGE plpgsql
+SET search_path = ''
+AS $$
+DECLARE
+  tier TEXT;
+  converted INTEGER;
+BEGIN
+  SELECT o.embedding_storage_tier INTO tier
+  FROM public.organizations o
+  WHERE o.id = target_org_id;
+
+  IF tier = 'halfvec' THEN
+    UPDATE public.document_chunks dc
+    SET embedding_half = COALESCE(dc.embedding_half, dc.embedding::extensions.halfvec),
+        embedding = NULL,
+        embedding_bit = NULL
+    WHERE dc.org_id = target_org_id
+      AND (dc.embedding IS NOT NULL OR dc.embedding_bit IS NOT NULL);
+  ELSIF tier = 'binary' THEN
+    UPDATE public.document_chunks dc
+    SET embedding = COALESCE(dc.embedding, dc.embedding_half::extensions.vector),
+        embedding_bit = extensions.binary_quantize(
+          COALESCE(dc.embedding, dc.embedding_half::extensions.vector)
+        )::BIT(1536),
+        embedding_half = NULL
+    WHERE dc.org_id = target_org_id
+      AND (dc.embedding_bit IS NULL OR dc.embedding_half IS NOT NULL)
+      AND (dc.embedding IS NOT NULL OR dc.embedding_half IS NOT NULL);
+  ELSE
+    UPDATE public.document_chunks dc
+    SET embedding = COALESCE(dc.embedding, dc.embedding_half::extensions.vector),
+        embedding_half = NULL,
+        embedding_bit = NULL
+    WHERE dc.org_id = target_org_id
+      AND (dc.embedding_half IS NOT NULL OR dc.embedding_bit IS NOT NULL);
+  END IF;
+
+  GET DIAGNOSTICS converted = ROW_COUNT;
+  RETURN converted;
+END;
+$$;
+
+-- ============================================================================
+-- Hash dedup: halfvec-tier rows have no float32 column
+-- ============================================================================
+
+CREATE OR REPLACE FUNCTION public.find_chunk_embeddings_by_hash(
+  match_org_id UUID,
+  content_hashes TEXT[]
+)
+RETURNS TABLE (
+  content_sha256 TEXT,
+  embedding extensions.vector
+)
+LANGUAGE sql
+STABLE
+SET search_path = ''
+AS $$
+  SELECT DISTINCT ON (dc.content_sha256)
+    dc.content_sha256,
+    COALESCE(dc.embedding, dc.embedding_half::extensions.vector)
+  FROM public.document_chunks dc
+  WHERE dc.org_id = match_org_id
+    AND dc.content_sha256 = ANY(content_hashes)
+    AND (dc.embedding IS NOT NULL OR dc.embedding_half IS NOT NULL)
+  ORDER BY dc.content_sha256;
+$$;
+
+-- ============================================================================
+-- Tier-aware hybrid search
+-- ============================================================================
+
+-- Same signature and result shape as the dashboard's existing RPC. Vector
+-- candidates come from the org's tier index (binary: Hamming shortlist of
+-- k * rescore_factor rows, rescored with float32 cosine), then are fused with
+-- full-text rank: 0.7 * similarity + 0.3 * ts_rank. Operators are
+-- schema-qualified because search_path is empty.
+DROP FUNCTION IF EXISTS public.search_chunks_hybrid(extensions.vector, TEXT, UUID, INTEGER);
+DROP FUNCTION IF EXISTS public.search_chunks_hybrid(extensions.vector, TEXT, UUID, INTEGER, DOUBLE PRECISION);
+
+CREATE FUNCTION public.search_chunks_hybrid(
+  query_embedding extensions.vector(1536),
+  query_text TEXT,
+  org UUID,
+  k INTEGER DEFAULT 20,
+  rescore_factor INTEGER DEFAULT 10
+)
+RETURNS TABLE (
+  id UUID,
+  document_id UUID,
+  document_name TEXT,
+  chunk_index INTEGER,
+  page INTEGER,
+  content TEXT,
+  sim DOUBLE PRECISION,
+  bm25 DOUBLE PRECISION,
+  fused DOUBLE PRECISION
+)
+LANGUAGE plpgsql
+STABLE
+SET search_path = ''
+AS $$
+DECLARE
+  tier TEXT;
+  candidate_count INTEGER := GREATEST(k * 4, 40);
+BEGIN
+  SELECT o.embedding_storage_tier INTO tier
+  FROM public.organizations o
+  WHERE o.id = org;
+
+  IF tier = 'binary' THEN
+    candidate_count := GREATEST(k * rescore_factor, 40);
+  END IF;
+  -- Filtered HNSW scans stop after ef_search rows; keep it above the shortlist
+  PERFORM set_config('hnsw.ef_search', LEAST(candidate_count, 1000)::TEXT, true);
+
+  RETURN QUERY
+  WITH candidates AS (
+    SELECT c.id, c.sim
+    FROM (
+      SELECT dc.id, 1 - (dc.embedding OPERATOR(extensions.<=>) query_embedding) AS sim
+      FROM public.document_chunks dc
+      WHERE tier = 'float32'
+        AND dc.org_id = org
+        AND dc.embedding_bit IS NULL
+      ORDER BY dc.embedding OPERATOR(extensions.<=>) query_embedding
+      LIMIT candidate_count
+    ) c
+    UNION ALL
+    SELECT h.id, h.sim
+    FROM (
+      SELECT dc.id,
+        1 - (dc.embedding_half OPERATOR(extensions.<=>) query_embedding::extensions.halfvec) AS sim
+      FROM public.document_chunks dc
+      WHERE tier = 'halfvec'
+        AND dc.org_id = org
+        AND dc.embedding_half IS NOT NULL
+      ORDER BY dc.embedding_half OPERATOR(extensions.<=>) query_embedding::extensions.halfvec
+      LIMIT candidate_count
+    ) h
+    UNION ALL
+    SELECT b.id, 1 - (b.embedding OPERATOR(extensions.<=>) query_embedding) AS sim
+    FROM (
+      SELECT dc.id, dc.embedding
+      FROM public.document_chunks dc
+      WHERE tier = 'binary'
+        AND dc.org_id = org
+        AND dc.embedding_bit IS NOT NULL
+      ORDER BY dc.embedding_bit OPERATOR(extensions.<~>) extensions.binary_quantize(query_embedding)::BIT(1536)
+      LIMIT candidate_count
+    ) b
+  )
+  SELECT
+    dc.id,
+    dc.document_id,
+    d.name AS document_name,
+    dc.chunk_index,
+    (dc.metadata->>'page_start')::INTEGER AS page,
+    dc.content,
+    c.sim::DOUBLE PRECISION,
+    ts_rank(to_tsvector('english', dc.content), plainto_tsquery('english', query_text))::DOUBLE PRECISION AS bm25,
+    (0.7 * c.sim + 0.3 * ts_rank(to_tsvector('english', dc.content), plainto_tsquery('english', query_text)))::DOUBLE PRECISION AS fused
+  FROM candidates c
+  JOIN public.document_chunks dc ON dc.id = c.id
+  JOIN public.documents d ON d.id = dc.document_id
+  ORDER BY fused DESC
+  LIMIT k;
+END;
+$$;
+
+GRANT EXECUTE ON FUNCTION public.search_chunks_hybrid(extensions.vector, TEXT, UUID, INTEGER, INTEGER) TO authenticated, service_role;
@@ -0,0 +1,69 @@
+-- Migration: Record the embedding model and dimensions on chunks and pin each org to one
+-- The agent's embedding provider is configurable (OpenAI, local CPU model, hash
+-- fake); vectors from different models must never be searched or reused together.
+-- The backfill rewrites every existing chunk row once; run outside peak ingestion.
+-- Created: 2025-10-24
+
+-- ============================================================================
+-- Model columns
+-- ============================================================================
+
+-- Set by the agent on an org's first ingestion; documents embedded with any
+-- other model are rejected until it is cleared (and the org re-embedded)
+ALTER TABLE public.organizations
+  ADD COLUMN IF NOT EXISTS embedding_model TEXT,
+  ADD COLUMN IF NOT EXISTS embedding_dimensions INTEGER;
+
+-- embedding_dimensions is the model's own width; narrower vectors are
+-- zero-padded to the 1536-wide columns
+ALTER TABLE public.document_chunks
+  ADD COLUMN IF NOT EXISTS embedding_model TEXT,
+  ADD COLUMN IF NOT EXISTS embedding_dimensions INTEGER;
+
+-- ============================================================================
+-- Backfill: everything embedded so far came from text-embedding-3-small
+-- ============================================================================
+
+UPDATE public.document_chunks
+SET embedding_model = 'text-embedding-3-small',
+    embedding_dimensions = 1536
+WHERE embedding_model IS NULL
+  AND (embedding IS NOT NULL OR embedding_half IS NOT NULL);
+
+UPDATE public.organizations o
+SET embedding_model = 'text-embedding-3-small',
+    embedding_dimensions = 1536
+WHERE o.embedding_model IS NULL
+  AND EXISTS (
+    SELECT 1 FROM public.document_chunks dc WHERE dc.org_id = o.id
+  );
+
+-- ============================================================================
+-- Hash dedup only reuses embeddings from the same model
+-- ============================================================================
+
+DROP FUNCTION IF EXISTS public.find_chunk_embeddings_by_hash(UUID, TEXT[]);
+
+CREATE FUNCTION public.find_chunk_embeddings_by_hash(
+  match_org_id UUID,
+  content_hashes TEXT[],
+  match_model TEXT DEFAULT NULL
+)
+RETURNS TABLE (
+  content_sha256 TEXT,
+  embedding extensions.vector
+)
+LANGUAGE sql
+STABLE
+SET search_path = ''
+AS $$
+  SELECT DISTINCT ON (dc.content_sha256)
+    dc.content_sha256,
+    COALESCE(dc.embedding, dc.embedding_half::extensions.vector)
+  FROM public.document_chunks dc
+  WHERE dc.org_id = match_org_id
+    AND dc.content_sha256 = ANY(content_hashes)
+    AND (match_model IS NULL OR dc.embedding_model = match_model)
+    AND (dc.embedding IS NOT NULL OR dc.embedding_half IS NOT NULL)
+  ORDER BY dc.content_sha256;
+$$;
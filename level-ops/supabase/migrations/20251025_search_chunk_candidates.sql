@@ -0,0 +1,261 @@
+-- Migration: Stored tsvector and a candidate-retrieval RPC for the agent's POST /search
+-- Full-text rank used to call to_tsvector(content) on every candidate row per
+-- query; it is now computed once per write into document_chunks.tsv.
+-- Created: 2025-10-25
+
+-- ============================================================================
+-- Stored tsvector
+-- ============================================================================
+
+-- Some databases already have a plain tsv column that nothing populated; keep
+-- it and maintain it with a trigger. Otherwise add it as a generated column.
+DO $$
+DECLARE
+  tsv_generated CHAR;
+BEGIN
+  SELECT a.attgenerated INTO tsv_generated
+  FROM pg_attribute a
+  WHERE a.attrelid = 'public.document_chunks'::regclass
+    AND a.attname = 'tsv'
+    AND NOT a.attisdropped;
+
+  IF NOT FOUND THEN
+    ALTER TABLE public.document_chunks
+      ADD COLUMN tsv tsvector
+      GENERATED ALWAYS AS (to_tsvector('english', coalesce(content, ''))) STORED;
+  ELSIF tsv_generated = '' THEN
+    CREATE OR REPLACE FUNCTION public.document_chunks_set_tsv()
+    RETURNS TRIGGER
+    LANGUAGE plpgsql
+    SET search_path = ''
+    AS $fn$
+    BEGIN
+      NEW.tsv := to_tsvector('english', coalesce(NEW.content, ''));
+      RETURN NEW;
+    END;
+    $fn$;
+
+    DROP TRIGGER IF EXISTS document_chunks_set_tsv ON public.document_chunks;
+    CREATE TRIGGER document_chunks_set_tsv
+      BEFORE INSERT OR UPDATE OF content ON public.document_chunks
+      FOR EACH ROW EXECUTE FUNCTION public.document_chunks_set_tsv();
+
+    UPDATE public.document_chunks
+    SET tsv = to_tsvector('english', coalesce(content, ''))
+    WHERE tsv IS NULL;
+  END IF;
+END $$;
+
+-- Replaces the expression index on to_tsvector('english', content)
+DROP INDEX IF EXISTS public.idx_document_chunks_content_fts;
+
+CREATE INDEX IF NOT EXISTS idx_document_chunks_tsv
+  ON public.document_chunks USING gin (tsv);
+
+-- ============================================================================
+-- Candidate retrieval for POST /search
+-- ============================================================================
+
+-- Union of the match_count nearest chunks (from the org's storage-tier index)
+-- and the match_count best full-text matches, each with both raw scores:
+-- vector_score = cosine similarity, text_score = ts_rank_cd normalized to
+-- 0-1 (0 when the text doesn't match). Fusion and everything after it runs in
+-- the agent.
+CREATE OR REPLACE FUNCTION public.search_chunk_candidates(
+  query_embedding extensions.vector(1536),
+  query_text TEXT,
+  match_org_id UUID,
+  match_count INTEGER DEFAULT 100,
+  rescore_factor INTEGER DEFAULT 10
+)
+RETURNS TABLE (
+  id UUID,
+  document_id UUID,
+  document_name TEXT,
+  chunk_index INTEGER,
+  page INTEGER,
+  content TEXT,
+  vector_score DOUBLE PRECISION,
+  text_score DOUBLE PRECISION
+)
+LANGUAGE plpgsql
+STABLE
+SET search_path = ''
+AS $$
+DECLARE
+  tier TEXT;
+  vector_count INTEGER := match_count;
+  query_ts tsquery := websearch_to_tsquery('english', query_text);
+BEGIN
+  SELECT o.embedding_storage_tier INTO tier
+  FROM public.organizations o
+  WHERE o.id = match_org_id;
+
+  IF tier = 'binary' THEN
+    vector_count := match_count * rescore_factor;
+  END IF;
+  PERFORM set_config('hnsw.ef_search', LEAST(GREATEST(vector_count, 40), 1000)::TEXT, true);
+
+  RETURN QUERY
+  WITH vector_candidates AS (
+    (
+      SELECT dc.id
+      FROM public.document_chunks dc
+      WHERE tier = 'float32'
+        AND dc.org_id = match_org_id
+        AND dc.embedding_bit IS NULL
+      ORDER BY dc.embedding OPERATOR(extensions.<=>) query_embedding
+      LIMIT match_count
+    )
+    UNION ALL
+    (
+      SELECT dc.id
+      FROM public.document_chunks dc
+      WHERE tier = 'halfvec'
+        AND dc.org_id = match_org_id
+        AND dc.embedding_half IS NOT NULL
+      ORDER BY dc.embedding_half OPERATOR(extensions.<=>) query_embedding::extensions.halfvec
+      LIMIT match_count
+    )
+    UNION ALL
+    (
+      -- Hamming shortlist, rescored with float32 below; keep the best match_count
+      SELECT b.id
+      FROM (
+        SELECT dc.id, dc.embedding
+        FROM public.document_chunks dc
+        WHERE tier = 'binary'
+          AND dc.org_id = match_org_id
+          AND dc.embedding_bit IS NOT NULL
+        ORDER BY dc.embedding_bit OPERATOR(extensions.<~>) extensions.binary_quantize(query_embedding)::BIT(1536)
+        LIMIT vector_count
+      ) b
+      ORDER BY b.embedding OPERATOR(extensions.<=>) query_embedding
+      LIMIT match_count
+    )
+  ),
+  text_candidates AS (
+    SELECT dc.id
+    FROM public.document_chunks dc
+    WHERE dc.org_id = match_org_id
+      AND dc.tsv @@ query_ts
+    ORDER BY ts_rank_cd(dc.tsv, query_ts, 32) DESC
+    LIMIT match_count
+  ),
+  candidates AS (
+    SELECT vc.id FROM vector_candidates vc
+    UNION
+    SELECT tc.id FROM text_candidates tc
+  )
+  SELECT
+    dc.id,
+    dc.document_id,
+    d.name AS document_name,
+    dc.chunk_index,
+    (dc.metadata->>'page_start')::INTEGER AS page,
+    dc.content,
+    (1 - (COALESCE(dc.embedding, dc.embedding_half::extensions.vector)
+      OPERATOR(extensions.<=>) query_embedding))::DOUBLE PRECISION AS vector_score,
+    ts_rank_cd(dc.tsv, query_ts, 32)::DOUBLE PRECISION AS text_score
+  FROM candidates c
+  JOIN public.document_chunks dc ON dc.id = c.id
+  JOIN public.documents d ON d.id = dc.document_id;
+END;
+$$;
+
+GRANT EXECUTE ON FUNCTION public.search_chunk_candidates(extensions.vector, TEXT, UUID, INTEGER, INTEGER) TO service_role;
+
+-- ============================================================================
+-- Dashboard RPC: rank full text from the stored tsvector
+-- ============================================================================
+
+CREATE OR REPLACE FUNCTION public.search_chunks_hybrid(
+  query_embedding extensions.vector(1536),
+  query_text TEXT,
+  org UUID,
+  k INTEGER DEFAULT 20,
+  rescore_factor INTEGER DEFAULT 10
+)
+RETURNS TABLE (
+  id UUID,
+  document_id UUID,
+  document_name TEXT,
+  chunk_index INTEGER,
+  page INTEGER,
+  content TEXT,
+  sim DOUBLE PRECISION,
+  bm25 DOUBLE PRECISION,
+  fused DOUBLE PRECISION
+)
+LANGUAGE plpgsql
+STABLE
+SET search_path = ''
+AS $$
+DECLARE
+  tier TEXT;
+  candidate_count INTEGER := GREATEST(k * 4, 40);
+  query_ts tsquery := plainto_tsquery('english', query_text);
+BEGIN
+  SELECT o.embedding_storage_tier INTO tier
+  FROM public.organizations o
+  WHERE o.id = org;
+
+  IF tier = 'binary' THEN
+    candidate_count := GREATEST(k * rescore_factor, 40);
+  END IF;
+  -- Filtered HNSW scans stop after ef_search rows; keep it above the shortlist
+  PERFORM set_config('hnsw.ef_search', LEAST(candidate_count, 1000)::TEXT, true);
+
+  RETURN QUERY
+  WITH candidates AS (
+    SELECT c.id, c.sim
+    FROM (
+      SELECT dc.id, 1 - (dc.embedding OPERATOR(extensions.<=>) query_embedding) AS sim
+      FROM public.document_chunks dc
+      WHERE tier = 'float32'
+        AND dc.org_id = org
+        AND dc.embedding_bit IS NULL
+      ORDER BY dc.embedding OPERATOR(extensions.<=>) query_embedding
+      LIMIT candidate_count
+    ) c
+    UNION ALL
+    SELECT h.id, h.sim
+    FROM (
+      SELECT dc.id,
+        1 - (dc.embedding_half OPERATOR(extensions.<=>) query_embedding::extensions.halfvec) AS sim
+      FROM public.document_chunks dc
+      WHERE tier = 'halfvec'
+        AND dc.org_id = org
+        AND dc.embedding_half IS NOT NULL
+      ORDER BY dc.embedding_half OPERATOR(extensions.<=>) query_embedding::extensions.halfvec
+      LIMIT candidate_count
+    ) h
+    UNION ALL
+    SELECT b.id, 1 - (b.embedding OPERATOR(extensions.<=>) query_embedding) AS sim
+    FROM (
+      SELECT dc.id, dc.embedding
+      FROM public.document_chunks dc
+      WHERE tier = 'binary'
+        AND dc.org_id = org
+        AND dc.embedding_bit IS NOT NULL
+      ORDER BY dc.embedding_bit OPERATOR(extensions.<~>) extensions.binary_quantize(query_embedding)::BIT(1536)
+      LIMIT candidate_count
+    ) b
+  )
+  SELECT
+    dc.id,
+    dc.document_id,
+    d.name AS document_name,
+    dc.chunk_index,
+    (dc.metadata->>'page_start')::INTEGER AS page,
+    dc.content,
+    c.sim::DOUBLE PRECISION,
+    ts_rank(dc.tsv, query_ts)::DOUBLE PRECISION AS bm25,
+    (0.7 * c.sim + 0.3 * ts_rank(dc.tsv, query_ts))::DOUBLE PRECISION AS fused
+  FROM candidates c
+  JOIN public.document_chunks dc ON dc.id = c.id
+  JOIN public.documents d ON d.id = dc.document_id
+  ORDER BY fused DESC
+  LIMIT k;
+END;
+$$;
@@ -0,0 +1,117 @@
+-- Migration: Return candidate embeddings from search_chunk_candidates
+-- The agent's MMR stage needs every candidate's vector. Fetching them with the
+-- candidates saves a second round trip; they are sent in pgvector's binary
+-- format (vector_send, hex-encoded bytea through PostgREST), which is smaller
+-- than the text form and decodes without parsing floats.
+-- Created: 2025-10-26
+
+DROP FUNCTION IF EXISTS public.search_chunk_candidates(extensions.vector, TEXT, UUID, INTEGER, INTEGER);
+
+CREATE FUNCTION public.search_chunk_candidates(
+  query_embedding extensions.vector(1536),
+  query_text TEXT,
+  match_org_id UUID,
+  match_count INTEGER DEFAULT 100,
+  rescore_factor INTEGER DEFAULT 10,
+  include_embeddings BOOLEAN DEFAULT false
+)
+RETURNS TABLE (
+  id UUID,
+  document_id UUID,
+  document_name TEXT,
+  chunk_index INTEGER,
+  page INTEGER,
+  content TEXT,
+  vector_score DOUBLE PRECISION,
+  text_score DOUBLE PRECISION,
+  embedding BYTEA
+)
+LANGUAGE plpgsql
+STABLE
+SET search_path = ''
+AS $$
+DECLARE
+  tier TEXT;
+  vector_count INTEGER := match_count;
+  query_ts tsquery := websearch_to_tsquery('english', query_text);
+BEGIN
+  SELECT o.embedding_storage_tier INTO tier
+  FROM public.organizations o
+  WHERE o.id = match_org_id;
+
+  IF tier = 'binary' THEN
+    vector_count := match_count * rescore_factor;
+  END IF;
+  PERFORM set_config('hnsw.ef_search', LEAST(GREATEST(vector_count, 40), 1000)::TEXT, true);
+
+  RETURN QUERY
+  WITH vector_candidates AS (
+    (
+      SELECT dc.id
+      FROM public.document_chunks dc
+      WHERE tier = 'float32'
+        AND dc.org_id = match_org_id
+        AND dc.embedding_bit IS NULL
+      ORDER BY dc.embedding OPERATOR(extensions.<=>) query_embedding
+      LIMIT match_count
+    )
+    UNION ALL
+    (
+      SELECT dc.id
+      FROM public.document_chunks dc
+      WHERE tier = 'halfvec'
+        AND dc.org_id = match_org_id
+        AND dc.embedding_half IS NOT NULL
+      ORDER BY dc.embedding_half OPERATOR(extensions.<=>) query_embedding::extensions.halfvec
+      LIMIT match_count
+    )
+    UNION ALL
+    (
+      -- Hamming shortlist, rescored with float32 below; keep the best match_count
+      SELECT b.id
+      FROM (
+        SELECT dc.id, dc.embedding
+        FROM public.document_chunks dc
+        WHERE tier = 'binary'
+          AND dc.org_id = match_org_id
+          AND dc.embedding_bit IS NOT NULL
+        ORDER BY dc.embedding_bit OPERATOR(extensions.<~>) extensions.binary_quantize(query_embedding)::BIT(1536)
+        LIMIT vector_count
+      ) b
+      ORDER BY b.embedding OPERATOR(extensions.<=>) query_embedding
+      LIMIT match_count
+    )
+  ),
+  text_candidates AS (
+    SELECT dc.id
+    FROM public.document_chunks dc
+    WHERE dc.org_id = match_org_id
+      AND dc.tsv @@ query_ts
+    ORDER BY ts_rank_cd(dc.tsv, query_ts, 32) DESC
+    LIMIT match_count
+  ),
+  candidates AS (
+    SELECT vc.id FROM vector_candidates vc
+    UNION
+    SELECT tc.id FROM text_candidates tc
+  )
+  SELECT
+    dc.id,
+    dc.document_id,
+    d.name AS document_name,
+    dc.chunk_index,
+    (dc.metadata->>'page_start')::INTEGER AS page,
+    dc.content,
+    (1 - (COALESCE(dc.embedding, dc.embedding_half::extensions.vector)
+      OPERATOR(extensions.<=>) query_embedding))::DOUBLE PRECISION AS vector_score,
+    ts_rank_cd(dc.tsv, query_ts, 32)::DOUBLE PRECISION AS text_score,
+    CASE WHEN include_embeddings THEN
+      extensions.vector_send(COALESCE(dc.embedding, dc.embedding_half::extensions.vector))
+    END AS embedding
+  FROM candidates c
+  JOIN public.document_chunks dc ON dc.id = c.id
+  JOIN public.documents d ON d.id = dc.document_id;
+END;
+$$;
+
+GRANT EXECUTE ON FUNCTION public.search_chunk_candidates(extensions.vector, TEXT, UUID, INTEGER, INTEGER, BOOLEAN) TO service_role;
@@ -0,0 +1,40 @@
+-- Migration: Fetch neighbor windows for many search hits in one call
+-- The agent expands each search hit with its NEIGHBOR_WINDOW_BEFORE/AFTER
+-- neighbors. Rather than one query per hit, it sends every merged
+-- (document_id, chunk_index range) window at once; each window is a range
+-- scan on the UNIQUE(document_id, chunk_index) index.
+-- Created: 2025-10-27
+
+CREATE OR REPLACE FUNCTION public.get_chunk_windows(
+  match_org_id UUID,
+  window_document_ids UUID[],
+  window_starts INTEGER[],
+  window_ends INTEGER[]
+)
+RETURNS TABLE (
+  id UUID,
+  document_id UUID,
+  chunk_index INTEGER,
+  page INTEGER,
+  content TEXT
+)
+LANGUAGE sql
+STABLE
+SET search_path = ''
+AS $$
+  SELECT
+    dc.id,
+    dc.document_id,
+    dc.chunk_index,
+    (dc.metadata->>'page_start')::INTEGER AS page,
+    dc.content
+  FROM unnest(window_document_ids, window_starts, window_ends)
+    AS w(document_id, start_index, end_index)
+  JOIN public.document_chunks dc
+    ON dc.document_id = w.document_id
+   AND dc.chunk_index BETWEEN w.start_index AND w.end_index
+  WHERE dc.org_id = match_org_id
+  ORDER BY dc.document_id, dc.chunk_index;
+$$;
+
+GRANT EXECUTE ON FUNCTION public.get_chunk_windows(UUID, UUID[], INTEGER[], INTEGER[]) TO service_role;
@@ -0,0 +1,14 @@
+-- Migration: Make the embedded-chunk count index match every storage tier
+-- 20251022 indexed (document_id, org_id) WHERE embedding IS NOT NULL, but since
+-- the halfvec tier (20251023) the agent counts embedded chunks with
+-- embedding IS NOT NULL OR embedding_half IS NOT NULL. That predicate doesn't
+-- imply the index's, so the count fell back to scanning the table. The new
+-- predicate is the same as the agent's filter (binary-tier rows keep their
+-- float32 embedding for rescoring, so they're covered too).
+-- Created: 2025-10-28
+
+CREATE INDEX IF NOT EXISTS idx_document_chunks_document_org_any_embedding
+  ON public.document_chunks(document_id, org_id)
+  WHERE embedding IS NOT NULL OR embedding_half IS NOT NULL;
+
+DROP INDEX IF EXISTS public.idx_document_chunks_document_org_embedded;